@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from decouple import config
 import dj_database_url
 
@@ -70,6 +71,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'participants.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -78,6 +80,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'participants.replica.ReplicaStickinessMiddleware',
+    'participants.workloads.WorkloadIsolationMiddleware',
 ]
 
 ROOT_URLCONF = 'congress_checkin.urls'
@@ -92,6 +96,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'participants.events.current_event',
             ],
         },
     },
@@ -103,9 +108,62 @@ DATABASES = {
     'default': dj_database_url.parse(config('DATABASE_URL'))
 }
 
+# Optional read replica for the heavy read views (dashboards, lists, exports).
+# Locally, point it at a copy of the SQLite file to try the routing.
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(REPLICA_DATABASE_URL)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['participants.replica.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Live scan metrics are aggregated across the host's gunicorn workers through their
+# own file-based cache; everything else keeps the default per-process cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'metrics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('METRICS_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'congress_checkin_metrics')),
+    },
+}
+
+# Uploaded spreadsheets wait here until their background import job has run
+IMPORT_DIR = config('IMPORT_DIR', default=os.path.join(tempfile.gettempdir(), 'congress_checkin_imports'))
+IMPORT_WORKERS = config('IMPORT_WORKERS', default=1, cast=int)
+
+# Change feed (api/changes/) holds back entries younger than this, so slow transactions
+# can't commit below a cursor a consumer has already passed. Only used on backends
+# other than SQLite and PostgreSQL, where journal ids already commit in order
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=2, cast=int)
+
+# Memory-mapped exact-match index for scan_qr, one file per event shared by all workers on the host
+SCAN_INDEX_ENABLED = config('SCAN_INDEX_ENABLED', default=True, cast=bool)
+SCAN_INDEX_DIR = config('SCAN_INDEX_DIR', default=os.path.join(tempfile.gettempdir(), 'congress_checkin_index'))
+
+# Heavy views (exports, imports, AI report, delete-all) share this many slots across all
+# workers on the host; keep it below the gunicorn worker count so scans always find one.
+# Overflow gets 503 + Retry-After right away. 0 turns the limit off.
+HEAVY_CONCURRENCY = config('HEAVY_CONCURRENCY', default=1, cast=int)
+# Background imports queue for slots of their own instead (0: no limit)
+BACKGROUND_CONCURRENCY = config('BACKGROUND_CONCURRENCY', default=1, cast=int)
+HEAVY_RETRY_AFTER = config('HEAVY_RETRY_AFTER', default=30, cast=int)
+WORKLOAD_DIR = config('WORKLOAD_DIR', default=os.path.join(tempfile.gettempdir(), 'congress_checkin_workloads'))
+
+# Online database snapshots (snapshot_db / restore_db); keep them off the app's temp space
+SNAPSHOT_DIR = config('SNAPSHOT_DIR', default=os.path.join(BASE_DIR, 'snapshots'))
+SNAPSHOT_KEEP = config('SNAPSHOT_KEEP', default=48, cast=int)
+
+# Opt-in request profiler: a sampled fraction under cProfile, plus stacks of every slow request
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.01, cast=float)
+PROFILING_SLOW_MS = config('PROFILING_SLOW_MS', default=2000, cast=int)
+PROFILING_DIR = config('PROFILING_DIR', default=os.path.join(tempfile.gettempdir(), 'congress_checkin_profiles'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,10 +1,147 @@
+import hashlib
+
+from django import forms
 from django.contrib import admin
-from .models import Participant, CustomUser
+from django.contrib.auth.admin import UserAdmin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils.functional import cached_property
+
+from . import journal, versioning
+from .fuzzy import normalize
+from .models import MEAL_BITS, MEAL_FIELDS, Participant, CustomUser, Event
+
+ADMIN_CACHE_TIMEOUT = 10 * 60
+
+
+def _roster_stamp():
+    # Cached admin facts follow who is on the rosters, so scans and meal service don't
+    # retire them. Counts filtered on payment can lag a payment change by up to
+    # ADMIN_CACHE_TIMEOUT; like the planner estimate below, they size the pages only.
+    return versioning.roster_stamp()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids a COUNT(*) over the whole roster on every page load.
+
+    The unfiltered changelist on PostgreSQL uses the planner's row estimate; any
+    other count runs once per roster change and is then served from the cache.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return row[0]
+
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(f"{sql}{params}".encode('utf-8')).hexdigest()
+        key = f"admin:count:{_roster_stamp()}:{digest}"
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, ADMIN_CACHE_TIMEOUT)
+        return count
+
+
+class NationalityFilter(admin.SimpleListFilter):
+    """Nationality facet whose DISTINCT scan runs once per roster change."""
+    title = 'nationality'
+    parameter_name = 'nationality'
+
+    def lookups(self, request, model_admin):
+        key = f"admin:nationalities:{_roster_stamp()}"
+        values = cache.get(key)
+        if values is None:
+            values = list(
+                Participant.objects.order_by('nationality').values_list('nationality', flat=True).distinct()
+            )
+            cache.set(key, values, ADMIN_CACHE_TIMEOUT)
+        return [(value, value) for value in values]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(nationality=self.value())
+        return queryset
+
+
+class ParticipantAdminForm(forms.ModelForm):
+    # meals_served is a bitmask; edit it as one checkbox per meal
+    meals = forms.MultipleChoiceField(
+        choices=[(field, field.replace('_', ' ')) for field in MEAL_FIELDS],
+        widget=forms.CheckboxSelectMultiple, required=False, label='Meals served',
+    )
+
+    class Meta:
+        model = Participant
+        exclude = ('meals_served',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial['meals'] = self.instance.served_meals
+
+    def save(self, commit=True):
+        self.instance.meals_served = sum(MEAL_BITS[field] for field in self.cleaned_data['meals'])
+        return super().save(commit)
+
 
 @admin.register(Participant)
 class ParticipantAdmin(admin.ModelAdmin):
-    list_display = ('full_name', 'nationality', 'paid')
-    list_filter = ('paid', 'nationality')
-    search_fields = ('full_name',)
+    form = ParticipantAdminForm
+    list_display = ('full_name', 'nationality', 'paid', 'event')
+    list_filter = ('event', 'paid', NationalityFilter)
+    list_select_related = ('event',)
+    search_fields = ('search_name',)
+    search_help_text = "Part of the name; case and accents are ignored."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Every word has to appear somewhere in the normalized name, like the stock
+        # icontains search; a plain LIKE on search_name is served by the trigram index
+        # on PostgreSQL (migration 0021) and needs no per-row lower() anywhere
+        for word in normalize(search_term).split():
+            queryset = queryset.filter(search_name__contains=word)
+        return queryset, False
+
+    # Deletes skip post_save, so journal them and bump the data version here like the app's own delete views
+    def delete_model(self, request, obj):
+        journal.delete(obj.event_id, Participant.objects.filter(pk=obj.pk))
+        versioning.bump(obj.event_id, roster=True)
+
+    def delete_queryset(self, request, queryset):
+        event_ids = set(queryset.values_list('event_id', flat=True).distinct())
+        with transaction.atomic():
+            for event_id in event_ids:
+                journal.delete(event_id, queryset.filter(event_id=event_id))
+        for event_id in event_ids:
+            versioning.bump(event_id, roster=True)
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('name', 'start_date', 'meal_days', 'is_active', 'is_archived')
+    list_filter = ('is_active', 'is_archived')
+    readonly_fields = ('data_version', 'data_changed_at', 'roster_version')
+    actions = ['archive_events']
+
+    @admin.action(description="Archive selected events")
+    def archive_events(self, request, queryset):
+        # Archived events keep their rows but drop out of the switcher and default selection
+        queryset.update(is_archived=True, is_active=False)
+        versioning.bump_all()
 
-admin.site.register(CustomUser)
\ No newline at end of file
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+    list_display = ('username', 'email', 'role', 'is_active', 'last_login')
+    list_filter = ('role', 'is_active', 'is_staff', 'is_superuser')
+    fieldsets = UserAdmin.fieldsets + (('Congress role', {'fields': ('role',)}),)
+    add_fieldsets = UserAdmin.add_fieldsets + (('Congress role', {'fields': ('role',)}),)
\ No newline at end of file
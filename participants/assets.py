@@ -0,0 +1,39 @@
+import hashlib
+
+from django.templatetags.static import static
+
+# Pinned third-party front-end files. `manage.py vendor_assets` downloads them into
+# participants/static so they can be served (and precached) from our own origin.
+# The templates keep the upstream URLs until the downloaded files are committed:
+# with the manifest storage, a {% static %} URL for a missing file is a 500.
+VENDOR_DIR = 'participants/vendor'
+VENDOR = {
+    'chart': ('chart.umd.min.js', 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js'),
+    'confetti': ('confetti.browser.min.js',
+                 'https://cdn.jsdelivr.net/npm/canvas-confetti@1.9.2/dist/confetti.browser.min.js'),
+    'logo': ('aetherium-logo.png',
+             'https://res.cloudinary.com/du2obowro/image/upload/v1761978815/AETHERUIM-SOLUTIONS_iphvtw.png'),
+    'logo-dark': ('aetherium-logo-dark.png',
+                  'https://res.cloudinary.com/du2obowro/image/upload/v1761978818/black-Aetheruim_zutou2.png'),
+    'congress-logo': ('acpp-logo.png', 'https://acpp-aspp.com/wp-content/uploads/2024/09/acpp-logo-trans.png'),
+    'favicon': ('favicon.png',
+                'https://res.cloudinary.com/du2obowro/image/upload/v1761994415/black-Aetheruim_ks8nid.png'),
+}
+
+# Same-origin static files every check-in station needs before the first scan
+SHELL_STATIC = ['participants/img/qr-icon.svg', 'participants/success.mp3']
+
+
+def vendor_path(name):
+    return f"{VENDOR_DIR}/{VENDOR[name][0]}"
+
+
+def precache_urls():
+    """Same-origin static URLs the service worker fetches on install."""
+    return [static(path) for path in SHELL_STATIC]
+
+
+def cache_version(urls):
+    # Fingerprinted URLs change with their content, so a deploy that changes any
+    # of them gets a fresh cache and the old one is dropped on activate
+    return hashlib.md5('\n'.join(urls).encode()).hexdigest()[:12]
@@ -0,0 +1,243 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+# Online snapshots of the event database, taken while stations keep writing.
+#
+# - SQLite: the backup API copies the live file inside one read transaction, so the
+#   copy is consistent; it is then gzipped. Writers only wait for the page copy
+#   itself (milliseconds for an event-sized database), never for the compression.
+# - PostgreSQL: pg_dump (an MVCC snapshot, no locks on the roster) in custom format.
+# - MySQL: mysqldump --single-transaction, gzipped as it streams.
+#
+# A snapshot is written under a temporary name and renamed when complete, so a
+# crash mid-way never leaves a truncated file that looks restorable.
+
+SNAPSHOT_DIR = getattr(settings, 'SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'snapshots'))
+KEEP = getattr(settings, 'SNAPSHOT_KEEP', 48)
+EXTENSIONS = {'sqlite': '.sqlite3.gz', 'postgresql': '.pgdump', 'mysql': '.sql.gz'}
+COPY_BLOCK = 1024 * 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+def _database(alias):
+    connection = connections[alias]
+    if connection.vendor not in EXTENSIONS:
+        raise BackupError(f"Snapshots are not supported for {connection.vendor} databases")
+    return connection.vendor, connection.settings_dict
+
+
+def _label(db):
+    return os.path.splitext(os.path.basename(str(db['NAME'])))[0] or 'database'
+
+
+def list_snapshots(directory=None, alias='default'):
+    """Snapshot files of the database in `directory`, oldest first."""
+    directory = directory or SNAPSHOT_DIR
+    vendor, db = _database(alias)
+    prefix, suffix = _label(db) + '-', EXTENSIONS[vendor]
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if name.startswith(prefix) and name.endswith(suffix)]
+
+
+def prune(directory=None, alias='default', keep=KEEP):
+    """Delete all but the newest `keep` snapshots; returns the paths removed."""
+    old = list_snapshots(directory, alias)[:-keep] if keep else []
+    for path in old:
+        os.remove(path)
+    return old
+
+
+def _env(extra):
+    env = os.environ.copy()
+    env.update({key: value for key, value in extra.items() if value})
+    return env
+
+
+def _run(command, env):
+    try:
+        process = subprocess.run(command, env=env, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise BackupError(f"{command[0]} is not installed")
+    if process.returncode:
+        raise BackupError(f"{command[0]} failed: {process.stderr.decode(errors='replace').strip()}")
+
+
+def _pg_args(db):
+    args = ['--dbname', db['NAME']]
+    if db.get('HOST'):
+        args += ['--host', db['HOST']]
+    if db.get('PORT'):
+        args += ['--port', str(db['PORT'])]
+    if db.get('USER'):
+        args += ['--username', db['USER']]
+    return args, _env({'PGPASSWORD': db.get('PASSWORD')})
+
+
+def _mysql_args(db):
+    args = []
+    if db.get('HOST'):
+        args += ['--host', db['HOST']]
+    if db.get('PORT'):
+        args += ['--port', str(db['PORT'])]
+    if db.get('USER'):
+        args += ['--user', db['USER']]
+    return args, _env({'MYSQL_PWD': db.get('PASSWORD')})
+
+
+def _sqlite_copy(source_path, target_path):
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True, timeout=30)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)  # every page in one step: one consistent read transaction
+    finally:
+        target.close()
+        source.close()
+
+
+def _snapshot_sqlite(db, path):
+    fd, copy = tempfile.mkstemp(suffix='.sqlite3', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        _sqlite_copy(db['NAME'], copy)
+        with open(copy, 'rb') as src, gzip.open(path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, COPY_BLOCK)
+    finally:
+        os.remove(copy)
+
+
+def _snapshot_postgresql(db, path):
+    args, env = _pg_args(db)
+    _run(['pg_dump', '--format=custom', '--compress=6', '--no-owner', '--file', path, *args], env)
+
+
+def _snapshot_mysql(db, path):
+    args, env = _mysql_args(db)
+    command = ['mysqldump', '--single-transaction', '--quick', '--routines', *args, db['NAME']]
+    try:
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise BackupError("mysqldump is not installed")
+    with gzip.open(path, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(process.stdout, dst, COPY_BLOCK)
+    if process.wait():
+        raise BackupError(f"mysqldump failed: {process.stderr.read().decode(errors='replace').strip()}")
+
+
+_SNAPSHOTTERS = {'sqlite': _snapshot_sqlite, 'postgresql': _snapshot_postgresql, 'mysql': _snapshot_mysql}
+
+
+def snapshot(directory=None, alias='default'):
+    """Write a compressed, consistent snapshot of the database; returns its path."""
+    directory = directory or SNAPSHOT_DIR
+    vendor, db = _database(alias)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{_label(db)}-{time.strftime('%Y%m%d-%H%M%S')}{EXTENSIONS[vendor]}")
+    partial = path + '.partial'
+    try:
+        _SNAPSHOTTERS[vendor](db, partial)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
+
+
+def _restore_sqlite(db, path):
+    fd, copy = tempfile.mkstemp(suffix='.sqlite3', dir=os.path.dirname(os.path.abspath(db['NAME'])))
+    try:
+        with os.fdopen(fd, 'wb') as dst, gzip.open(path, 'rb') as src:
+            shutil.copyfileobj(src, dst, COPY_BLOCK)
+        source = sqlite3.connect(copy)
+        try:
+            if source.execute('PRAGMA integrity_check').fetchone()[0] != 'ok':
+                raise BackupError(f"{path} is corrupt")
+            # Page-copy into the live file under SQLite's own locking, so other open
+            # connections see the restored data instead of a file swapped under them
+            target = sqlite3.connect(db['NAME'], timeout=30)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+    except (OSError, sqlite3.DatabaseError) as e:
+        raise BackupError(f"Could not restore {path}: {e}")
+    finally:
+        os.remove(copy)
+
+
+def _restore_postgresql(db, path):
+    args, env = _pg_args(db)
+    _run(['pg_restore', '--clean', '--if-exists', '--no-owner', '--single-transaction', *args, path], env)
+
+
+def _restore_mysql(db, path):
+    args, env = _mysql_args(db)
+    with gzip.open(path, 'rb') as dump:
+        try:
+            process = subprocess.Popen(['mysql', *args, db['NAME']], env=env, stdin=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise BackupError("mysql is not installed")
+        shutil.copyfileobj(dump, process.stdin, COPY_BLOCK)
+        process.stdin.close()
+        if process.wait():
+            raise BackupError(f"mysql failed: {process.stderr.read().decode(errors='replace').strip()}")
+
+
+_RESTORERS = {'sqlite': _restore_sqlite, 'postgresql': _restore_postgresql, 'mysql': _restore_mysql}
+
+
+def restore(path, alias='default'):
+    """Replace the database's contents with a snapshot taken by snapshot()."""
+    from . import journal, rollups, snapshots
+    from .models import Event
+
+    vendor, db = _database(alias)
+    if not path.endswith(EXTENSIONS[vendor]):
+        raise BackupError(f"{os.path.basename(path)} is not a {vendor} snapshot")
+    # Data versions go back to what they were at snapshot time. Caches, ETags and scan
+    # indexes keyed by a version number must not take the restored data for what they
+    # saw under the same number before, so every event moves past both; anything keyed
+    # by the old numbers is unreachable from then on. The live entries are dropped
+    # right away rather than left to expire. Keys that don't follow the data are left
+    # alone. The change journal goes back too; its ids restart past the old ones
+    # (journal.reset()), so change feed consumers see the break instead of skipping it.
+    try:
+        before = {
+            event_id: (version, roster) for event_id, version, roster in
+            Event.objects.using(alias).values_list('id', 'data_version', 'roster_version')
+        }
+        seq = journal.last_seq(alias)
+    except DatabaseError:
+        before, seq = {}, 0  # restoring into an empty database
+    connections[alias].close()
+    _RESTORERS[vendor](db, path)
+    now = timezone.now()
+    for event_id, version, roster in Event.objects.using(alias).values_list('id', 'data_version', 'roster_version'):
+        old_version, old_roster = before.get(event_id, (0, 0))
+        Event.objects.using(alias).filter(pk=event_id).update(
+            data_version=max(version, old_version) + 1, data_changed_at=now,
+            roster_version=max(roster, old_roster) + 1,
+        )
+    journal.reset(seq, alias)
+    cache.delete_many([
+        key(event_id, version) for event_id, (version, _) in before.items()
+        for key in (rollups.cache_key, snapshots.cache_key)
+    ])
@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import journal, versioning
+from .exports import consistent_reads
+from .models import ALL_MEALS, MEAL_BITS, MEAL_FIELDS, Participant
+
+PAYMENT_STATES = {
+    'paid': {'paid': True, 'free_access': False},
+    'free': {'paid': False, 'free_access': True},
+    'unpaid': {'paid': False, 'free_access': False},
+}
+BATCH_SIZE = 500  # ids per statement, well under SQLite's parameter limit
+# Columns the filters read and the states write (meals: meals_served)
+FILTER_COLUMNS = {'nationality': {'nationality'}, 'payment': {'paid', 'free_access'},
+                  'present': {'is_present'}, 'attended': {'attended'}}
+STATE_COLUMNS = {'payment': {'paid', 'free_access'}, 'is_present': {'is_present', 'attended'}}
+MEAL_COLUMNS = {'meals_served', 'attended'}
+
+
+class BulkError(ValueError):
+    pass
+
+
+def _check_meal(event, meal):
+    if meal not in event.meal_fields:
+        raise BulkError(f"{event.name} has no {meal.replace('_', ' ')} ({event.meal_days} meal days)")
+
+
+def select(event, ids=None, filters=None):
+    """Participants of the event picked by explicit ids and/or a filter dict."""
+    queryset = Participant.objects.filter(event=event)
+    if ids is not None:
+        try:
+            queryset = queryset.filter(id__in=[int(pid) for pid in ids])
+        except (TypeError, ValueError):
+            raise BulkError("ids must be a list of integers")
+    filters = filters or {}
+    if 'nationality' in filters:
+        queryset = queryset.filter(nationality=filters['nationality'])
+    if 'payment' in filters:
+        if filters['payment'] not in PAYMENT_STATES:
+            raise BulkError(f"Unknown payment filter: {filters['payment']}")
+        queryset = queryset.filter(**PAYMENT_STATES[filters['payment']])
+    if 'present' in filters:
+        queryset = queryset.filter(is_present=bool(filters['present']))
+    if 'attended' in filters:
+        queryset = queryset.filter(attended=bool(filters['attended']))
+    for field in MEAL_FIELDS:
+        if field in filters:
+            _check_meal(event, field)
+            queryset = queryset.filter(meals_served__has=MEAL_BITS[field]) if filters[field] \
+                else queryset.exclude(meals_served__has=MEAL_BITS[field])
+    unknown = set(filters) - {'nationality', 'payment', 'present', 'attended', *MEAL_FIELDS}
+    if unknown:
+        raise BulkError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+    return queryset
+
+
+def _seen(now):
+    # Same bookkeeping as Participant.mark_seen(), as SQL
+    return {'attended': True, 'first_seen_at': Coalesce('first_seen_at', now), 'last_seen_at': now}
+
+
+def _update(queryset, written, values, fields=None, by_id=True):
+    # The rows are picked (and locked) first so the journal knows exactly which ones
+    # changed. by_id=False repeats the queryset's WHERE instead of listing the ids; under
+    # consistent_reads() it matches the same rows.
+    ids = list(queryset.select_for_update().values_list('id', flat=True))
+    if ids:
+        (Participant.objects.filter(id__in=ids) if by_id else queryset).update(**values)
+        for pid in ids:
+            written[pid].update(fields or values)
+    return len(ids)
+
+
+def _set_meal(queryset, written, meal, served, now, by_id):
+    # One bit of meals_served; journaled under the meal's name
+    bit = MEAL_BITS[meal]
+    if served:
+        return _update(queryset.exclude(meals_served__has=bit), written,
+                       {'meals_served': F('meals_served').bitor(bit), **_seen(now)},
+                       {meal, 'attended', 'first_seen_at', 'last_seen_at'}, by_id)
+    return _update(queryset.filter(meals_served__has=bit), written,
+                   {'meals_served': F('meals_served').bitand(ALL_MEALS ^ bit)}, {meal}, by_id)
+
+
+def _resync_attended(queryset, written, by_id):
+    # Clearing presence or a meal can end attendance: checked in OR any meal served
+    _update(queryset.filter(attended=True, is_present=False, meals_served=0), written, {'attended': False},
+            by_id=by_id)
+
+
+def _apply_state(rows, written, state, value, now, by_id=True):
+    if state == 'payment':
+        target = PAYMENT_STATES[value]
+        return _update(rows.exclude(**target), written, target, by_id=by_id)
+    if state in MEAL_BITS:
+        count = _set_meal(rows, written, state, value, now, by_id)
+    elif value:
+        count = _update(rows.filter(**{state: False}), written, {state: True, **_seen(now)}, by_id=by_id)
+    else:
+        count = _update(rows.filter(**{state: True}), written, {state: False}, by_id=by_id)
+    if count and not value:
+        _resync_attended(rows, written, by_id)
+    return count
+
+
+def _plain(ids, filters, changes):
+    """Whether the selection can stay a WHERE clause: no ids, and no filter on a written column."""
+    if ids is not None:
+        return False
+    reads = set().union(*({'meals_served'} if name in MEAL_BITS else FILTER_COLUMNS[name] for name in filters or {}))
+    writes = set().union(*(STATE_COLUMNS.get(state, MEAL_COLUMNS) for state in changes))
+    return not reads & writes
+
+
+def apply(event, changes, ids=None, filters=None):
+    """Apply {state: value} to the participants picked by select(); returns (matched, {state: rows changed}).
+
+    States are meal fields and 'is_present' (True/False) and 'payment'
+    ('paid'/'free'/'unpaid'). Only rows whose value actually changes are
+    written.
+    """
+    if not changes:
+        raise BulkError("Nothing to change")
+    for state, value in changes.items():
+        if state == 'payment':
+            if value not in PAYMENT_STATES:
+                raise BulkError(f"Unknown payment state: {value}")
+        elif state not in ('is_present', *MEAL_FIELDS):
+            raise BulkError(f"Unknown state: {state}")
+        elif not isinstance(value, bool):
+            raise BulkError(f"{state} must be true or false")
+        if state in MEAL_BITS:
+            _check_meal(event, state)
+    selection = select(event, ids, filters)
+
+    now = timezone.now()
+    changed = dict.fromkeys(changes, 0)
+    written = defaultdict(set)  # participant id -> fields written, for the journal
+    with consistent_reads():
+        if _plain(ids, filters, changes):
+            # The filter reads nothing the states write, so one UPDATE ... WHERE per state
+            matched = selection.count()
+            for state, value in changes.items():
+                changed[state] = _apply_state(selection, written, state, value, now, by_id=False)
+        else:
+            # The selection is fixed before the first UPDATE: re-running its filters would
+            # see rows an earlier state already changed (e.g. present=true, set is_present=false)
+            ids = list(selection.values_list('id', flat=True))
+            matched = len(ids)
+            for start in range(0, len(ids), BATCH_SIZE):
+                rows = Participant.objects.filter(id__in=ids[start:start + BATCH_SIZE])
+                for state, value in changes.items():
+                    changed[state] += _apply_state(rows, written, state, value, now)
+        if any(changed.values()):
+            journal.record_updated(event.id, written)
+            versioning.bump(event.id)
+    return matched, changed
@@ -0,0 +1,152 @@
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import django
+from django.db import transaction
+
+from . import fuzzy, journal, versioning
+from .models import Participant
+
+# Offline near-duplicate detection for a roster. Comparing every pair is quadratic,
+# so rows are first blocked on (nationality, start of the name's phonetic skeleton):
+# "Mohamed Ben Ali" and "Mohammed Benali" share the skeleton "mdbnl". A second pass
+# blocks and scores the names with their tokens sorted, which catches swapped first
+# and family names ("Benali Mohammed"). Blocks over MAX_BLOCK rows are split
+# again on a longer prefix. Only pairs inside a block are scored, with the same
+# trigram/phonetic Jaccard the scan fallback ranks with.
+
+PREFIX = 3  # skeleton characters in the first blocking pass
+MAX_BLOCK = 400
+THRESHOLD = 0.65
+
+
+def _split(rows, depth):
+    """Blocks of rows sharing nationality and `depth` skeleton characters."""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[3][:depth]].append(row)
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        # Past the full skeleton the names are indistinguishable by key; keep them together
+        if len(group) > MAX_BLOCK and any(len(row[3]) > depth for row in group):
+            yield from _split(group, depth + 1)
+        else:
+            yield group
+
+
+def _sorted_tokens(full_name):
+    return ' '.join(sorted(fuzzy.normalize(full_name).split()))
+
+
+def blocks(event):
+    """Candidate blocks of [(id, name, nationality, skeleton)] for the event, both passes."""
+    by_name, by_tokens = defaultdict(list), defaultdict(list)
+    for pid, full_name, nationality in (
+        Participant.objects.filter(event=event).order_by('id')
+        .values_list('id', 'full_name', 'nationality').iterator(chunk_size=5000)
+    ):
+        country = fuzzy.normalize(nationality)
+        by_name[country].append((pid, full_name, nationality, fuzzy.phonetic(full_name)))
+        tokens = _sorted_tokens(full_name)
+        by_tokens[country].append((pid, tokens, nationality, fuzzy.phonetic(tokens)))
+    for rows in (*by_name.values(), *by_tokens.values()):
+        yield from _split(rows, PREFIX)
+
+
+def score_block(block, threshold=THRESHOLD):
+    """[(lower id, higher id, score)] for the pairs of one block at or above threshold."""
+    grams = [(row[0], fuzzy.features(row[1])) for row in block]
+    pairs = []
+    for (a, fa), (b, fb) in combinations(grams, 2):
+        score = len(fa & fb) / len(fa | fb)
+        if score >= threshold:
+            pairs.append((min(a, b), max(a, b), round(score, 3)))
+    return pairs
+
+
+def _score_chunk(chunk, threshold):
+    return [pair for block in chunk for pair in score_block(block, threshold)]
+
+
+def find_duplicates(event, threshold=THRESHOLD, workers=None, chunk_blocks=200):
+    """Merge proposals (keep id, duplicate id, score), best first.
+
+    Blocks are scored across a process pool (`workers` processes, default one per
+    CPU); workers=1 scores in this process. The older registration is kept.
+    Workers are spawned rather than forked and only ever see plain tuples, so they
+    set Django up for the imports and never touch the database.
+    """
+    pending = list(blocks(event))
+    chunks = [pending[i:i + chunk_blocks] for i in range(0, len(pending), chunk_blocks)]
+    if workers == 1 or len(chunks) < 2:
+        results = [_score_chunk(chunk, threshold) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=django.setup) as pool:
+            results = list(pool.map(_score_chunk, chunks, [threshold] * len(chunks)))
+    pairs = {}
+    for chunk_pairs in results:
+        for keep, duplicate, score in chunk_pairs:
+            pairs[keep, duplicate] = max(score, pairs.get((keep, duplicate), 0))
+    return sorted(((keep, dup, score) for (keep, dup), score in pairs.items()), key=lambda p: (-p[2], p[0], p[1]))
+
+
+def _groups(pairs):
+    """Chains of chosen pairs (a~b, b~c) collapse into one group kept under its lowest id."""
+    parent = {}
+
+    def root(pid):
+        parent.setdefault(pid, pid)
+        while parent[pid] != pid:
+            parent[pid] = parent[parent[pid]]
+            pid = parent[pid]
+        return pid
+
+    for a, b in pairs:
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups = defaultdict(list)
+    for pid in parent:
+        if root(pid) != pid:
+            groups[root(pid)].append(pid)
+    return groups
+
+
+def _absorb(keep, duplicate):
+    # Anything either registration went through counts for the merged person
+    keep.free_access = keep.free_access or duplicate.free_access
+    keep.paid = (keep.paid or duplicate.paid) and not keep.free_access  # one payment state, free wins
+    keep.is_present = keep.is_present or duplicate.is_present
+    keep.meals_served |= duplicate.meals_served
+    seen = [t for t in (keep.first_seen_at, duplicate.first_seen_at) if t]
+    keep.first_seen_at = min(seen) if seen else None
+    seen = [t for t in (keep.last_seen_at, duplicate.last_seen_at) if t]
+    keep.last_seen_at = max(seen) if seen else None
+
+
+def merge(event, pairs):
+    """Fold each chosen (keep, duplicate) pair into one participant; returns rows removed.
+
+    Payment, presence and meals are OR-ed, first/last seen widened; the surviving row
+    is the lowest id of each group. Each group is merged in its own transaction.
+    """
+    groups = _groups(pairs)
+    rows = Participant.objects.filter(event=event).in_bulk([pid for keep, dups in groups.items() for pid in (keep, *dups)])
+    removed = 0
+    for keep_id, duplicate_ids in groups.items():
+        duplicate_ids = [pid for pid in duplicate_ids if pid in rows]
+        if keep_id not in rows or not duplicate_ids:
+            continue  # already merged or deleted since the proposals were written
+        keep = rows[keep_id]
+        for pid in duplicate_ids:
+            _absorb(keep, rows[pid])
+        with transaction.atomic():
+            keep.save()
+            removed += journal.delete(event.id, Participant.objects.filter(event=event, pk__in=duplicate_ids))
+    if removed:
+        versioning.bump(event.id, roster=True)
+    return removed
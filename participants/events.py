@@ -0,0 +1,56 @@
+from functools import wraps
+
+from django.contrib import messages
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from .models import Event
+
+SESSION_KEY = 'event_id'
+NO_EVENT = "There is no event to work on; pick or unarchive one first."
+
+
+def get_current_event(request):
+    """Event the user is working on: picked in the session, else the active one."""
+    if hasattr(request, '_current_event'):
+        return request._current_event
+
+    event = None
+    event_id = request.session.get(SESSION_KEY)
+    if event_id:
+        event = Event.objects.filter(pk=event_id, is_archived=False).first()
+    if event is None:
+        event = (
+            Event.objects.filter(is_archived=False).order_by('-is_active', '-start_date').first()
+        )
+    request._current_event = event
+    return event
+
+
+def event_required(view):
+    """Send the request to the event switcher while no event can be picked (all archived)."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if get_current_event(request) is None:
+            route = request.resolver_match.route if request.resolver_match else ''
+            if 'application/json' in request.headers.get('Accept', '') or route.startswith('api/'):
+                return JsonResponse({'error': NO_EVENT}, status=409)
+            messages.warning(request, NO_EVENT)
+            return redirect('switch_event')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def set_current_event(request, event):
+    request.session[SESSION_KEY] = event.pk
+    request._current_event = event
+
+
+def current_event(request):
+    """Template context processor exposing the current event and the switcher list."""
+    if not getattr(request, 'user', None) or not request.user.is_authenticated:
+        return {}
+    return {
+        'current_event': get_current_event(request),
+        'available_events': Event.objects.filter(is_archived=False),
+    }
@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+from .models import MEAL_BITS, Participant
+
+# pyarrow is only needed for the analytics snapshot export
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+CHUNK_SIZE = 10000
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+BASE_COLUMNS = ['id', 'full_name', 'nationality', 'paid', 'free_access', 'is_present', 'created_at']
+PAYMENT_STATUSES = ['free', 'paid', 'unpaid']
+
+
+@contextmanager
+def consistent_reads(using='default'):
+    """Transaction in which every query sees the database as it was at the first one."""
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        # MySQL/InnoDB reads at repeatable read already, and SQLite keeps its read lock
+        # until the transaction ends; PostgreSQL has to be asked
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def snapshot_schema(event):
+    return pa.schema(
+        [
+            ('id', pa.int64()),
+            ('event_id', pa.int64()),
+            ('full_name', pa.string()),
+            ('nationality', pa.dictionary(pa.int32(), pa.string())),
+            ('payment_status', pa.dictionary(pa.int8(), pa.string())),
+            ('paid', pa.bool_()),
+            ('free_access', pa.bool_()),
+            ('is_present', pa.bool_()),
+            ('created_at', pa.timestamp('us', tz='UTC')),
+        ]
+        + [(field, pa.bool_()) for field in event.meal_fields]
+    )
+
+
+def _payment_status(paid, free_access):
+    if free_access:
+        return 'free'
+    return 'paid' if paid else 'unpaid'
+
+
+def iter_record_batches(event, chunk_size=CHUNK_SIZE):
+    """Stream the event's roster as Arrow record batches of at most chunk_size rows.
+
+    Dictionary columns use one dictionary for the whole export: the Arrow IPC file
+    format refuses a dictionary that changes between batches. Run it inside
+    consistent_reads(), so no nationality can turn up after the dictionary is fixed.
+    """
+    schema = snapshot_schema(event)
+    nationalities = sorted(
+        Participant.objects.filter(event=event).values_list('nationality', flat=True).distinct().order_by()
+    )
+    dictionaries = {
+        'nationality': (pa.array(nationalities, pa.string()), {n: i for i, n in enumerate(nationalities)}),
+        'payment_status': (pa.array(PAYMENT_STATUSES, pa.string()), {s: i for i, s in enumerate(PAYMENT_STATUSES)}),
+    }
+    columns = BASE_COLUMNS + ['meals_served']
+    rows = (
+        Participant.objects.filter(event=event)
+        .order_by('id')
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield _to_batch(chunk, event, schema, dictionaries)
+            chunk = []
+    if chunk:
+        yield _to_batch(chunk, event, schema, dictionaries)
+
+
+def _encode(values, dictionary, schema_type):
+    values_array, index = dictionary
+    indices = [index[value] for value in values]
+    return pa.DictionaryArray.from_arrays(pa.array(indices, schema_type.index_type), values_array)
+
+
+def _to_batch(chunk, event, schema, dictionaries):
+    cols = list(zip(*chunk))
+    data = {
+        'id': cols[0],
+        'event_id': [event.id] * len(chunk),
+        'full_name': cols[1],
+        'nationality': _encode(cols[2], dictionaries['nationality'], schema.field('nationality').type),
+        'payment_status': _encode([_payment_status(p, f) for p, f in zip(cols[3], cols[4])],
+                                  dictionaries['payment_status'], schema.field('payment_status').type),
+        'paid': cols[3],
+        'free_access': cols[4],
+        'is_present': cols[5],
+        'created_at': cols[6],
+    }
+    # One boolean column per meal, unpacked from the meals_served bits
+    meals = pa.array(cols[len(BASE_COLUMNS)], type=pa.uint32())
+    for field in event.meal_fields:
+        data[field] = pc.not_equal(pc.bit_wise_and(meals, MEAL_BITS[field]), 0)
+    return pa.RecordBatch.from_pydict(data, schema=schema)
+
+
+def write_snapshot(event, sink, fmt='parquet', chunk_size=CHUNK_SIZE):
+    """Write the roster snapshot to a path or binary file object. Returns the row count."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; columnar export is unavailable.")
+    schema = snapshot_schema(event)
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    elif fmt == 'arrow':
+        writer = pa.ipc.new_file(sink, schema)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    rows = 0
+    try:
+        with consistent_reads():
+            for batch in iter_record_batches(event, chunk_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
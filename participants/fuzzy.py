@@ -0,0 +1,206 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db.models import Max
+from django.utils import timezone
+
+# In-memory fuzzy index over the roster, used when a QR code doesn't match exactly.
+# Names are matched on character trigrams plus a rough phonetic skeleton so that
+# transliteration drift ("Mohamed"/"Mohammed", "Benali"/"Ben Ali") still lands.
+#
+# Each worker builds an event's index once. Its own saves are applied by the
+# post_save signal. Writes from other workers and processes (imports, bulk edits,
+# merges) are caught up from the participant change journal (participants.journal)
+# whenever the event's data version has moved: one indexed query, then only the
+# touched rows are re-read.
+
+REBUILD_AFTER = 5000  # journal entries behind: cheaper to reload everything
+MAX_CANDIDATES = 5
+MIN_SCORE = 0.3
+
+_PHONETIC_RULES = [
+    ('ou', 'u'), ('oo', 'u'), ('ee', 'i'), ('ei', 'i'), ('ai', 'a'),
+    ('kh', 'h'), ('gh', 'g'), ('dh', 'd'), ('th', 't'), ('sh', 's'), ('ch', 's'),
+    ('ph', 'f'), ('q', 'k'), ('c', 'k'), ('z', 's'), ('y', 'i'), ('w', 'u'), ('j', 'g'),
+]
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[\W_]+', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def phonetic(text):
+    """Consonant skeleton of a normalized string (vowels and repeats dropped)."""
+    key = normalize(text).replace(' ', '')
+    for src, dst in _PHONETIC_RULES:
+        key = key.replace(src, dst)
+    if not key:
+        return ''
+    skeleton = key[0] + re.sub(r'[aeiouh]', '', key[1:])
+    return re.sub(r'(.)\1+', r'\1', skeleton)
+
+
+def features(full_name):
+    """Trigrams of the squashed name plus phonetic keys of the whole name and each token."""
+    name = normalize(full_name)
+    squashed = f"  {name.replace(' ', '')} "
+    grams = {squashed[i:i + 3] for i in range(len(squashed) - 2)}
+    grams.add('#' + phonetic(name))
+    grams.update('~' + phonetic(token) for token in name.split())
+    return grams
+
+
+class RosterIndex:
+    """Fuzzy index over one event's participants."""
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.lock = threading.Lock()
+        self.version = None  # event data_version the index is known to be current with
+        self.cursor = None  # last journal id applied; None until built
+        self.entries = {}  # id -> (feature set, normalized nationality)
+        self.postings = defaultdict(set)  # feature -> ids
+
+    def _add(self, pid, full_name, nationality):
+        grams = features(full_name)
+        self.entries[pid] = (grams, normalize(nationality))
+        for gram in grams:
+            self.postings[gram].add(pid)
+
+    def _remove(self, pid):
+        entry = self.entries.pop(pid, None)
+        if entry:
+            for gram in entry[0]:
+                self.postings[gram].discard(pid)
+
+    def _settled_cursor(self, after=0):
+        """Highest journal id at or after which nothing can still commit below it."""
+        from .journal import settle_window
+        from .models import ParticipantChange
+        # Where journal ids may commit out of order, entries inside the settle window
+        # may yet be joined by lower ids, so the cursor stays before them and they get
+        # re-read (re-applying an entry is harmless)
+        settled = ParticipantChange.objects.filter(
+            event_id=self.event_id, id__gt=after, created_at__lte=timezone.now() - settle_window(),
+        ).aggregate(last=Max('id'))['last']
+        return settled or after
+
+    def build(self, version=None):
+        from .models import Participant
+        cursor = self._settled_cursor()
+        rows = (
+            Participant.objects.filter(event_id=self.event_id)
+            .values_list('id', 'full_name', 'nationality')
+            .iterator(chunk_size=2000)
+        )
+        with self.lock:
+            self.entries, self.postings = {}, defaultdict(set)
+            for pid, full_name, nationality in rows:
+                self._add(pid, full_name, nationality)
+            self.cursor, self.version = cursor, version
+
+    def catch_up(self, version):
+        """Apply journal entries written since the last build or catch-up."""
+        from .journal import settle_window
+        from .models import Participant, ParticipantChange
+        changes = list(
+            ParticipantChange.objects.filter(event_id=self.event_id, id__gt=self.cursor)
+            .order_by('id')
+            .values_list('id', 'participant_id', 'op', 'fields', 'created_at')[:REBUILD_AFTER + 1]
+        )
+        if len(changes) > REBUILD_AFTER or (
+            self.cursor and not ParticipantChange.objects.filter(event_id=self.event_id, id=self.cursor).exists()
+        ):
+            # Far behind, or the journal went back under us (a database restore)
+            self.build(version)
+            return
+        horizon = timezone.now() - settle_window()
+        touched, cursor, settled = set(), self.cursor, True
+        for change_id, pid, op, fields, created_at in changes:
+            if op != 'update' or 'full_name' in fields or 'nationality' in fields:
+                touched.add(pid)
+            settled = settled and created_at <= horizon
+            if settled:
+                cursor = change_id
+        current = {}
+        ids = list(touched)
+        for start in range(0, len(ids), 500):
+            current.update(
+                (pid, (full_name, nationality)) for pid, full_name, nationality in
+                Participant.objects.filter(id__in=ids[start:start + 500]).values_list('id', 'full_name', 'nationality')
+            )
+        with self.lock:
+            for pid in touched:
+                self._remove(pid)
+                if pid in current:
+                    self._add(pid, *current[pid])
+            self.cursor = cursor
+            # With entries still settling, look again on the next search
+            self.version = version if settled else None
+
+    def refresh(self, version):
+        """Bring the index up to the event's `version` of the data."""
+        if self.cursor is None:
+            self.build(version)
+        elif version != self.version:
+            self.catch_up(version)
+
+    def upsert(self, pid, full_name, nationality):
+        with self.lock:
+            if self.cursor is None:
+                return  # not built yet; the first lookup will load everything
+            self._remove(pid)
+            self._add(pid, full_name, nationality)
+
+    def search(self, full_name, nationality='', version=None, limit=MAX_CANDIDATES):
+        """Return [(id, score)] best first, after catching up to `version`."""
+        self.refresh(version)
+        query = features(full_name)
+        nat = normalize(nationality)
+        with self.lock:
+            hits = Counter()
+            for gram in query:
+                for pid in self.postings.get(gram, ()):
+                    hits[pid] += 1
+            scored = []
+            for pid, _ in hits.most_common(limit * 10):
+                grams, p_nat = self.entries[pid]
+                score = len(query & grams) / len(query | grams)
+                if nat and p_nat == nat:
+                    score += 0.1
+                if score >= MIN_SCORE:
+                    scored.append((pid, round(min(score, 1.0), 3)))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(event_id):
+    with _indexes_lock:
+        if event_id not in _indexes:
+            _indexes[event_id] = RosterIndex(event_id)
+        return _indexes[event_id]
+
+
+def upsert(event_id, pid, full_name, nationality):
+    index = _indexes.get(event_id)
+    if index is not None:
+        index.upsert(pid, full_name, nationality)
+
+
+def suggest(event, full_name, nationality=''):
+    """Closest participants of the event for a failed lookup, best first."""
+    from .models import Participant
+    ranked = get_index(event.id).search(full_name, nationality, event.data_version)
+    found = Participant.objects.in_bulk([pid for pid, _ in ranked])
+    # Ids deleted since the last catch-up simply drop out here
+    return [found[pid] for pid, _ in ranked if pid in found]
@@ -0,0 +1,119 @@
+import hashlib
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from . import journal, versioning
+from .fuzzy import normalize
+from .models import Participant
+
+REQUIRED_COLUMNS = ['Full Name', 'Nationality', 'Payment Status']
+BATCH_SIZE = 1000
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    missing: int = 0  # in the database but no longer in the sheet
+    skipped: int = 0  # blank name or nationality
+    cancelled: bool = False
+
+    def summary(self):
+        return (f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} unchanged, "
+                f"{self.missing} missing from sheet, {self.skipped} skipped")
+
+
+def parse_payment_status(value):
+    """Map a sheet payment value to (paid, free_access)."""
+    value = str(value).strip().lower()
+    if value in ['paid', 'yes', 'true']:
+        return True, False
+    if value in ['free access', 'free']:
+        return False, True
+    return False, False  # unpaid, no, false, etc.
+
+
+def row_hash(full_name, nationality, paid, free_access):
+    key = f"{full_name}\x1f{nationality}\x1f{int(paid)}{int(free_access)}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def read_rows(df):
+    """Clean (full_name, nationality, payment_status) tuples from a sheet, blanks dropped."""
+    df = df[REQUIRED_COLUMNS].fillna('').astype(str)
+    for col in REQUIRED_COLUMNS:
+        df[col] = df[col].str.strip()
+    return list(df.itertuples(index=False, name=None))
+
+
+def import_rows(event, rows, update_existing=True, chunk_size=BATCH_SIZE, progress=None):
+    """Upsert sheet rows into the event.
+
+    Each row is hashed and compared with the hash of the participant's current state,
+    so a re-import of an unchanged sheet only costs one SELECT and no writes, while
+    rows edited by hand since are put back to what the sheet says. Writes are
+    committed chunk by chunk; ``progress(processed, total)`` is called after each
+    chunk and may return False to stop the import there.
+    """
+    result = ImportResult()
+
+    incoming = {}
+    for full_name, nationality, payment_status in rows:
+        if not full_name or not nationality:
+            result.skipped += 1
+            continue
+        paid, free_access = parse_payment_status(payment_status)
+        incoming[(full_name, nationality)] = (paid, free_access, row_hash(full_name, nationality, paid, free_access))
+
+    existing = {}
+    for pid, full_name, nationality, paid, free_access in (
+        Participant.objects.filter(event=event)
+        .values_list('id', 'full_name', 'nationality', 'paid', 'free_access')
+        .iterator(chunk_size=5000)
+    ):
+        existing[(full_name, nationality)] = (pid, row_hash(full_name, nationality, paid, free_access))
+
+    to_create, to_update = [], []
+    for (full_name, nationality), (paid, free_access, digest) in incoming.items():
+        current = existing.get((full_name, nationality))
+        if current is None:
+            to_create.append(Participant(
+                event=event, full_name=full_name, search_name=normalize(full_name), nationality=nationality,
+                paid=paid, free_access=free_access, import_hash=digest,
+            ))
+        elif current[1] == digest or not update_existing:
+            result.unchanged += 1
+        else:
+            to_update.append(Participant(id=current[0], paid=paid, free_access=free_access, import_hash=digest))
+
+    result.missing = len(existing.keys() - incoming.keys())
+
+    total = len(rows)
+    processed = result.skipped + result.unchanged
+    for start in range(0, len(to_create), chunk_size):
+        chunk = to_create[start:start + chunk_size]
+        with transaction.atomic():
+            Participant.objects.bulk_create(chunk)
+            journal.record_created(event.id, chunk)
+            versioning.bump(event.id, roster=True)
+        result.inserted += len(chunk)
+        processed += len(chunk)
+        if progress and progress(processed, total) is False:
+            result.cancelled = True
+            return result
+    for start in range(0, len(to_update), chunk_size):
+        chunk = to_update[start:start + chunk_size]
+        with transaction.atomic():
+            Participant.objects.bulk_update(chunk, ['paid', 'free_access', 'import_hash'])
+            journal.record_updated(event.id, {p.id: ('paid', 'free_access') for p in chunk})
+            versioning.bump(event.id)
+        result.updated += len(chunk)
+        processed += len(chunk)
+        if progress and progress(processed, total) is False:
+            result.cancelled = True
+            return result
+    if progress:
+        progress(total, total)
+    return result
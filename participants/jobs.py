@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import importer, versioning, workloads
+from .models import AdminActionLog, ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Imports run next to the web worker in a small thread pool (no external broker).
+# Job state lives in the database, so any worker can report progress or cancel.
+# While this process holds unfinished jobs it touches their updated_at every
+# HEARTBEAT seconds; a queued/running job nobody has touched for STALE_AFTER
+# belonged to a worker that died or restarted, and is failed by fail_stale().
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMPORT_WORKERS', 1),
+    thread_name_prefix='import-job',
+)
+HEARTBEAT = 30  # seconds
+STALE_AFTER = timedelta(seconds=4 * HEARTBEAT)
+UNFINISHED = ('queued', 'running')
+
+_owned = set()  # ids of this process's unfinished jobs
+_owned_lock = threading.Lock()
+_heartbeat = None
+
+
+def submit(job):
+    global _heartbeat
+    with _owned_lock:
+        _owned.add(job.id)
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat, name='import-heartbeat', daemon=True)
+            _heartbeat.start()
+    _executor.submit(run_job, job.id)
+
+
+def _beat():
+    stop = threading.Event()
+    while not stop.wait(HEARTBEAT):
+        with _owned_lock:
+            ids = list(_owned)
+        if not ids:
+            continue
+        try:
+            ImportJob.objects.filter(id__in=ids, status__in=UNFINISHED).update(updated_at=timezone.now())
+        except Exception:
+            logger.exception("Import job heartbeat failed")
+        finally:
+            close_old_connections()
+
+
+def fail_stale(now=None):
+    """Fail unfinished jobs whose worker stopped heart-beating; returns how many."""
+    now = now or timezone.now()
+    return ImportJob.objects.filter(status__in=UNFINISHED, updated_at__lt=now - STALE_AFTER).update(
+        status='failed', error='The worker running this import stopped before it finished.',
+        finished_at=now, updated_at=now,
+    )
+
+
+def run_job(job_id):
+    close_old_connections()
+    job = ImportJob.objects.select_related('event').get(pk=job_id)
+    slot = None
+    try:
+        # Imports queue for a background slot, apart from the request slots
+        slot = workloads.wait_for_slot(
+            lambda: ImportJob.objects.filter(pk=job.pk, cancel_requested=True).exists()
+        )
+        job.refresh_from_db(fields=['cancel_requested'])
+        if job.cancel_requested:
+            job.status = 'cancelled'
+            return
+
+        job.status = 'running'
+        job.save(update_fields=['status', 'updated_at'])
+
+        df = pd.read_excel(job.file_path)
+        missing_cols = [col for col in importer.REQUIRED_COLUMNS if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing columns. Required: {', '.join(importer.REQUIRED_COLUMNS)}")
+        rows = importer.read_rows(df)
+        ImportJob.objects.filter(pk=job.pk).update(total_rows=len(rows), updated_at=timezone.now())
+
+        def progress(processed, total):
+            ImportJob.objects.filter(pk=job.pk).update(processed_rows=processed, updated_at=timezone.now())
+            # Cancellation is requested from another request, possibly another worker
+            return not ImportJob.objects.filter(pk=job.pk, cancel_requested=True).exists()
+
+        result = importer.import_rows(job.event, rows, update_existing=job.update_existing, progress=progress)
+
+        job.refresh_from_db()
+        job.inserted = result.inserted
+        job.updated = result.updated
+        job.unchanged = result.unchanged
+        job.missing = result.missing
+        job.skipped = result.skipped
+        job.status = 'cancelled' if result.cancelled else 'done'
+        job.data_version = versioning.current(job.event_id)[0]
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        if slot is not None:
+            slot.release()
+        job.finished_at = timezone.now()
+        job.save(update_fields=[
+            'status', 'error', 'finished_at', 'updated_at',
+            'inserted', 'updated', 'unchanged', 'missing', 'skipped', 'data_version',
+        ])
+        if job.user_id:
+            summary = (f"{job.inserted} inserted, {job.updated} updated, {job.unchanged} unchanged, "
+                       f"{job.missing} missing from sheet, {job.skipped} skipped")
+            AdminActionLog.objects.create(
+                user_id=job.user_id, event=job.event,
+                action=f"IMPORT {job.status.upper()} {job.file_name}: {summary}",
+            )
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+        with _owned_lock:
+            _owned.discard(job_id)
+        close_old_connections()
@@ -0,0 +1,188 @@
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import MEAL_BITS, Event, Participant, ParticipantChange
+
+# Every participant write appends ParticipantChange rows. Single-row saves are
+# journaled by the post_save signal; set-based paths (bulk updates, the importer)
+# skip signals and call record_*() here inside their own transaction, and deletes go
+# through delete(). Consumers poll feed() with the last id they saw as the cursor.
+#
+# A database restore takes the journal back to snapshot time. reset() then writes a
+# 'reset' entry per event, with an id past every cursor handed out before, followed by
+# a 'create' for every restored participant. A consumer that meets 'reset' drops its
+# copy and rebuilds it from the entries that follow.
+#
+# The cursor only works if ids become visible in order. Ids are handed out before
+# commit, so:
+# - SQLite: one writer at a time; ids already commit in order.
+# - PostgreSQL: each journal insert takes a transaction-scoped advisory lock, held
+#   until its transaction commits, so journal writers commit one after another. The
+#   lock covers the journal write and the commit only, so it stays short as long as
+#   the journal is the last thing a transaction writes; every path here is.
+# - Other backends (MySQL): the feed holds back entries younger than SETTLE. This
+#   narrows the race rather than closing it; a transaction still open SETTLE after
+#   its journal insert can commit below the cursor.
+
+PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+BATCH_SIZE = 500
+SETTLE = timedelta(seconds=getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 2))
+LOCK_KEY = 0x6a6f75726e616c  # pg_advisory_xact_lock key ("journal")
+ORDERED_VENDORS = ('sqlite', 'postgresql')
+
+
+def settle_window(alias='default'):
+    """How long new entries are held back before a cursor may pass them."""
+    return timedelta(0) if connections[alias].vendor in ORDERED_VENDORS else SETTLE
+
+
+@contextmanager
+def _serialized(alias):
+    """Scope for writing journal rows: on PostgreSQL, under the journal lock."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LOCK_KEY])
+        yield
+
+
+def _write(event_id, entries, using='default'):
+    with _serialized(using):
+        ParticipantChange.objects.using(using).bulk_create([
+            ParticipantChange(event_id=event_id, participant_id=participant_id, op=op, fields=fields)
+            for participant_id, op, fields in entries
+        ], batch_size=BATCH_SIZE)
+
+
+def record_save(instance, created):
+    """Journal a Participant.save(): every published field when created, else those that changed."""
+    after = instance.journal_values()
+    before = None if created else getattr(instance, '_journal_state', None)
+    if before is None:
+        fields = after
+    else:
+        fields = {field: value for field, value in after.items() if before.get(field) != value}
+    if created or fields:
+        _write(instance.event_id, [(instance.id, 'create' if created else 'update', fields)], instance._state.db)
+    instance._journal_state = after
+
+
+def record_created(event_id, participants):
+    """Journal rows inserted with bulk_create."""
+    missing = [p for p in participants if p.pk is None]
+    if missing:
+        # Backends without RETURNING on bulk insert leave the ids unset
+        ids = dict(
+            ((full_name, nationality), pk) for pk, full_name, nationality in
+            Participant.objects.filter(event_id=event_id, full_name__in=[p.full_name for p in missing])
+            .values_list('id', 'full_name', 'nationality')
+        )
+        for p in missing:
+            p.pk = ids.get((p.full_name, p.nationality))
+    _write(event_id, [(p.pk, 'create', p.journal_values()) for p in participants if p.pk is not None])
+
+
+def record_updated(event_id, changes):
+    """Journal set-based updates: {participant id: iterable of written fields}, values read back."""
+    # Meals are bits of one column but are published under their own names
+    columns = sorted({'meals_served' if field in MEAL_BITS else field for fields in changes.values() for field in fields})
+    ids = list(changes)
+    entries = []
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = Participant.objects.filter(id__in=ids[start:start + BATCH_SIZE]).values('id', *columns)
+        for row in rows:
+            entries.append((row['id'], 'update', {
+                field: bool(row['meals_served'] & MEAL_BITS[field]) if field in MEAL_BITS else row[field]
+                for field in changes[row['id']]
+            }))
+    _write(event_id, entries)
+
+
+def last_seq(using='default'):
+    return ParticipantChange.objects.using(using).aggregate(last=Max('id'))['last'] or 0
+
+
+def reset(after, using='default'):
+    """Restart every event's feed above `after` (the highest id seen before a restore)."""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        seq = max(after, last_seq(using))
+        for event_id in Event.objects.using(using).order_by('id').values_list('id', flat=True):
+            seq += 1
+            # Explicit ids: the restored sequence would hand out ones consumers already passed
+            with _serialized(using):
+                ParticipantChange.objects.using(using).create(
+                    id=seq, event_id=event_id, participant_id=0, op='reset', fields={},
+                )
+            entries = [(p.pk, 'create', p.journal_values()) for p in
+                       Participant.objects.using(using).filter(event_id=event_id).order_by('id').iterator(chunk_size=2000)]
+            _write(event_id, entries, using)
+            seq = last_seq(using)
+        # PostgreSQL sequences don't follow explicit ids (SQLite and MySQL do)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [ParticipantChange]):
+                cursor.execute(sql)
+
+
+def delete(event_id, queryset):
+    """Delete the event's participants in `queryset` and journal them; returns how many went.
+
+    One transaction: the ids are fixed first, the rows are deleted by id, and the
+    journal rows are written last, so a long DELETE doesn't hold the journal lock.
+    The ids are held in memory (a few MB for a 100k roster), which bounds this to
+    deletes of roster size, not arbitrary tables.
+    """
+    using = queryset.db
+    with transaction.atomic(using=using):
+        ids = list(queryset.values_list('id', flat=True))
+        deleted = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            _, counts = Participant.objects.using(using).filter(id__in=ids[start:start + BATCH_SIZE]).delete()
+            deleted += counts.get(Participant._meta.label, 0)
+        # A row another request deleted meanwhile gets a second 'delete' entry; consumers
+        # apply deletes idempotently anyway
+        _write_deleted(event_id, ids, using)
+    return deleted
+
+
+def _write_deleted(event_id, ids, using):
+    # One executemany rather than bulk_create, whose batches shrink to ~200 rows on
+    # SQLite's parameter limit
+    connection = connections[using]
+    opts = ParticipantChange._meta
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(opts.get_field(name).column) for name in ('event', 'participant_id', 'op', 'fields', 'created_at'))
+    fields = opts.get_field('fields').get_db_prep_save({}, connection)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with _serialized(using), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {qn(opts.db_table)} ({columns}) VALUES (%s, %s, %s, %s, %s)",
+            [(event_id, pid, 'delete', fields, now) for pid in ids],
+        )
+
+
+def feed(event, since=0, limit=PAGE_SIZE):
+    """(entries after the `since` cursor, oldest first, and whether more are ready)."""
+    changes = ParticipantChange.objects.filter(event=event, id__gt=since)
+    window = settle_window(changes.db)
+    if window:
+        unsettled = changes.filter(created_at__gt=timezone.now() - window).aggregate(first=Min('id'))['first']
+        if unsettled is not None:
+            changes = changes.filter(id__lt=unsettled)
+    rows = list(changes.order_by('id').values('id', 'participant_id', 'op', 'fields', 'created_at')[:limit + 1])
+    entries = [
+        {'seq': row['id'], 'participant': row['participant_id'], 'op': row['op'],
+         'fields': row['fields'], 'at': row['created_at']}
+        for row in rows[:limit]
+    ]
+    return entries, len(rows) > limit
@@ -0,0 +1,113 @@
+import os
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+from participants import rollups, scanindex
+from participants.models import MEAL_FIELDS, Event, Participant
+
+NATIONALITIES = ['Tunisia', 'Egypt', 'Morocco', 'Jordan', 'Algeria', 'Lebanon', 'Iraq', 'Syria',
+                 'Saudi Arabia', 'Oman', 'Libya', 'Sudan', 'Yemen', 'Qatar', 'Kuwait', 'France']
+
+
+class Command(BaseCommand):
+    help = ('Time toggle writes and dashboard reads on a throwaway event '
+            '(run before and after an index change to compare)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000, help='Participants in the benchmark event')
+        parser.add_argument('--writes', type=int, default=500, help='Toggle saves to time')
+        parser.add_argument('--reads', type=int, default=30, help='Repetitions of each read query')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        event = Event.objects.create(name="Index benchmark", start_date=date.today(), meal_days=5)
+        try:
+            self._seed(event, options['size'], rng)
+            ids = list(Participant.objects.filter(event=event).values_list('id', flat=True))
+            self.stdout.write(f"{connection.vendor}, {len(ids)} participants, "
+                              f"{len(self._indexes())} indexes on {Participant._meta.db_table}")
+
+            self._report('toggle save (presence + meal)', self._time(options['writes'], lambda: self._toggle(rng.choice(ids), rng)))
+            self._report('headline counts (stats)', self._time(options['reads'], lambda: rollups.headline_counts(event)))
+            self._report('rollup group by', self._time(options['reads'], lambda: list(
+                Participant.objects.filter(event=event)
+                .values('nationality', 'paid', 'free_access', 'attended').annotate(n=Count('id')).order_by()
+            )))
+            self._report('arrivals per minute', self._time(options['reads'], lambda: list(
+                Participant.objects.filter(event=event, first_seen_at__isnull=False)
+                .annotate(minute=TruncMinute('first_seen_at')).values('minute').annotate(n=Count('id')).order_by('minute')
+            )))
+            self._report('present count', self._time(options['reads'], lambda: (
+                Participant.objects.filter(event=event, is_present=True).count()
+            )))
+
+            keys = list(Participant.objects.filter(event=event).values_list('full_name', 'nationality'))
+
+            def orm_lookup():
+                full_name, nationality = rng.choice(keys)
+                return Participant.objects.filter(
+                    event=event, full_name=full_name, nationality=nationality,
+                ).values_list('id', flat=True).first()
+
+            self._report('scan lookup (ORM)', self._time(options['writes'], orm_lookup))
+            started = time.perf_counter()
+            scanindex.build(event)
+            self.stdout.write(f"  scan index built in {(time.perf_counter() - started) * 1000:.0f} ms, "
+                              f"{os.path.getsize(scanindex.index_path(event.id)) / 1024:.0f} KiB")
+            event.refresh_from_db()
+            self._report('scan lookup (mmap index)', self._time(options['writes'], lambda: (
+                scanindex.lookup(event, *rng.choice(keys))
+            )))
+        finally:
+            event.delete()
+
+    def _seed(self, event, size, rng):
+        now = timezone.now()
+        batch = []
+        for i in range(size):
+            present = rng.random() < 0.6
+            meals = {field: present and rng.random() < 0.3 for field in MEAL_FIELDS[:10]}
+            batch.append(Participant(
+                event=event, full_name=f"Benchmark Participant {i:06d}", search_name=f"benchmark participant {i:06d}",
+                nationality=rng.choice(NATIONALITIES), paid=rng.random() < 0.5, free_access=rng.random() < 0.1,
+                is_present=present, attended=present, first_seen_at=now if present else None, **meals,
+            ))
+            if len(batch) == 5000:
+                Participant.objects.bulk_create(batch)
+                batch = []
+        Participant.objects.bulk_create(batch)
+
+    def _indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Participant._meta.db_table)
+        return [name for name, info in constraints.items() if info['index'] and not info['primary_key']]
+
+    def _toggle(self, pid, rng):
+        # What toggle_presence / toggle_meal do: load, flip, full save()
+        p = Participant.objects.get(pk=pid)
+        p.is_present = not p.is_present
+        meal = rng.choice(MEAL_FIELDS[:10])
+        setattr(p, meal, not getattr(p, meal))
+        p.mark_seen()
+        p.save()
+
+    def _time(self, repeat, func):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return sorted(samples)
+
+    def _report(self, label, samples):
+        p50 = samples[len(samples) // 2]
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        self.stdout.write(f"  {label:<32} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   (n={len(samples)})")
@@ -0,0 +1,66 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from participants import dedupe
+from participants.models import Event, Participant
+
+COLUMNS = ['keep_id', 'duplicate_id', 'score', 'keep_name', 'duplicate_name', 'nationality']
+
+
+class Command(BaseCommand):
+    help = ('Find near-duplicate participants of an event and write merge proposals as CSV; '
+            'review the file, delete the rows to leave alone, then apply it with --merge')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, help='Event id (defaults to the active event)')
+        parser.add_argument('--output', help='Proposals CSV to write (default: stdout)')
+        parser.add_argument('--threshold', type=float, default=dedupe.THRESHOLD,
+                            help='Minimum name similarity (0-1) to propose a pair')
+        parser.add_argument('--workers', type=int, default=None, help='Scoring processes (default: one per CPU)')
+        parser.add_argument('--merge', metavar='CSV', help='Merge the keep_id/duplicate_id pairs listed in this file')
+
+    def handle(self, *args, **options):
+        if options['event']:
+            event = Event.objects.filter(pk=options['event']).first()
+        else:
+            event = Event.objects.filter(is_active=True).first()
+        if event is None:
+            raise CommandError("No such event (create one or pass --event)")
+        if options['merge']:
+            self._merge(event, options['merge'])
+        else:
+            self._propose(event, options)
+
+    def _propose(self, event, options):
+        started = time.perf_counter()
+        proposals = dedupe.find_duplicates(event, options['threshold'], options['workers'])
+        names = Participant.objects.filter(event=event).in_bulk(
+            {pid for keep, duplicate, _ in proposals for pid in (keep, duplicate)}
+        )
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(COLUMNS)
+            for keep, duplicate, score in proposals:
+                writer.writerow([keep, duplicate, score, names[keep].full_name, names[duplicate].full_name,
+                                 names[keep].nationality])
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        self.stderr.write(self.style.SUCCESS(
+            f"{len(proposals)} merge proposals for {event.name} in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def _merge(self, event, path):
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                pairs = [(int(row['keep_id']), int(row['duplicate_id'])) for row in csv.DictReader(f)]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        removed = dedupe.merge(event, pairs)
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {len(pairs)} pairs of {event.name}: {removed} duplicate participants removed."
+        ))
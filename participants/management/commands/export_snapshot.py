@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from participants import exports
+from participants.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Export an event roster with meal data to Parquet or Arrow IPC'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Destination file path')
+        parser.add_argument('--event', type=int, help='Event id (defaults to the active event)')
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='parquet')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['event']:
+            event = Event.objects.filter(pk=options['event']).first()
+        else:
+            event = Event.objects.filter(is_active=True).first()
+        if event is None:
+            raise CommandError("No such event (create one or pass --event)")
+
+        started = time.perf_counter()
+        # Written next to the destination and renamed when complete, so a failed run
+        # never leaves a truncated file behind (or replaces a good one)
+        partial = options['output'] + '.partial'
+        try:
+            rows = exports.write_snapshot(event, partial, options['format'], options['chunk_size'])
+            os.replace(partial, options['output'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {rows} participants of {event.name} to {options['output']} "
+            f"in {time.perf_counter() - started:.2f}s."
+        ))
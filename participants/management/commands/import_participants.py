@@ -1,8 +1,8 @@
 # participants/management/commands/import_participants.py
 import os
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from participants.models import Participant
+from participants import importer
+from participants.models import Event
 import pandas as pd
 
 class Command(BaseCommand):
@@ -10,9 +10,19 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('file_path', type=str, help='Path to Excel file')
+        parser.add_argument('--event', type=int, help='Event id (defaults to the active event)')
+        parser.add_argument('--update', action='store_true', help='Also apply payment changes to existing participants')
 
     def handle(self, *args, **options):
         file_path = options['file_path']
+        if options['event']:
+            event = Event.objects.filter(pk=options['event']).first()
+        else:
+            event = Event.objects.filter(is_active=True).first()
+        if event is None:
+            self.stdout.write(self.style.ERROR("No such event (create one or pass --event)"))
+            return
+
         if not os.path.exists(file_path):
             self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
             return
@@ -26,21 +36,17 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"Missing column: {col}"))
                 return
 
-        created = 0
-        with transaction.atomic():
-            for _, row in df.iterrows():
-                full_name = str(row["Full Name"]).strip()
-                nationality = str(row["Nationality"]).strip()
-                paid = str(row["Paid"]).strip().lower() in ["yes", "true", "1", "paid"]
-
-                obj, new = Participant.objects.get_or_create(
-                    full_name=full_name,
-                    nationality=nationality,
-                    defaults={'paid': paid}
-                )
-                if new:
-                    created += 1
+        # This sheet flavour has a yes/no "Paid" column instead of "Payment Status"
+        rows = [
+            (
+                str(row["Full Name"]).strip(),
+                str(row["Nationality"]).strip(),
+                'paid' if str(row["Paid"]).strip().lower() in ["yes", "true", "1", "paid"] else 'unpaid',
+            )
+            for _, row in df.fillna('').iterrows()
+        ]
+        result = importer.import_rows(event, rows, update_existing=options['update'])
 
         self.stdout.write(
-            self.style.SUCCESS(f"Imported {created} new participants.")
-        )
\ No newline at end of file
+            self.style.SUCCESS(f"Imported into {event.name}: {result.summary()}.")
+        )
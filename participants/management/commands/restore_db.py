@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from participants import backups
+
+
+class Command(BaseCommand):
+    help = 'Restore the database from a snapshot_db file (default: the newest one), replacing all current data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', nargs='?', help='Snapshot file to restore')
+        parser.add_argument('--dir', default=backups.SNAPSHOT_DIR, help='Where to look for the newest snapshot')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        try:
+            path = options['snapshot'] or backups.list_snapshots(options['dir'], options['database'])[-1]
+        except IndexError:
+            raise CommandError(f"No snapshots in {options['dir']}")
+        except backups.BackupError as e:
+            raise CommandError(str(e))
+
+        if options['interactive']:
+            answer = input(f"This replaces everything in the '{options['database']}' database with {path}.\n"
+                           "Type 'yes' to continue, or 'no' to cancel: ")
+            if answer != 'yes':
+                self.stdout.write("Restore cancelled.")
+                return
+
+        try:
+            backups.restore(path, options['database'])
+        except backups.BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Restored {path}."))
@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from participants import backups
+
+
+class Command(BaseCommand):
+    help = ('Take a compressed, consistent snapshot of the database while the app keeps running; '
+            'with --every, keep checkpointing in the background until stopped')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=backups.SNAPSHOT_DIR, help='Where snapshots are written')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--every', type=float, metavar='MINUTES', help='Repeat every MINUTES minutes')
+        parser.add_argument('--keep', type=int, default=backups.KEEP, help='Snapshots to keep (0 keeps all)')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            try:
+                path = backups.snapshot(options['dir'], options['database'])
+                removed = backups.prune(options['dir'], options['database'], options['keep'])
+            except backups.BackupError as e:
+                if not options['every']:
+                    raise CommandError(str(e))
+                # A missed checkpoint shouldn't end the loop; the next one may well work
+                self.stderr.write(self.style.ERROR(f"Snapshot failed: {e}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Snapshot {path} ({os.path.getsize(path) / 1024:.0f} KiB) "
+                    f"in {time.monotonic() - started:.2f}s" + (f", pruned {len(removed)}" if removed else '') + "."
+                ))
+            if not options['every']:
+                return
+            time.sleep(max(0, options['every'] * 60 - (time.monotonic() - started)))
@@ -0,0 +1,198 @@
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from participants.events import SESSION_KEY
+from participants.models import MEAL_FIELDS, CustomUser, Event, Participant
+
+
+class Command(BaseCommand):
+    help = ('Simulate concurrent check-in stations (scan -> presence -> meal) against a throwaway '
+            'event, then report throughput, errors and whether the final DB state adds up')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stations', type=int, default=8, help='Concurrent stations (threads)')
+        parser.add_argument('--participants', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=50, help='Scan sequences per station')
+        parser.add_argument('--overlap', type=float, default=0.1,
+                            help='Share of scans that pick from the pool every station uses')
+        parser.add_argument('--meal', default='breakfast_day1')
+        parser.add_argument('--duplicates', type=int, default=0,
+                            help='Participants registered twice under the same Name|Country')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--keep', action='store_true', help='Keep the stress event and user afterwards')
+
+    def handle(self, *args, **options):
+        if options['stations'] < 1 or options['participants'] < options['stations']:
+            raise CommandError("Need at least one station and one participant per station")
+        if options['meal'] not in MEAL_FIELDS:
+            raise CommandError(f"Unknown meal field: {options['meal']}")
+        self.rng = random.Random(options['seed'])
+        self.meal = options['meal']
+
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        event = Event.objects.create(name=f"Stress test {stamp}", start_date=time.strftime('%Y-%m-%d'))
+        user = CustomUser.objects.create(username=f"stress-{stamp}", role='super_admin')
+        try:
+            participants = self._seed(event, options['participants'], options['duplicates'])
+            self._run(event, user, participants, options)
+        finally:
+            if options['keep']:
+                self.stdout.write(f"Kept event #{event.id} and user {user.username}.")
+            else:
+                event.delete()
+                user.delete()
+
+    def _seed(self, event, count, duplicates):
+        Participant.objects.bulk_create([
+            Participant(event=event, full_name=f"Stress Participant {i:05d}", nationality='Testland')
+            for i in range(count)
+        ])
+        participants = list(Participant.objects.filter(event=event).values_list('id', 'full_name', 'nationality'))
+        if duplicates:
+            # Same QR payload twice: what scan_qr meets when a sheet lists someone twice
+            Participant.objects.bulk_create([
+                Participant(event=event, full_name=name, nationality=nat)
+                for _, name, nat in participants[:duplicates]
+            ])
+        return participants
+
+    def _run(self, event, user, participants, options):
+        stations = options['stations']
+        shared_size = max(1, int(len(participants) * options['overlap']))
+        shared, own = participants[:shared_size], participants[shared_size:]
+        slices = [own[i::stations] or shared for i in range(stations)]
+
+        self.lock = threading.Lock()
+        self.presence_toggles = Counter()
+        self.meal_toggles = Counter()
+        self.errors = Counter()
+        self.latencies = defaultdict(list)
+        self.requests = 0
+        # The test client's own exception capture is shared between threads, so track
+        # each station's last server error here and let the views answer 500 as in production
+        self.last_exception = threading.local()
+        got_request_exception.connect(self._store_exception)
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+
+        self.stdout.write(
+            f"Event #{event.id}: {len(participants)} participants, {stations} stations x "
+            f"{options['rounds']} rounds, {shared_size} shared, {options['duplicates']} duplicated"
+        )
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=stations) as pool:
+                for i in range(stations):
+                    seed = self.rng.random()
+                    pool.submit(self._station, f"stress-{i + 1}", event, user, slices[i], shared,
+                                options['rounds'], options['overlap'], seed)
+        finally:
+            elapsed = time.perf_counter() - started
+            got_request_exception.disconnect(self._store_exception)
+            request_logger.setLevel(log_level)
+
+        self._report(elapsed)
+        self._check(event)
+
+    def _station(self, name, event, user, mine, shared, rounds, overlap, seed):
+        rng = random.Random(seed)
+        client = Client(
+            HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost',
+            HTTP_X_STATION_ID=name,
+            HTTP_X_FORWARDED_PROTO='https',  # as behind the production proxy, so no SSL redirect
+            raise_request_exception=False,
+        )
+        try:
+            client.force_login(user)
+            session = client.session
+            session[SESSION_KEY] = event.id
+            session.save()
+
+            for _ in range(rounds):
+                pid, full_name, nationality = rng.choice(shared if rng.random() < overlap else mine)
+                response = self._call(client, 'scan', reverse('scan_qr'),
+                                      {'qr_data': f"{full_name}|{nationality}", 'station': name})
+                if response is None:
+                    continue
+                if reverse('toggle_presence', args=[pid]).encode() not in response.content:
+                    self._error('scan: participant page not shown')
+                    continue
+                if self._call(client, 'presence', reverse('toggle_presence', args=[pid])) is not None:
+                    with self.lock:
+                        self.presence_toggles[pid] += 1
+                if self._call(client, 'meal', reverse('toggle_meal', args=[pid, self.meal])) is not None:
+                    with self.lock:
+                        self.meal_toggles[pid] += 1
+        finally:
+            connection.close()
+
+    def _store_exception(self, **kwargs):
+        self.last_exception.value = sys.exc_info()[1]
+
+    def _call(self, client, step, url, data=None):
+        self.last_exception.value = None
+        started = time.perf_counter()
+        try:
+            response = client.post(url, data or {})
+        except Exception as e:
+            self._error(f"{step}: {type(e).__name__}: {str(e)[:80]}")
+            return None
+        with self.lock:
+            self.requests += 1
+            self.latencies[step].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            e = self.last_exception.value
+            detail = f"{type(e).__name__}: {str(e)[:80]}" if e else response.reason_phrase
+            self._error(f"{step}: HTTP {response.status_code} {detail}")
+            return None
+        return response
+
+    def _error(self, label):
+        with self.lock:
+            self.errors[label] += 1
+
+    def _report(self, elapsed):
+        total_errors = sum(self.errors.values())
+        self.stdout.write(
+            f"\n{self.requests} requests in {elapsed:.2f}s = {self.requests / elapsed:.1f} req/s, "
+            f"{total_errors} errors ({total_errors / max(1, self.requests + total_errors):.1%})"
+        )
+        for step, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            p50 = ordered[len(ordered) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self.stdout.write(f"  {step:<9} {len(ordered):>6} ok   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+        for label, count in self.errors.most_common():
+            self.stdout.write(self.style.WARNING(f"  {count:>6} x {label}"))
+
+    def _check(self, event):
+        # Every acknowledged toggle flips the flag once, so the final state is the parity of the count
+        mismatches = Counter()
+        for p in Participant.objects.filter(event=event):
+            if p.is_present != (self.presence_toggles[p.id] % 2 == 1):
+                mismatches['presence'] += 1
+            if getattr(p, self.meal) != (self.meal_toggles[p.id] % 2 == 1):
+                mismatches['meal'] += 1
+            if p.attended != (p.is_present or p.has_meals):
+                mismatches['attended'] += 1
+            if p.is_present and p.first_seen_at is None:
+                mismatches['first_seen_at'] += 1
+
+        if mismatches:
+            details = ', '.join(f"{count} {field}" for field, count in mismatches.items())
+            self.stdout.write(self.style.ERROR(f"\nConsistency check FAILED: {details} (lost updates)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nConsistency check passed: DB state matches every acknowledged action."))
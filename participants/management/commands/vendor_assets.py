@@ -0,0 +1,44 @@
+import hashlib
+import os
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from participants import assets
+
+STATIC_ROOT = os.path.join(os.path.dirname(__file__), '..', '..', 'static')
+
+
+class Command(BaseCommand):
+    help = ('Download the pinned third-party front-end files (Chart.js, canvas-confetti, logos) '
+            'into participants/static so pages stop depending on CDNs; commit the result')
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Assets to fetch (default: all of {', '.join(assets.VENDOR)})")
+        parser.add_argument('--force', action='store_true', help='Download again even if already vendored')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(assets.VENDOR)
+        unknown = set(names) - set(assets.VENDOR)
+        if unknown:
+            raise CommandError(f"Unknown asset(s): {', '.join(sorted(unknown))}")
+
+        for name in names:
+            path = os.path.normpath(os.path.join(STATIC_ROOT, assets.vendor_path(name)))
+            if os.path.exists(path) and not options['force']:
+                self.stdout.write(f"  {name:<14} already vendored")
+                continue
+            url = assets.VENDOR[name][1]
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    body = response.read()
+            except OSError as e:
+                raise CommandError(f"{name}: could not download {url}: {e}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body)
+            self.stdout.write(f"  {name:<14} {len(body):>8} bytes  sha256 {hashlib.sha256(body).hexdigest()[:16]}")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Done. Commit participants/static/participants/vendor/ together with the templates that use it."
+        ))
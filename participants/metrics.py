@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Rolling throughput metrics for the check-in desks.
+# Each worker keeps a ring of fixed-width time slots in memory and publishes it
+# to the 'metrics' cache every few seconds, so any worker can answer for all of them.
+#
+# Workers publish under one of MAX_WORKERS numbered keys, each with a TTL and no
+# shared registry to update. A worker takes the first key that is free and keeps it
+# while it publishes; if two workers start on the same key at once, the one that
+# finds the other's pid there on its next publish moves on to another key.
+
+SLOT_SECONDS = 15
+WINDOW_MINUTES = (1, 5, 15)
+NUM_SLOTS = max(WINDOW_MINUTES) * 60 // SLOT_SECONDS
+MAX_LATENCY_SAMPLES = 200  # per slot / station / meal
+PUBLISH_INTERVAL = getattr(settings, 'METRICS_PUBLISH_INTERVAL', 2)
+
+MAX_WORKERS = getattr(settings, 'METRICS_MAX_WORKERS', 64)
+WORKER_KEY = 'metrics:worker:{}'
+CACHE_TIMEOUT = max(WINDOW_MINUTES) * 60 * 2
+
+
+def _cache():
+    return caches['metrics']
+
+
+class RingMetrics:
+    """Fixed-size ring of time slots holding counters and latency samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = [None] * NUM_SLOTS
+        self.last_publish = 0
+        self.key = None
+
+    def _slot(self, now):
+        bucket = int(now // SLOT_SECONDS)
+        index = bucket % NUM_SLOTS
+        slot = self.slots[index]
+        if slot is None or slot['bucket'] != bucket:
+            # Slot belongs to an older lap of the ring: recycle it
+            slot = {'bucket': bucket, 'counts': defaultdict(int), 'latencies': defaultdict(list)}
+            self.slots[index] = slot
+        return slot
+
+    def record(self, kind, station, meal, outcome, latency_ms=None, now=None, count=1):
+        now = now or time.time()
+        with self.lock:
+            slot = self._slot(now)
+            slot['counts'][(kind, station, meal, outcome)] += count
+            if latency_ms is not None:
+                samples = slot['latencies'][(station, meal)]
+                if len(samples) < MAX_LATENCY_SAMPLES:
+                    samples.append(latency_ms)
+            due = now - self.last_publish >= PUBLISH_INTERVAL
+            if due:
+                self.last_publish = now
+        if due:
+            self.publish(now)
+
+    def export(self, now=None):
+        """Plain-dict copy of the live slots (safe to pickle into the cache)."""
+        oldest = int((now or time.time()) // SLOT_SECONDS) - NUM_SLOTS + 1
+        with self.lock:
+            return [
+                {
+                    'bucket': s['bucket'],
+                    'counts': dict(s['counts']),
+                    'latencies': {k: list(v) for k, v in s['latencies'].items()},
+                }
+                for s in self.slots if s is not None and s['bucket'] >= oldest
+            ]
+
+    def _claim(self, cache, pid):
+        """Our worker key: the one we hold, else the first free one (None when all are taken)."""
+        if self.key is not None:
+            held = cache.get(self.key)
+            if held is None or held['pid'] == pid:
+                return self.key
+        keys = [WORKER_KEY.format(i) for i in range(MAX_WORKERS)]
+        taken = cache.get_many(keys)
+        self.key = next((key for key in keys if key not in taken), None)
+        return self.key
+
+    def publish(self, now=None):
+        pid = os.getpid()
+        try:
+            cache = _cache()
+            key = self._claim(cache, pid)
+            if key is not None:
+                cache.set(key, {'pid': pid, 'slots': self.export(now)}, CACHE_TIMEOUT)
+        except Exception:
+            # Metrics must never break a scan
+            pass
+
+
+_local = RingMetrics()
+
+
+def record(kind, station, meal='', outcome='', latency_ms=None, count=1):
+    _local.record(kind, station or 'unknown', meal or '', outcome, latency_ms, count=count)
+
+
+def _collect_slots(now):
+    """Slots from every worker that published recently, plus our own live ones."""
+    own_pid = os.getpid()
+    slots = list(_local.export(now))
+    published = _cache().get_many([WORKER_KEY.format(i) for i in range(MAX_WORKERS)])
+    for data in published.values():
+        if data['pid'] != own_pid:
+            slots.extend(data['slots'])
+    return slots
+
+
+def _p95(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)
+
+
+def _summarize(counts, latencies, minutes):
+    scans = sum(n for (kind, _, _, _), n in counts.items() if kind == 'scan')
+    not_found = sum(n for (kind, _, _, outcome), n in counts.items()
+                    if kind == 'scan' and outcome == 'not_found')
+    served = sum(n for (kind, _, _, outcome), n in counts.items()
+                 if kind == 'meal' and outcome == 'served')
+    return {
+        'scans': scans,
+        'scans_per_min': round(scans / minutes, 2),
+        'served': served,
+        'served_per_min': round(served / minutes, 2),
+        'not_found_rate': round(not_found / scans, 3) if scans else 0.0,
+        'p95_scan_to_serve_ms': _p95(latencies),
+    }
+
+
+def snapshot(now=None):
+    """Aggregate all workers' slots into rolling 1/5/15-minute windows."""
+    now = now or time.time()
+    current = int(now // SLOT_SECONDS)
+    slots = _collect_slots(now)
+
+    windows = {}
+    for minutes in WINDOW_MINUTES:
+        oldest = current - (minutes * 60 // SLOT_SECONDS) + 1
+        counts = defaultdict(int)
+        latencies = defaultdict(list)
+        for slot in slots:
+            if slot['bucket'] < oldest:
+                continue
+            for key, n in slot['counts'].items():
+                counts[key] += n
+            for key, samples in slot['latencies'].items():
+                latencies[key].extend(samples)
+
+        stations, meals = defaultdict(dict), defaultdict(dict)
+        for (kind, station, meal, outcome), n in counts.items():
+            stations[station][(kind, station, meal, outcome)] = n
+            if kind == 'meal':
+                meals[meal][(kind, station, meal, outcome)] = n
+
+        windows[f'{minutes}m'] = {
+            'overall': _summarize(counts, [v for s in latencies.values() for v in s], minutes),
+            'stations': {
+                station: _summarize(c, [v for (st, _), s in latencies.items() if st == station for v in s], minutes)
+                for station, c in sorted(stations.items())
+            },
+            'meals': {
+                meal: _summarize(c, [v for (_, m), s in latencies.items() if m == meal for v in s], minutes)
+                for meal, c in sorted(meals.items())
+            },
+        }
+    return {'generated_at': now, 'windows': windows}
+
+
+def station_id(request):
+    """Station tag for a request: explicit header/field, else the one stored at scan time."""
+    station = (
+        request.headers.get('X-Station-Id')
+        or request.POST.get('station')
+        or request.GET.get('station')
+        or request.session.get('station_id')
+        or request.user.get_username()
+    )
+    return station.strip()[:50]
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:13
+
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_default_event(apps, schema_editor):
+    # Everything recorded so far belongs to the November 2025 congress
+    Event = apps.get_model('participants', 'Event')
+    Participant = apps.get_model('participants', 'Participant')
+    AdminActionLog = apps.get_model('participants', 'AdminActionLog')
+    event = Event.objects.create(
+        name='14th Arab Congress of Plant Protection',
+        start_date=datetime.date(2025, 11, 3),
+        meal_days=5,
+        is_active=True,
+    )
+    Participant.objects.update(event=event)
+    AdminActionLog.objects.update(event=event)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0009_alter_participant_breakfast_day1_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('start_date', models.DateField()),
+                ('meal_days', models.PositiveSmallIntegerField(default=5)),
+                ('is_active', models.BooleanField(default=False)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-start_date'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_paid_2b1c0d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_nationa_ab9316_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_is_pres_6000fe_idx',
+        ),
+        migrations.AddField(
+            model_name='adminactionlog',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='participants.event'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='event',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='participants.event'),
+        ),
+        migrations.RunPython(create_default_event, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='participant',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='participants.event'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'full_name', 'nationality'], name='participant_event_i_ae6142_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'paid', 'free_access'], name='participant_event_i_0fb588_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'nationality', 'paid'], name='participant_event_i_195b78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'is_present'], name='participant_event_i_83deb4_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0010_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='import_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
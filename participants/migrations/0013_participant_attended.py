@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:18
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def backfill_attended(apps, schema_editor):
+    # Same rule the dashboards used: checked in OR any meal served.
+    # No timestamps were recorded before, so first/last seen stay empty.
+    Participant = apps.get_model('participants', 'Participant')
+    q_meals = Q()
+    for field in [f'{m}_day{d}' for d in range(1, 8) for m in ['breakfast', 'lunch']]:
+        q_meals |= Q(**{field: True})
+    Participant.objects.filter(Q(is_present=True) | q_meals).update(attended=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0012_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='attended',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='first_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_attended, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'attended'], name='participant_event_i_30561c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'first_seen_at'], name='participant_event_i_89b70c_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0013_participant_attended'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='data_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='data_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
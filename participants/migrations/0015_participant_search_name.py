@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:26
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize(text):
+    # Frozen copy of participants.fuzzy.normalize as of this migration, so later
+    # changes to the app's matching rules can't change what this backfill writes
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[\W_]+', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def backfill_search_name(apps, schema_editor):
+    Participant = apps.get_model('participants', 'Participant')
+    batch = []
+    for p in Participant.objects.only('id', 'full_name').iterator(chunk_size=2000):
+        p.search_name = normalize(p.full_name)
+        batch.append(p)
+        if len(batch) == 2000:
+            Participant.objects.bulk_update(batch, ['search_name'])
+            batch = []
+    Participant.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0014_event_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+    ]
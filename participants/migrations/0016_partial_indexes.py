@@ -0,0 +1,169 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+BOOLEAN_COLUMNS = ['paid', 'free_access', 'is_present'] + [
+    f'{meal}_day{day}' for day in range(1, 8) for meal in ['breakfast', 'lunch']
+]
+
+
+def drop_boolean_indexes(apps, schema_editor):
+    # Plain DROP INDEX: AlterField would rebuild the whole table on SQLite once per column.
+    # The names Django generated for db_index differ per backend, so they are looked up.
+    connection = schema_editor.connection
+    table = apps.get_model('participants', 'Participant')._meta.db_table
+    qn = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    for name, info in constraints.items():
+        if info['index'] and not info['unique'] and not info['primary_key'] and len(info['columns']) == 1 \
+                and info['columns'][0] in BOOLEAN_COLUMNS:
+            if connection.vendor == 'mysql':
+                schema_editor.execute(f"DROP INDEX {qn(name)} ON {qn(table)}")
+            else:
+                schema_editor.execute(f"DROP INDEX IF EXISTS {qn(name)}")
+
+
+def create_boolean_indexes(apps, schema_editor):
+    table = apps.get_model('participants', 'Participant')._meta.db_table
+    qn = schema_editor.quote_name
+    for column in BOOLEAN_COLUMNS:
+        schema_editor.execute(f"CREATE INDEX {qn(f'{table}_{column}_idx')} ON {qn(table)} ({qn(column)})")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0015_participant_search_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_event_i_0fb588_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_event_i_195b78_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_event_i_83deb4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_event_i_30561c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_event_i_89b70c_idx',
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_boolean_indexes, create_boolean_indexes),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day1',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day2',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day3',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day4',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day5',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day6',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='breakfast_day7',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='free_access',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='is_present',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day1',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day2',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day3',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day4',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day5',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day6',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='lunch_day7',
+                    field=models.BooleanField(default=False),
+                ),
+                migrations.AlterField(
+                    model_name='participant',
+                    name='paid',
+                    field=models.BooleanField(default=False),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'nationality', 'paid', 'free_access', 'attended'], name='participant_rollup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(condition=models.Q(('is_present', True)), fields=['event'], name='participant_present_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(condition=models.Q(('attended', True)), fields=['event'], name='participant_attended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(condition=models.Q(('first_seen_at__isnull', False)), fields=['event', 'first_seen_at'], name='participant_arrivals_idx'),
+        ),
+    ]
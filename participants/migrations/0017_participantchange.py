@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:44
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+FIELDS = ['full_name', 'nationality', 'paid', 'free_access', 'is_present', 'attended',
+          'first_seen_at', 'last_seen_at'] + [f'{m}_day{d}' for d in range(1, 8) for m in ['breakfast', 'lunch']]
+
+
+def journal_existing(apps, schema_editor):
+    # A 'create' entry per existing participant, so a feed read from seq 0 is a full sync
+    Participant = apps.get_model('participants', 'Participant')
+    ParticipantChange = apps.get_model('participants', 'ParticipantChange')
+    batch = []
+    for row in Participant.objects.order_by('id').values('id', 'event_id', *FIELDS).iterator(chunk_size=2000):
+        batch.append(ParticipantChange(
+            event_id=row.pop('event_id'), participant_id=row.pop('id'), op='create', fields=row,
+        ))
+        if len(batch) == 2000:
+            ParticipantChange.objects.bulk_create(batch)
+            batch = []
+    ParticipantChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0016_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('create', 'Created'), ('update', 'Updated'), ('delete', 'Deleted')], max_length=6)),
+                ('fields', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='participants.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'id'], name='participant_event_i_bbbca2_idx')],
+            },
+        ),
+        migrations.RunPython(journal_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:51
+
+import participants.models
+from django.db import migrations
+from django.db.models import Case, Q, Value, When
+
+MEALS = [f'{m}_day{d}' for d in range(1, 8) for m in ['breakfast', 'lunch']]  # bit i = MEALS[i]
+
+
+def pack_meals(apps, schema_editor):
+    # One UPDATE: meals_served = sum of the bits of the meal columns that are set
+    Participant = apps.get_model('participants', 'Participant')
+    bits = [Case(When(Q(**{meal: True}), then=Value(1 << i)), default=Value(0)) for i, meal in enumerate(MEALS)]
+    Participant.objects.update(meals_served=sum(bits[1:], bits[0]))
+
+
+def unpack_meals(apps, schema_editor):
+    Participant = apps.get_model('participants', 'Participant')
+    for i, meal in enumerate(MEALS):
+        Participant.objects.filter(meals_served__has=1 << i).update(**{meal: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0017_participantchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='meals_served',
+            field=participants.models.BitmaskField(default=0),
+        ),
+        migrations.RunPython(pack_meals, unpack_meals),
+    ] + [
+        migrations.RemoveField(model_name='participant', name=meal)
+        for meal in MEALS
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0018_meals_bitmask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
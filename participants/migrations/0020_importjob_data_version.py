@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0019_importjob_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='data_version',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    # Substring search on search_name (admin changelist). A trigram GIN index serves
+    # LIKE '%term%' on PostgreSQL; other backends keep scanning, as the stock
+    # icontains search always has.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('participants', 'Participant')._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS participant_search_trgm_idx ON {table} USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS participant_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0020_importjob_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='roster_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0021_event_roster_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='participantchange',
+            name='op',
+            field=models.CharField(choices=[('create', 'Created'), ('update', 'Updated'), ('delete', 'Deleted'), ('reset', 'Reset')], max_length=6),
+        ),
+    ]
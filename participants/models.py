@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
+from datetime import timedelta
+from .fuzzy import normalize
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
@@ -27,8 +31,89 @@ class CustomUser(AbstractUser):
             self.is_superuser = False
         super().save(*args, **kwargs)
 
+MEAL_FIELDS = [f'{m}_day{d}' for d in range(1, 8) for m in ['breakfast', 'lunch']]
+MEAL_BITS = {field: 1 << i for i, field in enumerate(MEAL_FIELDS)}  # bit of each meal in meals_served
+ALL_MEALS = (1 << len(MEAL_FIELDS)) - 1
+MAX_MEAL_DAYS = 7  # one breakfast + lunch bit pair per day on Participant
+# Participant columns published through the change journal (ParticipantChange)
+JOURNAL_FIELDS = ['full_name', 'nationality', 'paid', 'free_access', 'is_present', 'attended',
+                  'first_seen_at', 'last_seen_at', *MEAL_FIELDS]
+
+class Event(models.Model):
+    name = models.CharField(max_length=200)
+    start_date = models.DateField()
+    meal_days = models.PositiveSmallIntegerField(default=5)  # 1..MAX_MEAL_DAYS
+    is_active = models.BooleanField(default=False)  # default event for new sessions
+    is_archived = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Bumped on every participant write; cached aggregates are keyed by it
+    data_version = models.BigIntegerField(default=0)
+    data_changed_at = models.DateTimeField(default=timezone.now)
+    # Bumped only when participants are added, removed, renamed or change nationality;
+    # facts that depend on who is on the roster (not on scans) are keyed by it
+    roster_version = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-start_date']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.meal_days = max(1, min(self.meal_days, MAX_MEAL_DAYS))
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The version columns only move through versioning.bump(); never write back a stale copy
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ('data_version', 'data_changed_at', 'roster_version')
+            ]
+        super().save(*args, **kwargs)
+        # Only one active event at a time
+        if self.is_active:
+            Event.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False)
+
+    @property
+    def meal_labels(self):
+        dates = [self.start_date + timedelta(days=i) for i in range(self.meal_days)]
+        return [f"{d:%b} {d.day}" for d in dates]
+
+    @property
+    def meal_schedule(self):
+        return [
+            {'day': day, 'date': label, 'breakfast': f'breakfast_day{day}', 'lunch': f'lunch_day{day}'}
+            for day, label in enumerate(self.meal_labels, start=1)
+        ]
+
+    @property
+    def meal_fields(self):
+        return [f'{m}_day{d}' for d in range(1, self.meal_days + 1) for m in ['breakfast', 'lunch']]
+
+class BitmaskField(models.PositiveIntegerField):
+    """Integer column of flag bits. Filter with __has (all given bits set) or __has_any."""
+
+
+@BitmaskField.register_lookup
+class HasBits(models.Lookup):
+    lookup_name = 'has'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"({lhs} & {rhs}) = {rhs}", [*lhs_params, *rhs_params, *rhs_params]
+
+
+@BitmaskField.register_lookup
+class HasAnyBits(models.Lookup):
+    lookup_name = 'has_any'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"({lhs} & {rhs}) <> 0", [*lhs_params, *rhs_params]
+
 class AdminActionLog(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, null=True, blank=True)
     action = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     
@@ -36,35 +121,155 @@ class AdminActionLog(models.Model):
         return f"{self.user.username} - {self.action} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
     
 class Participant(models.Model):
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='participants')
     full_name = models.CharField(max_length=200, db_index=True)
+    search_name = models.CharField(max_length=200, blank=True, default='', editable=False, db_index=True)  # normalized full_name
     nationality = models.CharField(max_length=100, db_index=True)
-    paid = models.BooleanField(default=False, db_index=True)
-    free_access = models.BooleanField(default=False, db_index=True)
-    is_present = models.BooleanField(default=False, db_index=True)
-
-
-    # MEALS FOR 7 DAYS
-    breakfast_day1 = models.BooleanField(default=False,db_index=True)
-    lunch_day1 = models.BooleanField(default=False,db_index=True)
-    breakfast_day2 = models.BooleanField(default=False,db_index=True)
-    lunch_day2 = models.BooleanField(default=False,db_index=True)
-    breakfast_day3 = models.BooleanField(default=False,db_index=True)
-    lunch_day3 = models.BooleanField(default=False,db_index=True)
-    breakfast_day4 = models.BooleanField(default=False,db_index=True)
-    lunch_day4 = models.BooleanField(default=False,db_index=True)
-    breakfast_day5 = models.BooleanField(default=False,db_index=True)
-    lunch_day5 = models.BooleanField(default=False,db_index=True)
-    breakfast_day6 = models.BooleanField(default=False,db_index=True)
-    lunch_day6 = models.BooleanField(default=False,db_index=True)
-    breakfast_day7 = models.BooleanField(default=False,db_index=True)
-    lunch_day7 = models.BooleanField(default=False,db_index=True)
+    paid = models.BooleanField(default=False)
+    free_access = models.BooleanField(default=False)
+    is_present = models.BooleanField(default=False)
+    import_hash = models.CharField(max_length=32, blank=True, default='')  # sheet row as last imported
+    attended = models.BooleanField(default=False)  # kept in sync by save()
+    first_seen_at = models.DateTimeField(null=True, blank=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    # MEALS FOR 7 DAYS: bit i set when MEAL_FIELDS[i] was served. The breakfast_dayN /
+    # lunch_dayN attributes (added below the class) read and write single bits.
+    meals_served = BitmaskField(default=0)
+
     class Meta:
+        # Every query is scoped to one event, so composite indexes lead with event_id
+        # Booleans get partial indexes holding only the TRUE rows instead of full B-trees
         indexes = [
-            models.Index(fields=['paid', 'free_access']),
-            models.Index(fields=['nationality', 'paid']),
-            models.Index(fields=['is_present']),
+            models.Index(fields=['event', 'full_name', 'nationality']),
+            # Covers the nationality x payment x attendance rollup and the nationality filters
+            models.Index(fields=['event', 'nationality', 'paid', 'free_access', 'attended'], name='participant_rollup_idx'),
+            models.Index(fields=['event'], condition=Q(is_present=True), name='participant_present_idx'),
+            models.Index(fields=['event'], condition=Q(attended=True), name='participant_attended_idx'),
+            models.Index(fields=['event', 'first_seen_at'], condition=Q(first_seen_at__isnull=False),
+                         name='participant_arrivals_idx'),
         ]
     created_at = models.DateTimeField(default=timezone.now)  # ← ADD THIS
     
     def __str__(self):
-        return self.full_name
\ No newline at end of file
+        return self.full_name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # As loaded, so the journal can tell which fields a save() changed
+        instance._journal_state = instance.journal_values()
+        return instance
+
+    def journal_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field: getattr(self, field) for field in JOURNAL_FIELDS
+            if ('meals_served' if field in MEAL_BITS else field) not in deferred
+        }
+
+    def meal_served(self, meal):
+        return bool(self.meals_served & MEAL_BITS[meal])
+
+    def set_meal(self, meal, served):
+        if served:
+            self.meals_served |= MEAL_BITS[meal]
+        else:
+            self.meals_served &= ALL_MEALS ^ MEAL_BITS[meal]
+
+    @property
+    def served_meals(self):
+        return [meal for meal in MEAL_FIELDS if self.meals_served & MEAL_BITS[meal]]
+
+    @property
+    def has_meals(self):
+        return self.meals_served != 0
+
+    def refresh_attendance(self):
+        # Denormalized "present" used by the dashboards: checked in OR any meal served
+        self.attended = self.is_present or self.has_meals
+
+    def mark_seen(self, when=None):
+        """Record a check-in or meal service happening now."""
+        when = when or timezone.now()
+        if self.first_seen_at is None:
+            self.first_seen_at = when
+        self.last_seen_at = when
+
+    def save(self, *args, **kwargs):
+        self.refresh_attendance()
+        self.search_name = normalize(self.full_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'attended', 'search_name'}
+        super().save(*args, **kwargs)
+
+
+def _meal_flag(meal):
+    return property(
+        lambda self: self.meal_served(meal),
+        lambda self, served: self.set_meal(meal, served),
+        doc=f"Whether {meal} was served (one bit of meals_served).",
+    )
+
+
+# p.lunch_day2, setattr(p, 'lunch_day2', True) and Participant(lunch_day2=True) keep working
+for _meal in MEAL_FIELDS:
+    setattr(Participant, _meal, _meal_flag(_meal))
+
+class ParticipantChange(models.Model):
+    """Append-only journal of participant writes; the id is the change feed's cursor."""
+    OP_CHOICES = (
+        ('create', 'Created'),
+        ('update', 'Updated'),
+        ('delete', 'Deleted'),
+        ('reset', 'Reset'),  # feed restarts here (database restore); participant_id is 0
+    )
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='+')
+    participant_id = models.BigIntegerField()  # no FK: entries outlive deleted participants
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    fields = models.JSONField(default=dict, encoder=DjangoJSONEncoder)  # changed field -> new value
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['event', 'id'])]
+
+    def __str__(self):
+        return f"#{self.id} {self.op} participant {self.participant_id}"
+
+class ImportJob(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    )
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    checksum = models.CharField(max_length=64, blank=True, default='', db_index=True)  # sha256 of the file
+    update_existing = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    cancel_requested = models.BooleanField(default=False)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    missing = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Event data_version once the job had written everything; the same file is only
+    # "already imported" while the event's data is still at this version
+    data_version = models.BigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
@@ -0,0 +1,232 @@
+import cProfile
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Opt-in request profiler (PROFILING_ENABLED). A sampled fraction of requests runs
+# under cProfile; every other request is watched by a low-rate stack sampler and
+# its collapsed stacks are kept when it turns out slower than PROFILING_SLOW_MS.
+# Each profile is stored next to a JSON summary with DB / template / external time.
+
+ENABLED = getattr(settings, 'PROFILING_ENABLED', False)
+SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.01)
+SLOW_MS = getattr(settings, 'PROFILING_SLOW_MS', 2000)
+SAMPLE_INTERVAL = getattr(settings, 'PROFILING_SAMPLE_INTERVAL_MS', 10) / 1000
+PROFILE_DIR = getattr(settings, 'PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'congress_checkin_profiles'))
+KEEP = getattr(settings, 'PROFILING_KEEP', 200)
+
+_timings = ContextVar('profiling_timings', default=None)
+
+
+@contextmanager
+def timed(category):
+    """Add the block's wall time to the current request's `category` bucket (no-op outside one)."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[category] += (time.perf_counter() - started) * 1000
+
+
+def _db_timer(execute, sql, params, many, context):
+    timings = _timings.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings['db'] += (time.perf_counter() - started) * 1000
+            timings['db_queries'] += 1
+
+
+def _patch_templates():
+    # Backend-level render: one call per render()/TemplateResponse, includes are inside it
+    from django.template.backends.django import Template
+
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return original(self, context, request)
+
+    Template.render = render
+
+
+class StackSampler:
+    """Daemon thread collecting collapsed stacks of the threads serving requests."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.watched = {}  # thread id -> Counter of collapsed stacks
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='request-stack-sampler', daemon=True)
+            self.thread.start()
+
+    def watch(self, thread_id):
+        with self.lock:
+            self.watched[thread_id] = Counter()
+
+    def release(self, thread_id):
+        with self.lock:
+            return self.watched.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.watched:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self.watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+def profile_dir():
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return PROFILE_DIR
+
+
+def _save(summary, profiler=None, stacks=None):
+    directory = profile_dir()
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{summary['url_name'] or 'unresolved'}-{uuid.uuid4().hex[:6]}"
+    if profiler is not None:
+        summary['file'] = f"{name}.prof"
+        profiler.dump_stats(os.path.join(directory, summary['file']))
+    else:
+        summary['file'] = f"{name}.folded"
+        with open(os.path.join(directory, summary['file']), 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, f"{name}.json"), 'w') as f:
+        json.dump(summary, f)
+    _prune(directory)
+
+
+def _prune(directory):
+    summaries = sorted(f for f in os.listdir(directory) if f.endswith('.json'))
+    for old in summaries[:-KEEP] if len(summaries) > KEEP else []:
+        stem = old[:-len('.json')]
+        for suffix in ('.json', '.prof', '.folded'):
+            try:
+                os.remove(os.path.join(directory, stem + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Stored profile summaries, newest first."""
+    directory = profile_dir()
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being written or pruned by another worker
+    return profiles
+
+
+def profile_path(file_name):
+    """Absolute path of a stored profile, or None for anything that isn't one."""
+    if os.path.basename(file_name) != file_name or not file_name.endswith(('.prof', '.folded')):
+        return None
+    path = os.path.join(profile_dir(), file_name)
+    return path if os.path.exists(path) else None
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = StackSampler(SAMPLE_INTERVAL)
+        self.sampler.start()
+        _patch_templates()
+
+    def __call__(self, request):
+        timings = Counter()
+        token = _timings.set(timings)
+        sampled = random.random() < SAMPLE_RATE
+        profiler = cProfile.Profile() if sampled else None
+        thread_id = threading.get_ident()
+        if profiler is None:
+            self.sampler.watch(thread_id)
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_db_timer))
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError:
+                        # Another profiler owns this thread (a debugger, an outer cProfile run);
+                        # leave it alone and watch this request like an unsampled one
+                        profiler, sampled = None, False
+                        self.sampler.watch(thread_id)
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stacks = self.sampler.release(thread_id) if profiler is None else None
+            _timings.reset(token)
+
+        slow = elapsed_ms >= SLOW_MS
+        if sampled or (slow and stacks):
+            match = getattr(request, 'resolver_match', None)
+            summary = {
+                'created_at': time.time(),
+                'reason': 'slow' if slow else 'sampled',
+                'kind': 'cprofile' if profiler is not None else 'stacks',
+                'method': request.method,
+                'path': request.path,
+                'url_name': match.url_name if match else '',
+                'status': response.status_code,
+                'total_ms': round(elapsed_ms, 1),
+                'db_ms': round(timings['db'], 1),
+                'db_queries': timings['db_queries'],
+                'template_ms': round(timings['template'], 1),
+                'external_ms': round(timings['external'], 1),
+                'pid': os.getpid(),
+            }
+            try:
+                _save(summary, profiler, stacks)
+            except OSError:
+                pass  # profiling must never break a request
+        return response
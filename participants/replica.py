@@ -0,0 +1,76 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+# Read-heavy views can be served from a read replica (REPLICA_DATABASE_URL).
+# A client that has just written something reads from the primary for a few
+# seconds, so it always sees its own changes despite replication lag.
+
+REPLICA = 'replica'
+STICKY_COOKIE = 'primary_until'
+STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Reads go to the replica only inside a replica_reads view; writes always go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        return REPLICA if _use_replica.get() else 'default'
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance loaded from the replica still writes to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # both aliases hold the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema by replication from the primary
+        return db == 'default'
+
+
+def _recently_wrote(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def replica_reads(view):
+    """Run the view's queries against the replica unless the client is sticky to the primary."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_configured() or _recently_wrote(request):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """After any write request, pin the client to the primary for STICKY_SECONDS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                STICKY_COOKIE, f"{time.time() + STICKY_SECONDS:.3f}",
+                max_age=STICKY_SECONDS, httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
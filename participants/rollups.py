@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import versioning
+from .models import MEAL_BITS, Participant
+
+DIMENSIONS = ['nationality', 'payment', 'attended']
+CACHE_TIMEOUT = 60 * 60
+
+
+def _payment(paid, free_access):
+    if free_access:
+        return 'free'
+    return 'paid' if paid else 'unpaid'
+
+
+def headline_counts(event):
+    """Headline counts and per-meal totals of an event, all in one aggregate query."""
+    counts = {
+        'total': Count('id'),
+        'paid': Count('id', filter=Q(paid=True)),
+        'free': Count('id', filter=Q(free_access=True)),
+        'unpaid': Count('id', filter=Q(paid=False, free_access=False)),
+        # PRESENCE = is_present=True OR any meal served (kept denormalized in `attended`)
+        'present': Count('id', filter=Q(attended=True)),
+    }
+    for field in event.meal_fields:
+        counts[field] = Count('id', filter=Q(meals_served__has=MEAL_BITS[field]))
+    # Aliases may not shadow model fields ('paid', meal columns), so prefix them for the query
+    result = Participant.objects.filter(event=event).aggregate(**{f'n_{k}': v for k, v in counts.items()})
+    return {k[2:]: v for k, v in result.items()}
+
+
+def cache_key(event_id, version):
+    return f'rollup:{event_id}:{version}'
+
+
+def cube(event):
+    """Nationality x payment x attendance counts for the event, cached per data version."""
+    version, _ = versioning.current(event.id)
+    key = cache_key(event.id, version)
+    cells = cache.get(key)
+    if cells is None:
+        rows = (
+            Participant.objects.filter(event=event)
+            .values('nationality', 'paid', 'free_access', 'attended')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        cells = [
+            {
+                'nationality': row['nationality'],
+                'payment': _payment(row['paid'], row['free_access']),
+                'attended': row['attended'],
+                'count': row['n'],
+            }
+            for row in rows
+        ]
+        cache.set(key, cells, CACHE_TIMEOUT)
+    return version, cells
+
+
+def drill(cells, filters=None, group_by=None):
+    """Filter cube cells and roll them up to the requested dimensions."""
+    filters = filters or {}
+    group_by = group_by or DIMENSIONS
+    totals = {}
+    for cell in cells:
+        if any(cell[dim] != value for dim, value in filters.items()):
+            continue
+        key = tuple(cell[dim] for dim in group_by)
+        totals[key] = totals.get(key, 0) + cell['count']
+    rows = [dict(zip(group_by, key), count=n) for key, n in totals.items()]
+    rows.sort(key=lambda row: -row['count'])
+    return rows
@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; rebuilds just aren't serialized there
+    fcntl = None
+
+# Exact-match scan index shared by every worker on the host. One file per event:
+#
+#   header | key hashes (uint64, sorted) | participant ids (uint64)
+#
+# where the key hash is the first 8 bytes of blake2b("Name|Country"). Workers mmap
+# the file read-only, so the roster lives once in the page cache rather than in each
+# worker's heap. A rebuild writes a new file and os.replace()s it in; readers notice
+# the new inode on their next lookup and remap.
+#
+# The header carries the event's roster_version at build time. That version only moves
+# when a key can change (participants added, removed, renamed or moved to another
+# nationality), so check-ins and meal service leave the index fresh. The view still fetches
+# the row it renders, but by primary key rather than by searching names, and it
+# re-checks the QR parts on that row. A stale index can therefore only cost a fallback
+# to the name lookup, never a wrong participant. The most useful answer is the fresh
+# miss: an unknown QR code is turned away without touching the database. Rebuilds
+# run in a background thread; until one lands, lookups report no index and the view
+# uses the ORM.
+
+logger = logging.getLogger(__name__)
+
+REBUILD_INTERVAL = getattr(settings, 'SCAN_INDEX_REBUILD_INTERVAL', 30)  # seconds a stale index is used for
+
+MAGIC = b'SIX3'
+HEADER = struct.Struct('<4sqqddI4x')  # magic, event id, roster version, event created, built at, count
+
+_maps = {}  # path -> MappedIndex
+_maps_lock = threading.Lock()
+_pending = set()  # event ids queued for a rebuild in this worker
+_pending_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scan-index')
+
+
+def key_hash(full_name, nationality):
+    key = f"{full_name.strip()}|{nationality.strip()}"
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def index_dir():
+    return getattr(settings, 'SCAN_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'congress_checkin_index'))
+
+
+def index_path(event_id):
+    # Ids are only unique within one database (and get reused after deletes), so the
+    # file name carries the database and the header the event's creation time
+    db = connection.settings_dict
+    fingerprint = hashlib.md5(f"{db['ENGINE']}|{db['HOST']}|{db['NAME']}".encode()).hexdigest()[:8]
+    return os.path.join(index_dir(), f"{fingerprint}-event-{event_id}.idx")
+
+
+def build(event):
+    """Write a fresh index file for the event and swap it in atomically."""
+    from .models import Event, Participant
+
+    directory = index_dir()
+    os.makedirs(directory, exist_ok=True)
+    version = Event.objects.values_list('roster_version', flat=True).get(pk=event.id)
+    rows = {}
+    for pid, full_name, nationality in (
+        Participant.objects.filter(event=event).order_by('id')
+        .values_list('id', 'full_name', 'nationality')
+        .iterator(chunk_size=5000)
+    ):
+        # Duplicate registrations: the first one wins, like the ORM fallback
+        rows.setdefault(key_hash(full_name, nationality), pid)
+    hashes = sorted(rows)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f"event-{event.id}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, event.id, version, event.created_at.timestamp(), time.time(), len(hashes)))
+            f.write(struct.pack(f'<{len(hashes)}Q', *hashes))
+            f.write(struct.pack(f'<{len(hashes)}Q', *(rows[h] for h in hashes)))
+        os.replace(tmp, index_path(event.id))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(hashes)
+
+
+class MappedIndex:
+    """Read-only view of one index file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.event_id, self.version, self.created, self.built_at, self.count = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a scan index")
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.hashes = view[start:start + 8 * self.count].cast('Q')
+        self.ids = view[start + 8 * self.count:start + 16 * self.count].cast('Q')
+
+    def find(self, hashed):
+        i = bisect_left(self.hashes, hashed)
+        if i < self.count and self.hashes[i] == hashed:
+            return self.ids[i]
+        return None
+
+
+def _mapped(event):
+    path = index_path(event.id)
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    with _maps_lock:
+        current = _maps.get(path)
+        if current is None or current.inode != inode:
+            try:
+                fresh = MappedIndex(path)
+            except (OSError, ValueError):
+                return None
+            # The old map is unmapped once the last lookup still holding it lets go
+            _maps[path] = current = fresh
+    if current.created != event.created_at.timestamp():
+        return None  # left over from a deleted event that had the same id
+    return current
+
+
+def _rebuild(event):
+    close_old_connections()
+    try:
+        # One worker per host rebuilds; the others keep using what they have (or the ORM)
+        os.makedirs(index_dir(), exist_ok=True)
+        with open(index_path(event.id) + '.lock', 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            build(event)
+    except Exception:
+        logger.exception("Scan index rebuild for event %s failed", event.id)
+    finally:
+        with _pending_lock:
+            _pending.discard(event.id)
+        close_old_connections()
+
+
+def schedule_rebuild(event):
+    with _pending_lock:
+        if event.id in _pending:
+            return
+        _pending.add(event.id)
+    _executor.submit(_rebuild, event)
+
+
+def lookup(event, full_name, nationality):
+    """(participant id or None, fresh) for a scanned Name|Country; None without an index.
+
+    `fresh` means the index was built at the event's current roster version, so a miss
+    is final. Misses in a stale index have to be confirmed against the database.
+    """
+    if not getattr(settings, 'SCAN_INDEX_ENABLED', True):
+        return None
+    index = _mapped(event)
+    stale = index is None or index.version != event.roster_version
+    if stale and (index is None or time.time() - index.built_at > REBUILD_INTERVAL):
+        schedule_rebuild(event)
+    if index is None:
+        return None
+    return index.find(key_hash(full_name, nationality)), not stale
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import fuzzy, journal, versioning
+from .models import Event, Participant
+
+
+@receiver(post_save, sender=Participant)
+def refresh_fuzzy_index(sender, instance, **kwargs):
+    # Keep this worker's fuzzy index current without a full rebuild
+    fuzzy.upsert(instance.event_id, instance.id, instance.full_name, instance.nationality)
+
+
+@receiver(post_save, sender=Participant)
+def bump_data_version(sender, instance, created, **kwargs):
+    # Runs before the journal receiver, so _journal_state still holds the row as loaded
+    before = getattr(instance, '_journal_state', None)
+    roster = created or before is None or any(
+        before.get(field) != getattr(instance, field) for field in ('full_name', 'nationality')
+    )
+    versioning.bump(instance.event_id, roster=roster)
+
+
+@receiver(post_save, sender=Participant)
+def journal_participant_save(sender, instance, created, **kwargs):
+    journal.record_save(instance, created)
+
+
+# Event names and meal days show up on every page (switcher, meal columns), whichever
+# event the page is about
+@receiver(post_save, sender=Event)
+def bump_event_version(sender, instance, **kwargs):
+    versioning.bump_all()
+
+
+@receiver(post_delete, sender=Event)
+def bump_after_event_delete(sender, instance, **kwargs):
+    versioning.bump_all(roster=True)
@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from django.core.cache import cache
+
+from .models import MEAL_FIELDS, Participant
+
+FIELDS = ['id', 'key', 'payment', 'present', 'meals']
+PAYMENT_CODES = {'unpaid': 0, 'paid': 1, 'free': 2}
+CACHE_TIMEOUT = 60 * 60
+
+
+def lookup_key(full_name, nationality):
+    """Same key scan_qr resolves: the two QR parts, stripped, joined by '|'."""
+    return f"{full_name.strip()}|{nationality.strip()}"
+
+
+def roster_etag(event_id, version):
+    return f'"roster-{event_id}-{version}"'
+
+
+def cache_key(event_id, version):
+    return f'roster-snapshot:{event_id}:{version}'
+
+
+def compressed_roster(event, version):
+    """Gzipped JSON roster of the event, built once per data version."""
+    key = cache_key(event.id, version)
+    body = cache.get(key)
+    if body is None:
+        rows = []
+        # meals_served already is the bitmap the stations decode
+        for pid, full_name, nationality, paid, free_access, is_present, meals in (
+            Participant.objects.filter(event=event)
+            .order_by('id')
+            .values_list('id', 'full_name', 'nationality', 'paid', 'free_access', 'is_present', 'meals_served')
+            .iterator(chunk_size=5000)
+        ):
+            payment = PAYMENT_CODES['free'] if free_access else PAYMENT_CODES['paid'] if paid else PAYMENT_CODES['unpaid']
+            rows.append([pid, lookup_key(full_name, nationality), payment, int(is_present), meals])
+        payload = {
+            'event': event.id,
+            'version': version,
+            'fields': FIELDS,
+            'meal_fields': MEAL_FIELDS,
+            'rows': rows,
+        }
+        body = gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), compresslevel=6)
+        cache.set(key, body, CACHE_TIMEOUT)
+    return body
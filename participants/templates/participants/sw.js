@@ -0,0 +1,54 @@
+// Check-in station service worker (served at /sw.js so its scope is the whole site).
+// - Static files: cache-first. Their URLs are fingerprinted, so a cached copy never goes stale.
+// - Page navigations: always from the server. When the network fails, the precached
+//   offline page is shown instead of the browser's error. Pages themselves are never
+//   cached: they carry forms whose CSRF token would be stale by the time a copy is shown.
+// - Everything else (forms, toggles, APIs) always goes to the server.
+const VERSION = '{{ version }}';
+const STATIC_CACHE = 'static-' + VERSION;
+const PRECACHE = {{ precache|safe }};
+const OFFLINE_URL = '{{ offline_url }}';
+const STATIC_PREFIX = '{{ static_prefix }}';
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(cache => cache.addAll([...PRECACHE, OFFLINE_URL]))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key !== STATIC_CACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+function cacheFirst(request) {
+    return caches.match(request).then(cached => cached || fetch(request).then(response => {
+        if (response.ok) {
+            const copy = response.clone();
+            caches.open(STATIC_CACHE).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    // Only same-origin GETs are answered here; cross-origin responses are opaque and can't be checked
+    if (request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+    if (url.pathname.startsWith(STATIC_PREFIX)) {
+        event.respondWith(cacheFirst(request));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(fetch(request).catch(() => caches.match(OFFLINE_URL)));
+    }
+});
@@ -1,8 +1,10 @@
 from django import template
 
+from participants.models import MEAL_BITS
+
 register = template.Library()
 
 @register.filter
 def get_meal_field(participant, field_name):
     """Get meal field value dynamically (e.g., 'breakfast_day1')"""
-    return getattr(participant, field_name, False)
\ No newline at end of file
+    return field_name in MEAL_BITS and participant.meal_served(field_name)
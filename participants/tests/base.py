@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import fuzzy
+from ..events import SESSION_KEY
+from ..models import CustomUser, Event, Participant
+
+NATIONALITIES = ['Tunisia', 'Egypt', 'Morocco', 'Jordan', 'Algeria']
+
+TEST_SETTINGS = dict(
+    SECURE_SSL_REDIRECT=False,
+    SCAN_INDEX_ENABLED=False,  # rebuilds run in a background thread; tests build it explicitly
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'metrics': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'metrics'},
+    },
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+)
+
+
+@override_settings(**TEST_SETTINGS)
+class RosterTestCase(TestCase):
+    def setUp(self):
+        # Cache keys and in-memory indexes carry event ids, which the rolled-back tests reuse
+        cache.clear()
+        fuzzy._indexes.clear()
+        self.user = CustomUser.objects.create(username='admin', role='super_admin', is_staff=True)
+        self.client.force_login(self.user)
+
+    def make_roster(self, size):
+        """New active event with `size` participants in mixed payment/meal states."""
+        event = Event.objects.create(
+            name=f"Congress {size}", start_date=date(2025, 11, 3), meal_days=5, is_active=True,
+        )
+        Participant.objects.bulk_create([
+            Participant(
+                event=event,
+                full_name=f"Participant {i:04d}",
+                search_name=f"participant {i:04d}",  # bulk_create skips save()
+                nationality=NATIONALITIES[i % len(NATIONALITIES)],
+                paid=i % 3 == 0,
+                free_access=i % 3 == 1,
+                is_present=i % 2 == 0,
+                attended=i % 2 == 0,
+                breakfast_day1=i % 4 == 0,
+            )
+            for i in range(size)
+        ])
+        session = self.client.session
+        session[SESSION_KEY] = event.id
+        session.save()
+        return event, Participant.objects.filter(event=event).order_by('id').first()
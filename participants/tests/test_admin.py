@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Participant, ParticipantChange
+from .base import RosterTestCase
+
+CHANGELIST = 'admin:participants_participant_changelist'
+
+
+class ParticipantAdminTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, self.participant = self.make_roster(30)
+
+    def results(self, **params):
+        response = self.client.get(reverse(CHANGELIST), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_search_matches_any_part_of_the_name(self):
+        Participant.objects.create(event=self.event, full_name="Zoë Ben-Amor", nationality='Tunisia')
+        for term in ('Zoë', 'zoe', 'ben amor', 'AMOR', 'amor zoe'):
+            cl = self.results(q=term)
+            self.assertEqual([p.full_name for p in cl.result_list], ["Zoë Ben-Amor"], term)
+        # Words match on their own: 0001 and 0010-0019
+        self.assertEqual(self.results(q='cipant 001').result_count, 11)
+        self.assertEqual(self.results(q='nobody').result_count, 0)
+
+    def test_blank_search_lists_everyone(self):
+        self.assertEqual(self.results(q='  ').result_count, 30)
+
+    def test_count_survives_scans(self):
+        self.results(paid__exact=1)
+        self.participant.is_present = not self.participant.is_present
+        self.participant.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.results(paid__exact=1)
+        self.assertFalse([q for q in queries if 'COUNT(*)' in q['sql'].upper()], "count was not reused")
+
+    def test_count_follows_roster_changes(self):
+        self.assertEqual(self.results(q='participant').result_count, 30)
+        Participant.objects.create(event=self.event, full_name="Participant New", nationality='Egypt')
+        self.assertEqual(self.results(q='participant').result_count, 31)
+        self.client.post(reverse('delete_participant', args=[self.participant.pk]))
+        self.assertEqual(self.results(q='participant').result_count, 30)
+
+    def test_nationality_facet_follows_edits(self):
+        def choices():
+            response = self.client.get(reverse(CHANGELIST))
+            spec = next(f for f in response.context['cl'].filter_specs if getattr(f, 'parameter_name', None) == 'nationality')
+            return {value for value, _ in spec.lookup_choices}
+
+        self.assertEqual(choices(), {'Tunisia', 'Egypt', 'Morocco', 'Jordan', 'Algeria'})
+        self.participant.paid = not self.participant.paid
+        self.participant.save()
+        self.assertEqual(choices(), {'Tunisia', 'Egypt', 'Morocco', 'Jordan', 'Algeria'})
+        self.participant.nationality = 'Libya'
+        self.participant.save()
+        self.assertIn('Libya', choices())
+
+    def test_delete_is_journaled(self):
+        url = reverse('admin:participants_participant_delete', args=[self.participant.pk])
+        self.client.post(url, {'post': 'yes'})
+        self.assertFalse(Participant.objects.filter(pk=self.participant.pk).exists())
+        self.assertTrue(ParticipantChange.objects.filter(participant_id=self.participant.pk, op='delete').exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.roster_version, 1)
@@ -0,0 +1,47 @@
+import json
+import re
+
+from django.contrib.staticfiles import finders
+from django.core import checks
+from django.urls import reverse
+
+from .base import RosterTestCase
+
+STATIC_URL = re.compile(r'''(?:src|href)="/static/([^"]+)"''')
+
+
+class StaticAssetTests(RosterTestCase):
+    def test_pages_only_reference_existing_static_files(self):
+        event, participant = self.make_roster(3)
+        pages = [reverse('checkin'), reverse('dashboard'), reverse('participant_detail', args=[participant.id])]
+        for url in pages:
+            html = self.client.get(url).content.decode()
+            for path in STATIC_URL.findall(html):
+                self.assertIsNotNone(finders.find(path), f"{url} links missing /static/{path}")
+        self.client.logout()
+        html = self.client.get(reverse('login')).content.decode()
+        self.assertEqual([path for path in STATIC_URL.findall(html) if finders.find(path) is None], [])
+
+    def test_no_asset_warnings(self):
+        self.assertEqual([m.id for m in checks.run_checks() if m.id and m.id.startswith('participants.')], [])
+
+
+class ServiceWorkerTests(RosterTestCase):
+    def test_caches_static_files_and_the_offline_page_only(self):
+        response = self.client.get(reverse('service_worker'))
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertEqual(response['Service-Worker-Allowed'], '/')
+        body = response.content.decode()
+        precache = json.loads(re.search(r'const PRECACHE = (\[.*\]);', body).group(1))
+        for url in precache:
+            self.assertTrue(url.startswith('/static/'), url)
+            self.assertIsNotNone(finders.find(url[len('/static/'):]), url)
+        self.assertIn(f"const OFFLINE_URL = '{reverse('offline')}';", body)
+        self.assertNotIn('PAGES_CACHE', body)
+
+    def test_offline_page(self):
+        self.client.logout()
+        response = self.client.get(reverse('offline'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'<form', response.content)
+        self.assertNotIn(b'csrfmiddlewaretoken', response.content)
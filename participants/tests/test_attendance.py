@@ -0,0 +1,61 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.urls import reverse
+
+from ..models import Participant
+from .base import RosterTestCase
+
+
+class AttendanceTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        self.p = Participant.objects.create(event=self.event, full_name='Amira Haddad', nationality='Tunisia')
+
+    def test_attended_follows_presence_and_meals(self):
+        self.assertFalse(self.p.attended)
+        self.p.set_meal('lunch_day1', True)
+        self.p.save(update_fields=['meals_served'])  # attended is written along
+        self.assertTrue(Participant.objects.get(pk=self.p.pk).attended)
+        self.p.is_present = True
+        self.p.set_meal('lunch_day1', False)
+        self.p.save()
+        self.assertTrue(Participant.objects.get(pk=self.p.pk).attended)
+        self.p.is_present = False
+        self.p.save()
+        self.assertFalse(Participant.objects.get(pk=self.p.pk).attended)
+
+    def test_check_in_stamps_first_and_last_seen(self):
+        self.client.post(reverse('toggle_presence', args=[self.p.id]))
+        self.p.refresh_from_db()
+        first = self.p.first_seen_at
+        self.assertIsNotNone(first)
+        self.client.post(reverse('toggle_presence', args=[self.p.id]))  # checked out again
+        self.client.post(reverse('toggle_meal', args=[self.p.id, 'lunch_day1']))
+        self.p.refresh_from_db()
+        self.assertEqual(self.p.first_seen_at, first)
+        self.assertGreater(self.p.last_seen_at, first)
+        # Revoking a meal is not a visit
+        seen = self.p.last_seen_at
+        self.client.post(reverse('toggle_meal', args=[self.p.id, 'lunch_day1']))
+        self.p.refresh_from_db()
+        self.assertEqual((self.p.last_seen_at, self.p.attended), (seen, False))
+
+    def test_dashboard_counts_attended(self):
+        Participant.objects.create(event=self.event, full_name='Omar Zidi', nationality='Egypt', is_present=True)
+        served = Participant(event=self.event, full_name='Sarah Smith', nationality='Jordan')
+        served.set_meal('breakfast_day2', True)
+        served.save()
+        stats = self.client.get(reverse('dashboard_stats')).json()
+        self.assertEqual((stats['total'], stats['present']), (3, 2))
+        self.assertEqual(stats['meal_days'], [0, 1, 0, 0, 0])
+
+    def test_arrival_curve(self):
+        for i, minute in enumerate((3, 14, 16)):
+            Participant.objects.create(
+                event=self.event, full_name=f"Early {i}", nationality='Oman',
+                first_seen_at=datetime(2025, 11, 3, 9, minute, 30, tzinfo=dt_timezone.utc),
+            )
+        data = self.client.get(reverse('arrivals_api')).json()
+        self.assertEqual(data['counts'], [2, 1])
+        self.assertEqual([label[11:16] for label in data['labels']], ['09:00', '09:15'])
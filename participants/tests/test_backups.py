@@ -0,0 +1,102 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+
+from .. import backups, rollups
+from ..models import Participant, ParticipantChange
+from .base import RosterTestCase
+
+
+class BackupTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        # The test database lives in memory; snapshot a file database of the same shape
+        self.db = os.path.join(self.dir, 'event.sqlite3')
+        with sqlite3.connect(self.db) as db:
+            db.execute('CREATE TABLE roster (name TEXT)')
+            db.executemany('INSERT INTO roster VALUES (?)', [('A',), ('B',)])
+        patcher = mock.patch.object(backups, '_database', return_value=('sqlite', {'NAME': self.db}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rows(self):
+        with sqlite3.connect(self.db) as db:
+            return [name for name, in db.execute('SELECT name FROM roster ORDER BY name')]
+
+    def test_round_trip(self):
+        event, _ = self.make_roster(1)
+        path = backups.snapshot(self.dir)
+        self.assertEqual(backups.list_snapshots(self.dir), [path])
+        with sqlite3.connect(self.db) as db:
+            db.execute("DELETE FROM roster WHERE name = 'A'")
+            db.execute("INSERT INTO roster VALUES ('C')")
+        version = event.data_version
+
+        backups.restore(path)
+        self.assertEqual(self.rows(), ['A', 'B'])
+        event.refresh_from_db()
+        self.assertGreater(event.data_version, version)
+
+    def test_restore_keeps_unrelated_cache_entries(self):
+        event, _ = self.make_roster(2)
+        event.refresh_from_db()
+        path = backups.snapshot(self.dir)
+        version, _ = rollups.cube(event)
+        cache.set('kiosk:banner', 'Welcome')
+        changed_at = event.data_changed_at
+
+        backups.restore(path)
+        self.assertIsNone(cache.get(rollups.cache_key(event.id, version)))
+        self.assertEqual(cache.get('kiosk:banner'), 'Welcome')
+        event.refresh_from_db()
+        self.assertGreater(event.data_changed_at, changed_at)
+
+    def test_refuses_other_files(self):
+        with self.assertRaises(backups.BackupError):
+            backups.restore(os.path.join(self.dir, 'dump.pgdump'))
+        corrupt = os.path.join(self.dir, 'event-bad.sqlite3.gz')
+        with gzip.open(corrupt, 'wb') as f:
+            f.write(b'not a database' * 100)
+        with self.assertRaises(backups.BackupError):
+            backups.restore(corrupt)
+        self.assertEqual(self.rows(), ['A', 'B'])
+
+    def test_change_feed_cursor_survives_restore(self):
+        event, _ = self.make_roster(2)
+        kept = Participant.objects.create(event=event, full_name='Amira Haddad', nationality='Tunisia')
+        path = backups.snapshot(self.dir)
+        snapshot_seq = ParticipantChange.objects.order_by('-id').values_list('id', flat=True)[0]
+        lost = Participant.objects.create(event=event, full_name='After Snapshot', nationality='Oman')
+        cursor = self.client.get(reverse('participant_changes'), {'since': 0}).json()['next']
+
+        def rolled_back(db, snapshot):
+            # What restoring the real database does to the journal: later rows and the
+            # id sequence go back to snapshot time
+            Participant.objects.filter(pk=lost.pk).delete()
+            ParticipantChange.objects.filter(id__gt=snapshot_seq).delete()
+            with connection.cursor() as c:
+                c.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s",
+                          [snapshot_seq, ParticipantChange._meta.db_table])
+
+        with mock.patch.dict(backups._RESTORERS, {'sqlite': rolled_back}):
+            backups.restore(path)
+        kept.paid = True
+        kept.save()
+
+        changes = self.client.get(reverse('participant_changes'), {'since': cursor}).json()['changes']
+        self.assertGreater(changes[0]['seq'], cursor)
+        self.assertEqual(changes[0]['op'], 'reset')
+        roster = {c['participant'] for c in changes if c['op'] == 'create'}
+        self.assertEqual(roster, set(Participant.objects.filter(event=event).values_list('id', flat=True)))
+        self.assertNotIn(lost.pk, roster)
+        self.assertEqual((changes[-1]['participant'], changes[-1]['op'], changes[-1]['fields']),
+                         (kept.pk, 'update', {'paid': True}))
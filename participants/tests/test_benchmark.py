@@ -0,0 +1,43 @@
+import io
+import re
+import tempfile
+
+from django.core.management import call_command
+
+from ..models import Event, Participant, ParticipantChange
+from .base import RosterTestCase
+
+LABELS = ['toggle save', 'headline counts', 'rollup group by', 'arrivals per minute', 'present count',
+          'scan lookup (ORM)', 'scan lookup (mmap index)']
+
+
+class BenchmarkCommandTests(RosterTestCase):
+    def benchmark(self, **options):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, self.settings(SCAN_INDEX_DIR=directory):
+            call_command('benchmark_roster', stdout=out, **options)
+        return out.getvalue()
+
+    def test_reports_every_measurement_and_cleans_up(self):
+        output = self.benchmark(size=40, writes=6, reads=3)
+        self.assertIn("40 participants", output)
+        for label in LABELS:
+            self.assertRegex(output, rf"{re.escape(label)}.*p50 +[\d.]+ ms +p95 +[\d.]+ ms", label)
+        self.assertIn("(n=6)", output)
+        self.assertIn("(n=3)", output)
+        self.assertIn("scan index built", output)
+        self.assertFalse(Event.objects.filter(name="Index benchmark").exists())
+        self.assertFalse(Participant.objects.exists())
+        self.assertFalse(ParticipantChange.objects.exists())
+
+    def test_leaves_other_events_alone(self):
+        event, _ = self.make_roster(5)
+        self.benchmark(size=10, writes=2, reads=1)
+        self.assertFalse(Event.objects.filter(name="Index benchmark").exists())
+        self.assertEqual(Participant.objects.count(), 5)
+        self.assertEqual(Participant.objects.filter(event=event).count(), 5)
+
+    def test_cleans_up_after_a_failure(self):
+        with self.assertRaises(TypeError):
+            self.benchmark(size=10, writes=2, reads='x')
+        self.assertFalse(Event.objects.filter(name="Index benchmark").exists())
@@ -0,0 +1,105 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import bulk
+from ..models import MEAL_BITS, Participant, ParticipantChange
+from .base import RosterTestCase
+
+
+class BulkUpdateTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(20)
+
+    def rows(self, **filters):
+        return Participant.objects.filter(event=self.event, **filters)
+
+    def apply(self, changes, ids=None, **filters):
+        return bulk.apply(self.event, changes, ids, filters)
+
+    def test_set_state(self):
+        matched, changed = self.apply({'is_present': True, 'lunch_day2': True}, present=False)
+        self.assertEqual((matched, changed), (10, {'is_present': 10, 'lunch_day2': 10}))
+        self.assertEqual(self.rows(is_present=True, attended=True).count(), 20)
+        self.assertEqual(self.rows(last_seen_at__isnull=False).count(), 10)
+
+    def test_unset_state_selected_by_the_same_field(self):
+        # The selection is fixed before the first UPDATE, so the attended resync still
+        # sees the rows that were just checked out
+        self.assertEqual(self.apply({'is_present': False}, present=True), (10, {'is_present': 10}))
+        self.assertEqual(self.rows(is_present=True).count(), 0)
+        # Participants 0, 4, 8, ... had breakfast_day1 served and stay attended
+        self.assertEqual(set(self.rows(attended=True).values_list('meals_served', flat=True)), {MEAL_BITS['breakfast_day1']})
+        self.assertEqual(self.rows(attended=True).count(), 5)
+
+    def test_later_states_see_the_whole_selection(self):
+        matched, changed = self.apply({'is_present': False, 'payment': 'free'}, present=True)
+        self.assertEqual(changed['is_present'], 10)
+        self.assertEqual(self.rows(is_present=False, free_access=True).count(), 10 + 4)  # + already-free absentees
+
+    def test_unserving_last_meal_ends_attendance(self):
+        self.assertEqual(self.apply({'breakfast_day1': False}, present=False, breakfast_day1=True),
+                         (0, {'breakfast_day1': 0}))
+        selection = list(self.rows(meals_served__has=MEAL_BITS['breakfast_day1']).values_list('id', flat=True))
+        self.assertEqual(self.apply({'breakfast_day1': False, 'is_present': False}, breakfast_day1=True),
+                         (5, {'breakfast_day1': 5, 'is_present': 5}))
+        self.assertFalse(self.rows(id__in=selection, attended=True).exists())
+
+    def test_large_selection(self):
+        event, _ = self.make_roster(bulk.BATCH_SIZE * 2 + 7)
+        ids = list(Participant.objects.filter(event=event).values_list('id', flat=True))
+        self.assertEqual(bulk.apply(event, {'lunch_day1': True}, ids),
+                         (len(ids), {'lunch_day1': bulk.BATCH_SIZE * 2 + 7}))
+        self.assertEqual(ParticipantChange.objects.filter(event=event, op='update').count(), bulk.BATCH_SIZE * 2 + 7)
+
+    def test_plain_filter_is_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            matched, changed = self.apply({'lunch_day3': True}, nationality='Egypt')
+        self.assertEqual((matched, changed), (4, {'lunch_day3': 4}))
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "participants_participant"')]
+        self.assertEqual(len(updates), 1, updates)
+        self.assertNotIn(' IN (', updates[0])
+        self.assertEqual(self.rows(nationality='Egypt', meals_served__has=MEAL_BITS['lunch_day3']).count(), 4)
+        self.assertFalse(self.rows(meals_served__has=MEAL_BITS['lunch_day3']).exclude(nationality='Egypt').exists())
+        self.assertEqual(ParticipantChange.objects.filter(event=self.event, op='update').count(), 4)
+
+    def test_unset_through_a_plain_filter_resyncs_attendance(self):
+        self.rows(full_name='Participant 0012').update(is_present=False)
+        matched, changed = self.apply({'breakfast_day1': False}, payment='paid')
+        # Paid: 0, 3, 6, ...; breakfast served: 0, 4, 8, ... -> 0 and 12, of whom 12 is absent
+        self.assertEqual((matched, changed), (7, {'breakfast_day1': 2}))
+        self.assertEqual(self.rows(full_name='Participant 0012', attended=False).count(), 1)
+        self.assertEqual(self.rows(full_name='Participant 0000', attended=True).count(), 1)
+
+    def test_meals_past_the_event_are_refused(self):
+        for changes, filters in (({'lunch_day6': True}, {}), ({'is_present': True}, {'breakfast_day7': True})):
+            with self.assertRaisesMessage(bulk.BulkError, "meal days"):
+                bulk.apply(self.event, changes, filters={'nationality': 'Egypt', **filters})
+        self.assertFalse(ParticipantChange.objects.exists())
+
+    def test_other_events_are_left_alone(self):
+        other, _ = self.make_roster(5)
+        ids = list(Participant.objects.filter(event=other).values_list('id', flat=True))
+        self.assertEqual(self.apply({'is_present': True}, ids), (0, {'is_present': 0}))
+
+
+class BulkUpdateViewTests(RosterTestCase):
+    def post(self, payload):
+        return self.client.post(reverse('bulk_update_participants'), json.dumps(payload),
+                                content_type='application/json')
+
+    def test_update(self):
+        self.make_roster(10)
+        response = self.post({'filter': {'nationality': 'Tunisia'}, 'set': {'lunch_day1': True}})
+        self.assertEqual(response.json(), {'matched': 2, 'changed': {'lunch_day1': 2}})
+
+    def test_refusals(self):
+        self.make_roster(10)
+        self.assertEqual(self.post({'set': {'lunch_day1': True}}).status_code, 400)
+        response = self.post({'filter': {'present': True}, 'set': {'lunch_day9': True}})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown state', response.json()['error'])
+        self.assertEqual(self.post({'ids': ['x'], 'set': {'lunch_day1': True}}).status_code, 400)
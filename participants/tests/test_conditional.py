@@ -0,0 +1,73 @@
+from django.urls import reverse
+
+from ..events import SESSION_KEY
+from ..models import CustomUser
+from .base import RosterTestCase
+
+
+class ConditionalPageTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other, self.elsewhere = self.make_roster(3)
+        self.event, self.participant = self.make_roster(3)  # the current event
+
+    def revalidate(self, url):
+        self.client.get(url)  # the first page sets the CSRF cookie, which is part of the tag
+        etag = self.client.get(url)['ETag']
+        return lambda: self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_tags_follow_the_current_event(self):
+        status = self.revalidate(reverse('dashboard_stats'))
+        self.assertEqual(status(), 304)
+        self.elsewhere.paid = not self.elsewhere.paid
+        self.elsewhere.save()
+        self.assertEqual(status(), 304)
+        self.participant.paid = not self.participant.paid
+        self.participant.save()
+        self.assertEqual(status(), 200)
+
+    def test_detail_follows_the_participants_event(self):
+        status = self.revalidate(reverse('participant_detail', args=[self.participant.id]))
+        self.assertEqual(status(), 304)
+        self.elsewhere.is_present = not self.elsewhere.is_present
+        self.elsewhere.save()
+        self.assertEqual(status(), 304)
+        self.participant.is_present = not self.participant.is_present
+        self.participant.save()
+        self.assertEqual(status(), 200)
+
+    def test_event_changes_retire_every_tag(self):
+        status = self.revalidate(reverse('dashboard_stats'))
+        self.other.name = 'Renamed'  # shows in the event switcher
+        self.other.save()
+        self.assertEqual(status(), 200)
+
+    def test_revalidation_headers(self):
+        response = self.client.get(reverse('participants_list'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+
+    def test_pending_messages_are_shown(self):
+        status = self.revalidate(reverse('participants_list'))
+        # Flashes an error without changing any data
+        self.client.post(reverse('toggle_meal', args=[self.participant.id, 'lunch_day9']))
+        self.assertEqual(status(), 200)
+        self.assertEqual(status(), 304)  # shown once
+
+    def test_scan_visits_always_render(self):
+        url = reverse('participant_detail', args=[self.participant.id])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, {'from_scan': '1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_tags_are_per_user(self):
+        url = reverse('dashboard_stats')
+        etag = self.client.get(url)['ETag']
+        other = CustomUser.objects.create(username='desk', role='checkin_admin', is_staff=True)
+        self.client.force_login(other)
+        session = self.client.session
+        session[SESSION_KEY] = self.event.id
+        session.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,53 @@
+from .. import dedupe
+from ..models import MEAL_BITS, Participant, ParticipantChange
+from .base import RosterTestCase
+
+
+class DedupeTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        make = lambda name, **kw: Participant.objects.create(event=self.event, full_name=name, nationality='Tunisia', **kw)
+        self.first = make('Mohammed Benali', paid=True)
+        self.second = make('Mohamed Ben Ali', is_present=True, meals_served=MEAL_BITS['lunch_day1'])
+        self.other = make('Sarah Smith')
+
+    def test_find_and_merge(self):
+        pairs = dedupe.find_duplicates(self.event, workers=1)
+        self.assertEqual([(keep, dup) for keep, dup, _ in pairs], [(self.first.id, self.second.id)])
+
+        self.assertEqual(dedupe.merge(self.event, [(self.first.id, self.second.id)]), 1)
+        merged = Participant.objects.get(pk=self.first.id)
+        self.assertEqual((merged.paid, merged.is_present, merged.meal_served('lunch_day1')), (True, True, True))
+        self.assertFalse(Participant.objects.filter(pk=self.second.id).exists())
+        self.assertTrue(ParticipantChange.objects.filter(participant_id=self.second.id, op='delete').exists())
+        # Proposals that were already applied are skipped
+        self.assertEqual(dedupe.merge(self.event, [(self.first.id, self.second.id)]), 0)
+
+    def test_swapped_names_share_a_block(self):
+        swapped = Participant.objects.create(event=self.event, full_name='Benali Mohammed', nationality='Tunisia')
+        pairs = {(keep, dup) for keep, dup, _ in dedupe.find_duplicates(self.event, workers=1)}
+        self.assertIn((self.first.id, swapped.id), pairs)
+        self.assertNotIn(self.other.id, {pid for pair in pairs for pid in pair})
+
+    def test_other_nationalities_are_not_paired(self):
+        Participant.objects.create(event=self.event, full_name='Mohammed Benali', nationality='Egypt')
+        pairs = dedupe.find_duplicates(self.event, workers=1)
+        self.assertEqual([(keep, dup) for keep, dup, _ in pairs], [(self.first.id, self.second.id)])
+
+    def test_chains_merge_into_the_oldest(self):
+        third = Participant.objects.create(event=self.event, full_name='Mohamed Benali', nationality='Tunisia')
+        removed = dedupe.merge(self.event, [(self.first.id, self.second.id), (self.second.id, third.id)])
+        self.assertEqual(removed, 2)
+        self.assertEqual(list(Participant.objects.filter(event=self.event).values_list('id', flat=True).order_by('id')),
+                         [self.first.id, self.other.id])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.roster_version, 5)  # four creates, then the merge
+
+    def test_process_pool_matches_in_process_scoring(self):
+        for i in range(6):
+            Participant.objects.create(event=self.event, full_name="Walaa Zemni", nationality=f"Country {i}")
+            Participant.objects.create(event=self.event, full_name="Walaa Zemny", nationality=f"Country {i}")
+        in_process = dedupe.find_duplicates(self.event, workers=1, chunk_blocks=1)
+        self.assertEqual(len(in_process), 7)
+        self.assertEqual(dedupe.find_duplicates(self.event, workers=2, chunk_blocks=1), in_process)
@@ -0,0 +1,61 @@
+from datetime import date
+
+from django.urls import reverse
+
+from ..events import SESSION_KEY
+from ..models import MEAL_BITS, Event, Participant
+from .base import RosterTestCase
+
+
+class CurrentEventTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(name='Congress', start_date=date(2025, 11, 3), meal_days=2, is_active=True)
+        self.other = Event.objects.create(name='Workshop', start_date=date(2025, 12, 1))
+        self.mine = Participant.objects.create(event=self.event, full_name='Amira Haddad', nationality='Tunisia')
+        self.theirs = Participant.objects.create(event=self.other, full_name='Omar Zidi', nationality='Egypt')
+
+    def test_falls_back_to_the_active_event(self):
+        session = self.client.session
+        session[SESSION_KEY] = self.other.id
+        session.save()
+        self.assertEqual(self.client.get(reverse('dashboard')).context['current_event'], self.other)
+        Event.objects.filter(pk=self.other.pk).update(is_archived=True)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['current_event'], self.event)
+
+    def test_switch(self):
+        response = self.client.post(reverse('switch_event'), {'event_id': self.other.id, 'next': reverse('checkin')})
+        self.assertRedirects(response, reverse('checkin'))
+        self.assertEqual(self.client.session[SESSION_KEY], self.other.id)
+        Event.objects.filter(pk=self.event.pk).update(is_archived=True)
+        self.assertEqual(self.client.post(reverse('switch_event'), {'event_id': self.event.id}).status_code, 404)
+
+    def test_no_event_sends_pages_to_the_switcher(self):
+        Event.objects.update(is_archived=True)
+        for name in ('dashboard', 'checkin', 'participants_list'):
+            self.assertRedirects(self.client.get(reverse(name)), reverse('switch_event'))
+        response = self.client.get(reverse('switch_event'))
+        self.assertContains(response, 'Every event is archived')
+        self.assertContains(response, reverse('admin:participants_event_changelist'))
+
+    def test_no_event_answers_apis_with_an_error(self):
+        Event.objects.update(is_archived=True)
+        for name in ('dashboard_stats', 'roster_snapshot', 'rollup_api', 'participant_changes'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 409, name)
+            self.assertIn('error', response.json())
+
+    def test_participants_of_other_events_are_out_of_reach(self):
+        for name in ('toggle_presence', 'toggle_payment', 'mark_present', 'participant_detail'):
+            self.assertEqual(self.client.post(reverse(name, args=[self.theirs.id])).status_code, 404, name)
+        self.assertEqual(
+            self.client.post(reverse('toggle_meal', args=[self.theirs.id, 'lunch_day1'])).status_code, 404)
+        self.theirs.refresh_from_db()
+        self.assertEqual((self.theirs.is_present, self.theirs.paid, self.theirs.meals_served), (False, False, 0))
+
+    def test_meals_past_the_events_last_day_are_refused(self):
+        self.client.post(reverse('toggle_meal', args=[self.mine.id, 'lunch_day2']))
+        response = self.client.post(reverse('toggle_meal', args=[self.mine.id, 'lunch_day5']), follow=True)
+        self.assertContains(response, 'Invalid meal selection.')
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.meals_served, MEAL_BITS['lunch_day2'])
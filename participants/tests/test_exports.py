@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+from unittest import mock, skipIf
+
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from .. import exports
+from ..models import Participant
+from .base import RosterTestCase
+
+
+@skipIf(exports.pa is None, "pyarrow is not installed")
+class SnapshotExportTests(RosterTestCase):
+    def round_trip(self, fmt):
+        event, _ = self.make_roster(25)
+        # Only the last batch has this nationality: the dictionary must still hold it
+        Participant.objects.create(event=event, full_name='Late Arrival', nationality='Oman')
+        sink = io.BytesIO()
+        self.assertEqual(exports.write_snapshot(event, sink, fmt, chunk_size=4), 26)
+        sink.seek(0)
+        if fmt == 'parquet':
+            return event, exports.pq.read_table(sink)
+        return event, exports.pa.ipc.open_file(sink).read_all()
+
+    def assertRoundTrip(self, fmt):
+        event, table = self.round_trip(fmt)
+        rows = table.to_pylist()
+        expected = list(Participant.objects.filter(event=event).order_by('id'))
+        self.assertEqual([row['id'] for row in rows], [p.id for p in expected])
+        self.assertEqual([row['nationality'] for row in rows], [p.nationality for p in expected])
+        self.assertEqual([row['payment_status'] for row in rows],
+                         ['free' if p.free_access else 'paid' if p.paid else 'unpaid' for p in expected])
+        self.assertEqual([row['breakfast_day1'] for row in rows], [p.breakfast_day1 for p in expected])
+
+    def test_arrow_multi_batch(self):
+        self.assertRoundTrip('arrow')
+
+    def test_parquet_multi_batch(self):
+        self.assertRoundTrip('parquet')
+
+    def test_meal_columns_follow_the_event(self):
+        event, _ = self.make_roster(3)
+        event.meal_days = 2
+        event.save()
+        sink = io.BytesIO()
+        exports.write_snapshot(event, sink, 'arrow')
+        table = exports.pa.ipc.open_file(io.BytesIO(sink.getvalue())).read_all()
+        self.assertEqual([name for name in table.column_names if 'day' in name],
+                         ['breakfast_day1', 'lunch_day1', 'breakfast_day2', 'lunch_day2'])
+
+    def test_view(self):
+        event, _ = self.make_roster(5)
+        response = self.client.get(reverse('export_snapshot'), {'format': 'arrow'})
+        self.assertEqual(response['Content-Type'], exports.FORMATS['arrow'][0])
+        table = exports.pa.ipc.open_file(io.BytesIO(b''.join(response.streaming_content))).read_all()
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(self.client.get(reverse('export_snapshot'), {'format': 'csv'}).status_code, 400)
+
+
+@skipIf(exports.pa is None, "pyarrow is not installed")
+class ExportCommandTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(5)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'roster.parquet')
+
+    def test_writes_the_file(self):
+        call_command('export_snapshot', self.output, event=self.event.id, stdout=io.StringIO())
+        self.assertEqual(exports.pq.read_table(self.output).num_rows, 5)
+        self.assertEqual(os.listdir(os.path.dirname(self.output)), ['roster.parquet'])
+
+    def test_failed_run_leaves_the_previous_file(self):
+        with open(self.output, 'wb') as f:
+            f.write(b'previous export')
+
+        def half_written(event, path, *args):
+            with open(path, 'wb') as f:
+                f.write(b'PAR1')
+            raise RuntimeError("disk full")
+
+        with mock.patch.object(exports, 'write_snapshot', side_effect=half_written), \
+                self.assertRaisesMessage(CommandError, "disk full"):
+            call_command('export_snapshot', self.output, event=self.event.id, stdout=io.StringIO())
+        with open(self.output, 'rb') as f:
+            self.assertEqual(f.read(), b'previous export')
+        self.assertEqual(os.listdir(os.path.dirname(self.output)), ['roster.parquet'])
@@ -0,0 +1,85 @@
+from datetime import date
+from unittest import mock
+
+from django.urls import reverse
+
+from .. import fuzzy, journal, versioning
+from ..models import Event, Participant
+from .base import RosterTestCase
+
+
+class FuzzySuggestTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        for name, nationality in [('Mohammed Benali', 'Tunisia'), ('Sarah Smith', 'Jordan'), ('Youssef Kaddour', 'Egypt')]:
+            Participant.objects.create(event=self.event, full_name=name, nationality=nationality)
+
+    def suggest(self, full_name, nationality=''):
+        self.event.refresh_from_db()  # as loaded by a new request
+        return fuzzy.suggest(self.event, full_name, nationality)
+
+    def names(self, full_name, nationality=''):
+        return [p.full_name for p in self.suggest(full_name, nationality)]
+
+    def test_transliteration_variants(self):
+        self.assertEqual(self.names('Mohamed Ben Ali')[0], 'Mohammed Benali')
+        self.assertEqual(self.names('Yousef Kadour', 'Egypt')[0], 'Youssef Kaddour')
+        self.assertEqual(self.names('Zzzz Qqqq'), [])
+
+    def test_saved_participants_are_found_without_a_rebuild(self):
+        self.names('Sarah Smith')  # builds the index
+        Participant.objects.create(event=self.event, full_name='Khadija Mansour', nationality='Algeria')
+        with mock.patch.object(fuzzy.RosterIndex, 'build') as build:
+            self.assertEqual(self.names('Khadidja Mansur')[0], 'Khadija Mansour')
+        build.assert_not_called()
+
+    def test_deleted_participants_drop_out(self):
+        self.names('Sarah Smith')
+        Participant.objects.filter(full_name='Sarah Smith').delete()
+        self.assertNotIn('Sarah Smith', self.names('Sarah Smith'))
+
+    def test_other_writers_are_caught_up_from_the_journal(self):
+        self.names('Sarah Smith')
+        # Set-based writes from another process: no post_save in this one
+        Participant.objects.bulk_create([Participant(event=self.event, full_name='Khadija Mansour', nationality='Algeria')])
+        journal.record_created(self.event.id, list(Participant.objects.filter(full_name='Khadija Mansour')))
+        journal.delete(self.event.id, Participant.objects.filter(full_name='Sarah Smith'))
+        versioning.bump(self.event.id)
+        index = fuzzy.get_index(self.event.id)
+        with mock.patch.object(fuzzy.RosterIndex, 'build') as build:
+            self.assertEqual(self.names('Khadidja Mansur')[0], 'Khadija Mansour')
+        build.assert_not_called()
+        self.assertEqual(len(index.entries), 3)
+        with self.assertNumQueries(0):  # data version unchanged: nothing to catch up
+            index.refresh(index.version)
+
+    def test_accents_punctuation_and_case(self):
+        self.assertEqual(fuzzy.normalize("  Mohámed  BEN-ALI "), 'mohamed ben ali')
+        self.assertEqual(self.names('MOHÁMED ben-ali')[0], 'Mohammed Benali')
+
+    def test_nationality_breaks_ties(self):
+        Participant.objects.create(event=self.event, full_name='Sarah Smith', nationality='Egypt')
+        self.assertEqual(self.suggest('Sara Smith', 'Egypt')[0].nationality, 'Egypt')
+        self.assertEqual(self.suggest('Sara Smith', 'Jordan')[0].nationality, 'Jordan')
+
+    def test_other_events_are_never_suggested(self):
+        other = Event.objects.create(name='Other', start_date=date(2025, 11, 3))
+        Participant.objects.create(event=other, full_name='Sarah Smyth', nationality='Jordan')
+        self.assertEqual(self.names('Sarah Smyth'), ['Sarah Smith'])
+
+    def test_far_behind_reloads_everything(self):
+        self.names('Sarah Smith')
+        index = fuzzy.get_index(self.event.id)
+        Participant.objects.create(event=self.event, full_name='Khadija Mansour', nationality='Algeria')
+        versioning.bump(self.event.id)
+        with mock.patch.object(fuzzy, 'REBUILD_AFTER', 0), \
+                mock.patch.object(fuzzy.RosterIndex, 'build', autospec=True, side_effect=fuzzy.RosterIndex.build) as build:
+            self.assertEqual(self.names('Khadidja Mansur')[0], 'Khadija Mansour')
+        build.assert_called_once()
+        self.assertEqual(len(index.entries), 4)
+
+    def test_missed_scan_offers_candidates(self):
+        response = self.client.post(reverse('scan_qr'), {'qr_data': 'Mohamed Ben Ali|Tunisia'})
+        self.assertEqual([p.full_name for p in response.context['candidates']][:1], ['Mohammed Benali'])
+        self.assertContains(response, 'Did you mean?')
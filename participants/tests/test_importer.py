@@ -0,0 +1,76 @@
+from datetime import date
+
+import pandas as pd
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .. import importer
+from ..models import Event, Participant, ParticipantChange
+from .base import RosterTestCase
+
+
+class ImporterTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        self.sheet = [(f"Sheet Person {i}", 'Tunisia', 'paid' if i % 2 else 'unpaid') for i in range(5)]
+
+    def test_reimport_diffs_against_current_rows(self):
+        self.assertEqual(importer.import_rows(self.event, self.sheet).inserted, 5)
+        with CaptureQueriesContext(connection) as queries:
+            result = importer.import_rows(self.event, self.sheet)
+        self.assertEqual((result.inserted, result.updated, result.unchanged), (0, 0, 5))
+        self.assertEqual(len(queries), 1)  # the one SELECT of current rows
+
+        changed = [self.sheet[0][:2] + ('free',), *self.sheet[1:4], ('', 'Egypt', 'paid')]
+        result = importer.import_rows(self.event, changed)
+        self.assertEqual((result.updated, result.unchanged, result.missing, result.skipped), (1, 3, 1, 1))
+        self.assertTrue(Participant.objects.get(event=self.event, full_name='Sheet Person 0').free_access)
+
+    def test_keep_existing_rows(self):
+        importer.import_rows(self.event, self.sheet)
+        result = importer.import_rows(self.event, [self.sheet[0][:2] + ('free',)], update_existing=False)
+        self.assertEqual((result.updated, result.unchanged), (0, 1))
+
+    def test_chunks_commit_and_report_progress(self):
+        reports = []
+        result = importer.import_rows(self.event, self.sheet, chunk_size=2,
+                                      progress=lambda done, total: reports.append((done, total)))
+        self.assertEqual(reports, [(2, 5), (4, 5), (5, 5), (5, 5)])
+        self.assertEqual(result.inserted, 5)
+        self.assertEqual(ParticipantChange.objects.filter(event=self.event, op='create').count(), 5)
+
+    def test_progress_can_stop_after_a_chunk(self):
+        result = importer.import_rows(self.event, self.sheet, chunk_size=2, progress=lambda done, total: False)
+        self.assertTrue(result.cancelled)
+        self.assertEqual(result.inserted, 2)
+        self.assertEqual(Participant.objects.filter(event=self.event).count(), 2)
+
+    def test_payment_spellings(self):
+        self.assertEqual([importer.parse_payment_status(v) for v in ('PAID', ' yes ', 'Free Access', 'free', 'no', '')],
+                         [(True, False), (True, False), (False, True), (False, True), (False, False), (False, False)])
+
+    def test_sheet_cells_are_cleaned(self):
+        frame = pd.DataFrame({
+            'Full Name': ['  Amira Haddad ', None], 'Nationality': ['Tunisia ', 'Egypt'],
+            'Payment Status': ['paid', float('nan')], 'Notes': ['ignored', 'ignored'],
+        })
+        self.assertEqual(importer.read_rows(frame), [('Amira Haddad', 'Tunisia', 'paid'), ('', 'Egypt', '')])
+
+    def test_repeated_sheet_rows_insert_once(self):
+        result = importer.import_rows(self.event, self.sheet[:2] + [self.sheet[0]])
+        self.assertEqual(result.inserted, 2)
+        self.assertEqual(Participant.objects.filter(event=self.event, full_name='Sheet Person 0').count(), 1)
+
+    def test_hand_added_rows_are_matched_by_their_state(self):
+        Participant.objects.create(event=self.event, full_name='Sheet Person 1', nationality='Tunisia', paid=True)
+        result = importer.import_rows(self.event, self.sheet)
+        self.assertEqual((result.inserted, result.unchanged), (4, 1))
+        self.assertFalse(ParticipantChange.objects.filter(event=self.event, op='update').exists())
+
+    def test_other_events_are_not_matched(self):
+        other = Event.objects.create(name='Other', start_date=date(2025, 11, 3))
+        importer.import_rows(other, self.sheet)
+        self.assertEqual(importer.import_rows(self.event, self.sheet).inserted, 5)
+        self.assertEqual(Participant.objects.filter(full_name='Sheet Person 0').count(), 2)
@@ -0,0 +1,138 @@
+import hashlib
+import io
+import os
+import tempfile
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs, views
+from ..models import Event, ImportJob, Participant
+from .base import RosterTestCase
+
+
+@override_settings(IMPORT_DIR=tempfile.gettempdir())
+class ImportJobTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(3)
+        # run_job closes stale connections, which would end the test transaction
+        patcher = mock.patch('participants.jobs.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_job(self, rows, **columns):
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        frame = {
+            'Full Name': [f"Imported {i}" for i in range(rows)],
+            'Nationality': ['Tunisia'] * rows,
+            'Payment Status': ['paid'] * rows,
+        }
+        frame.update(columns)
+        pd.DataFrame({k: v for k, v in frame.items() if v is not None}).to_excel(path, index=False)
+        return ImportJob.objects.create(event=self.event, user=self.user, file_name='sheet.xlsx', file_path=path)
+
+    def test_progress(self):
+        job = self.make_job(7)
+        jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((job.total_rows, job.processed_rows, job.inserted), (7, 7, 7))
+        self.assertEqual(Participant.objects.filter(event=self.event, full_name__startswith='Imported').count(), 7)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_cancel(self):
+        job = self.make_job(5)
+        response = self.client.post(reverse('cancel_import_job', args=[job.id]))
+        self.assertTrue(response.json()['cancel_requested'])
+        jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertFalse(Participant.objects.filter(event=self.event, full_name__startswith='Imported').exists())
+
+    def test_failure(self):
+        job = self.make_job(2, **{'Payment Status': None})
+        jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Missing columns', job.error)
+
+    def test_stale_job_is_failed_and_not_a_duplicate(self):
+        job = self.make_job(1)
+        ImportJob.objects.filter(pk=job.pk).update(
+            status='running', checksum='a' * 64, updated_at=timezone.now() - 2 * jobs.STALE_AFTER,
+        )
+        self.assertIsNone(views._imported_job(self.event, 'a' * 64, True))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_job_parameter(self):
+        other = Event.objects.create(name="Other", start_date=date(2025, 11, 3))
+        foreign = ImportJob.objects.create(event=other, file_name='x.xlsx', file_path='/nonexistent')
+        for value in ('abc', str(foreign.id)):
+            response = self.client.get(reverse('import_real_participants'), {'job': value})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.context['job'])
+
+@override_settings(IMPORT_DIR=tempfile.gettempdir())
+class ReimportTests(RosterTestCase):
+    """Uploading a file that was imported before."""
+
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        sheet = io.BytesIO()
+        pd.DataFrame({
+            'Full Name': ['Amira Haddad', 'Omar Zidi'], 'Nationality': ['Tunisia', 'Egypt'],
+            'Payment Status': ['paid', 'unpaid'],
+        }).to_excel(sheet, index=False)
+        self.sheet = sheet.getvalue()
+        # Jobs run right away, in the request; they take a background slot, not the request's
+        patcher = mock.patch('participants.jobs.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('participants.jobs.submit', side_effect=lambda job: jobs.run_job(job.id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self):
+        upload = SimpleUploadedFile('roster.xlsx', self.sheet)
+        response = self.client.post(reverse('import_real_participants'),
+                                    {'excel_file': upload, 'update_existing': 'on'}, follow=True)
+        return response.context['job'], [str(m) for m in response.context['messages']]
+
+    def test_unchanged_event_is_not_imported_twice(self):
+        first, _ = self.upload()
+        again, messages = self.upload()
+        self.assertEqual(again, first)
+        self.assertIn('already imported', messages[0])
+
+    def test_deleted_participants_come_back(self):
+        first, _ = self.upload()
+        self.client.post(reverse('delete_all_participants'), {'confirmation': 'DELETE ALL'})
+        again, _ = self.upload()
+        self.assertNotEqual(again, first)
+        self.assertEqual((again.status, again.inserted), ('done', 2))
+        self.assertEqual(Participant.objects.filter(event=self.event).count(), 2)
+
+    def test_edits_are_put_back(self):
+        self.upload()
+        amira = Participant.objects.get(event=self.event, full_name='Amira Haddad')
+        amira.paid = False
+        amira.save()
+        again, _ = self.upload()
+        self.assertEqual(again.updated, 1)
+        amira.refresh_from_db()
+        self.assertTrue(amira.paid)
+
+    def test_running_import_of_the_same_file(self):
+        running = ImportJob.objects.create(event=self.event, file_name='roster.xlsx', file_path='/nonexistent',
+                                           status='running', checksum=hashlib.sha256(self.sheet).hexdigest())
+        self.assertEqual(self.upload()[0], running)
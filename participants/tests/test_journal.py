@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db.models import F
+from django.urls import reverse
+
+from .. import bulk, journal
+from ..models import Event, Participant, ParticipantChange
+from .base import RosterTestCase
+
+
+class ChangeFeedTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+
+    def changes(self, since=0, **params):
+        response = self.client.get(reverse('participant_changes'), {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_entries_and_cursor(self):
+        p = Participant.objects.create(event=self.event, full_name='Amira Haddad', nationality='Tunisia')
+        first = self.changes()
+        self.assertEqual([(c['participant'], c['op']) for c in first['changes']], [(p.id, 'create')])
+        self.assertEqual(first['changes'][0]['fields']['full_name'], 'Amira Haddad')
+
+        p.paid = True
+        p.set_meal('lunch_day1', True)
+        p.save()
+        self.assertEqual(journal.delete(self.event.id, Participant.objects.filter(pk=p.pk)), 1)
+        later = self.changes(first['next'])
+        self.assertEqual([c['op'] for c in later['changes']], ['update', 'delete'])
+        # A served meal also counts as attendance
+        self.assertEqual(later['changes'][0]['fields'], {'paid': True, 'lunch_day1': True, 'attended': True})
+        self.assertEqual(self.changes(later['next'])['changes'], [])
+
+    def test_bulk_paths_and_paging(self):
+        other = Event.objects.create(name='Other', start_date=date(2025, 11, 3))
+        Participant.objects.create(event=other, full_name='Elsewhere', nationality='Oman')  # not in this feed
+        Participant.objects.bulk_create([
+            Participant(event=self.event, full_name=f"Bulk {i}", nationality='Egypt') for i in range(3)
+        ])
+        rows = Participant.objects.filter(event=self.event)
+        journal.record_created(self.event.id, list(rows))
+        self.assertEqual(journal.delete(self.event.id, rows), 3)
+        self.assertFalse(Participant.objects.filter(event=self.event).exists())
+        page = self.changes(limit=4)
+        self.assertTrue(page['more'])
+        self.assertEqual([c['op'] for c in page['changes']], ['create'] * 3 + ['delete'])
+        rest = self.changes(page['next'], limit=4)
+        self.assertFalse(rest['more'])
+        self.assertEqual([c['op'] for c in rest['changes']], ['delete'] * 2)
+
+    def test_no_settle_delay_where_ids_commit_in_order(self):
+        self.assertEqual(journal.settle_window(), timedelta(0))
+        Participant.objects.create(event=self.event, full_name='Just Now', nationality='Oman')
+        self.assertEqual(len(self.changes()['changes']), 1)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get(reverse('participant_changes'), {'since': 'x'}).status_code, 400)
+
+    def test_unchanged_save_is_not_journaled(self):
+        p = Participant.objects.create(event=self.event, full_name='Amira Haddad', nationality='Tunisia')
+        Participant.objects.get(pk=p.pk).save()
+        self.assertEqual(ParticipantChange.objects.filter(participant_id=p.pk).count(), 1)
+
+    def test_bulk_update_journals_each_changed_row(self):
+        Participant.objects.bulk_create([
+            Participant(event=self.event, full_name=f"Bulk {i}", nationality='Egypt', is_present=i == 0)
+            for i in range(3)
+        ])
+        bulk.apply(self.event, {'is_present': True}, filters={'nationality': 'Egypt'})
+        changes = self.changes()['changes']
+        self.assertEqual(len(changes), 2)
+        self.assertEqual({tuple(sorted(c['fields'])) for c in changes},
+                         {('attended', 'first_seen_at', 'is_present', 'last_seen_at')})
+
+    def test_limit_is_clamped(self):
+        Participant.objects.bulk_create([
+            Participant(event=self.event, full_name=f"Bulk {i}", nationality='Egypt') for i in range(3)
+        ])
+        journal.record_created(self.event.id, list(Participant.objects.filter(event=self.event)))
+        page = self.changes(limit=0)
+        self.assertEqual((len(page['changes']), page['more']), (1, True))
+        with mock.patch.object(journal, 'MAX_PAGE_SIZE', 2):
+            self.assertEqual(len(self.changes(limit=50)['changes']), 2)
+
+    def test_fresh_entries_are_held_back_where_ids_can_commit_out_of_order(self):
+        Participant.objects.create(event=self.event, full_name='Just Now', nationality='Oman')
+        with mock.patch.object(journal, 'ORDERED_VENDORS', ()):
+            page = self.changes()
+            self.assertEqual((page['changes'], page['next']), ([], 0))
+            ParticipantChange.objects.update(created_at=F('created_at') - journal.SETTLE)
+            self.assertEqual(len(self.changes()['changes']), 1)
@@ -0,0 +1,39 @@
+from ..models import ALL_MEALS, MEAL_BITS, MEAL_FIELDS, Participant
+from ..templatetags.participant_extras import get_meal_field
+from .base import RosterTestCase
+
+
+class MealBitsTests(RosterTestCase):
+    def test_has_and_has_any(self):
+        event, _ = self.make_roster(0)
+        served = {'a': ['lunch_day1'], 'b': ['lunch_day1', 'breakfast_day2'], 'c': ['breakfast_day2'], 'd': []}
+        for name, meals in served.items():
+            p = Participant(event=event, full_name=name, nationality='Tunisia')
+            for meal in meals:
+                p.set_meal(meal, True)
+            p.save()
+        both = MEAL_BITS['lunch_day1'] | MEAL_BITS['breakfast_day2']
+
+        def names(**lookup):
+            return sorted(Participant.objects.filter(event=event, **lookup).values_list('full_name', flat=True))
+
+        self.assertEqual(names(meals_served__has=MEAL_BITS['lunch_day1']), ['a', 'b'])
+        self.assertEqual(names(meals_served__has=both), ['b'])
+        self.assertEqual(names(meals_served__has_any=both), ['a', 'b', 'c'])
+        p = Participant.objects.get(full_name='b')
+        p.set_meal('lunch_day1', False)
+        self.assertEqual([p.meal_served(m) for m in ('lunch_day1', 'breakfast_day2')], [False, True])
+
+    def test_meal_names_still_work_as_attributes(self):
+        event, _ = self.make_roster(0)
+        p = Participant.objects.create(event=event, full_name='Old Style', nationality='Oman', lunch_day2=True)
+        p.breakfast_day7 = True
+        p.save()
+        p = Participant.objects.get(pk=p.pk)
+        self.assertEqual(p.served_meals, ['lunch_day2', 'breakfast_day7'])
+        self.assertTrue(p.attended)
+        self.assertEqual((get_meal_field(p, 'lunch_day2'), get_meal_field(p, 'dinner_day1')), (True, False))
+
+    def test_bits_cover_every_meal(self):
+        self.assertEqual(sum(MEAL_BITS.values()), ALL_MEALS)
+        self.assertEqual(len(MEAL_BITS), len(MEAL_FIELDS))
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.urls import reverse
+
+from .. import metrics
+from .base import RosterTestCase
+
+NOW = 1_700_000_000.0
+
+
+class MetricsTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['metrics'].clear()
+        patcher = mock.patch.object(metrics, '_local', metrics.RingMetrics())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def worker(self, pid, scans):
+        """Another worker's ring, published under `pid`."""
+        ring = metrics.RingMetrics()
+        with mock.patch('participants.metrics.os.getpid', return_value=pid):
+            for outcome in scans:
+                ring.record('scan', 'desk-2', '', outcome, now=NOW)
+            ring.publish(NOW)
+        return ring
+
+    def test_windows(self):
+        for outcome in ('found', 'found', 'not_found', 'found'):
+            metrics._local.record('scan', 'desk-1', '', outcome, now=NOW - 120)  # inside 5m, not 1m
+        for latency in range(1, 21):
+            metrics._local.record('meal', 'desk-1', 'lunch_day1', 'served', latency, now=NOW)
+        windows = metrics.snapshot(NOW)['windows']
+        self.assertEqual(windows['1m']['overall']['scans'], 0)
+        five = windows['5m']['overall']
+        self.assertEqual((five['scans'], five['not_found_rate'], five['served']), (4, 0.25, 20))
+        self.assertEqual(five['p95_scan_to_serve_ms'], 20)
+        self.assertEqual(set(windows['5m']['meals']), {'lunch_day1'})
+        # Slots older than the longest window are left out
+        self.assertEqual(metrics.snapshot(NOW + 20 * 60)['windows']['15m']['overall']['scans'], 0)
+
+    def test_workers_are_merged(self):
+        self.worker(101, ['found'] * 3)
+        self.worker(102, ['not_found'])
+        metrics._local.record('scan', 'desk-1', '', 'found', now=NOW)
+        overall = metrics.snapshot(NOW)['windows']['1m']['overall']
+        self.assertEqual((overall['scans'], overall['not_found_rate']), (5, 0.2))
+
+    def test_workers_that_raced_for_a_key_separate(self):
+        first, second = metrics.RingMetrics(), metrics.RingMetrics()
+        # Both picked the same free key before either had published
+        first.key = second.key = metrics.WORKER_KEY.format(0)
+        for pid, ring in ((102, second), (101, first)):
+            with mock.patch('participants.metrics.os.getpid', return_value=pid):
+                ring.record('scan', 'desk-2', '', 'found', now=NOW)  # publishes
+        # 101 found 102 on the key and moved on
+        self.assertEqual((second.key, first.key), (metrics.WORKER_KEY.format(0), metrics.WORKER_KEY.format(1)))
+        self.assertEqual(metrics.snapshot(NOW)['windows']['1m']['overall']['scans'], 2)
+
+    def test_all_keys_taken(self):
+        with mock.patch.object(metrics, 'MAX_WORKERS', 1):
+            self.worker(101, ['found'])
+            late = self.worker(102, ['found'])
+        self.assertIsNone(late.key)
+
+    def test_scans_are_recorded_per_station(self):
+        event, participant = self.make_roster(2)
+        self.client.post(reverse('scan_qr'), {'qr_data': f"{participant.full_name}|{participant.nationality}"},
+                         HTTP_X_STATION_ID='gate-a')
+        self.client.post(reverse('scan_qr'), {'qr_data': "Nobody Known|Nowhere"}, HTTP_X_STATION_ID='gate-a')
+        data = self.client.get(reverse('metrics_api')).json()
+        gate = data['windows']['1m']['stations']['gate-a']
+        self.assertEqual((gate['scans'], gate['not_found_rate']), (2, 0.5))
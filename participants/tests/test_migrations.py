@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from ..fuzzy import normalize
+from ..models import MEAL_BITS
+
+
+class MigrationTestCase(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class SearchNameMigrationTests(MigrationTestCase):
+    def test_backfill(self):
+        apps = self.migrate([('participants', '0014_event_data_version')])
+        event = apps.get_model('participants', 'Event').objects.create(name='Old', start_date=date(2025, 11, 3))
+        names = ['Zoë Ben-Amor', '  ÉLODIE   o’Brien ', 'Mohamed_Ali']
+        for name in names:
+            apps.get_model('participants', 'Participant').objects.create(event=event, full_name=name, nationality='X')
+
+        apps = self.migrate([('participants', '0015_participant_search_name')])
+        backfilled = dict(apps.get_model('participants', 'Participant').objects.values_list('full_name', 'search_name'))
+        self.assertEqual(backfilled['Zoë Ben-Amor'], 'zoe ben amor')
+        # The migration's frozen copy still agrees with what save() writes today
+        self.assertEqual(backfilled, {name: normalize(name) for name in names})
+
+
+class MealBitsMigrationTests(MigrationTestCase):
+    before = [('participants', '0017_participantchange')]
+    after = [('participants', '0018_meals_bitmask')]
+
+    def test_round_trip(self):
+        apps = self.migrate(self.before)
+        event = apps.get_model('participants', 'Event').objects.create(name='Old', start_date=date(2025, 11, 3))
+        Old = apps.get_model('participants', 'Participant')
+        Old.objects.create(event=event, full_name='A', nationality='X', breakfast_day1=True, lunch_day7=True)
+        Old.objects.create(event=event, full_name='B', nationality='X')
+
+        apps = self.migrate(self.after)
+        packed = dict(apps.get_model('participants', 'Participant').objects.values_list('full_name', 'meals_served'))
+        self.assertEqual(packed, {'A': MEAL_BITS['breakfast_day1'] | MEAL_BITS['lunch_day7'], 'B': 0})
+
+        apps = self.migrate(self.before)
+        unpacked = apps.get_model('participants', 'Participant').objects.get(full_name='A')
+        self.assertEqual((unpacked.breakfast_day1, unpacked.lunch_day7, unpacked.lunch_day1), (True, True, False))
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from collections import Counter
+from unittest import mock
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .. import profiling
+from ..models import Event
+from .base import RosterTestCase
+
+
+def query_view(request):
+    Event.objects.count()
+    return HttpResponse('ok')
+
+
+class ProfilingMiddlewareTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        for name, value in (('ENABLED', True), ('PROFILE_DIR', self.dir), ('SLOW_MS', 60_000),
+                            ('_patch_templates', lambda: None)):
+            patcher = mock.patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def serve(self, sample_rate, view=query_view):
+        with mock.patch.object(profiling, 'SAMPLE_RATE', sample_rate):
+            middleware = profiling.ProfilingMiddleware(view)
+            return middleware(self.factory.get('/dashboard/'))
+
+    def test_sampled_request_is_profiled(self):
+        self.assertEqual(self.serve(1).status_code, 200)
+        [summary] = profiling.list_profiles()
+        self.assertEqual((summary['reason'], summary['kind'], summary['status']), ('sampled', 'cprofile', 200))
+        self.assertEqual(summary['db_queries'], 1)
+        self.assertIsNotNone(profiling.profile_path(summary['file']))
+        response = self.client.get(reverse('profile_download', args=[summary['file']]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_fast_unsampled_request_leaves_nothing(self):
+        self.serve(0)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_slow_request_keeps_its_stacks(self):
+        with mock.patch.object(profiling, 'SLOW_MS', 0), \
+                mock.patch.object(profiling.StackSampler, 'release', return_value=Counter({'get (views.py:1)': 3})):
+            self.serve(0)
+        [summary] = profiling.list_profiles()
+        self.assertEqual((summary['reason'], summary['kind']), ('slow', 'stacks'))
+        with open(profiling.profile_path(summary['file'])) as f:
+            self.assertEqual(f.read(), "get (views.py:1) 3\n")
+
+    def test_request_served_when_another_profiler_is_active(self):
+        profiler = mock.Mock()
+        profiler.enable.side_effect = ValueError("Another profiling tool is already active")
+        with mock.patch.object(profiling.cProfile, 'Profile', return_value=profiler), \
+                mock.patch.object(profiling.StackSampler, 'watch') as watch:
+            self.assertEqual(self.serve(1).status_code, 200)
+        profiler.disable.assert_not_called()
+        self.assertEqual(profiling.list_profiles(), [])
+        # The request was handed to the stack sampler instead
+        watch.assert_called_once()
+
+    def test_db_timer_is_removed_after_the_request(self):
+        self.serve(1)
+        self.assertEqual(connection.execute_wrappers, [])
+
+    def test_old_profiles_are_pruned(self):
+        with mock.patch.object(profiling, 'KEEP', 2):
+            for _ in range(3):
+                self.serve(1)
+        self.assertEqual(len(profiling.list_profiles()), 2)
+        self.assertEqual(len(os.listdir(self.dir)), 4)
+
+    def test_download_only_serves_profiles(self):
+        open(os.path.join(self.dir, 'notes.txt'), 'w').close()
+        for name in ('notes.txt', '..%2Fsecret.prof', 'missing.prof'):
+            self.assertEqual(self.client.get(f"/admin-panel/profiles/{name}/").status_code, 404, name)
@@ -0,0 +1,149 @@
+import tempfile
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import scanindex
+from ..models import Participant
+from .base import RosterTestCase
+
+ROSTER_SIZES = (5, 50, 250)
+
+
+class QueryBudgetTests(RosterTestCase):
+    """Each view runs a fixed number of queries, whatever the roster size.
+
+    A per-row query (N+1) makes the count grow with the roster and fails the
+    test; the budget catches constant-cost regressions on top of that.
+    """
+
+    def assertQueryBudget(self, budget, request):
+        counts = {}
+        for size in ROSTER_SIZES:
+            event, participant = self.make_roster(size)
+            method, url, data = request(event, participant)
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url, data or {})
+            self.assertLess(response.status_code, 400, url)
+            counts[size] = len(queries)
+        self.assertEqual(len(set(counts.values())), 1, f"query count grows with the roster: {counts}")
+        self.assertLessEqual(max(counts.values()), budget, f"over budget: {counts}")
+
+    def test_scan_qr(self):
+        self.assertQueryBudget(8, lambda e, p: (
+            'post', reverse('scan_qr'), {'qr_data': f"{p.full_name}|{p.nationality}"}))
+
+    def test_scan_qr_indexed(self):
+        def request(event, participant):
+            scanindex.build(event)
+            return 'post', reverse('scan_qr'), {'qr_data': f"{participant.full_name}|{participant.nationality}"}
+        with tempfile.TemporaryDirectory() as directory, \
+                self.settings(SCAN_INDEX_ENABLED=True, SCAN_INDEX_DIR=directory):
+            self.assertQueryBudget(8, request)
+
+    def test_scan_qr_not_found(self):
+        self.assertQueryBudget(10, lambda e, p: (
+            'post', reverse('scan_qr'), {'qr_data': "Nobody Known|Nowhere"}))
+
+    def test_toggle_presence(self):
+        self.assertQueryBudget(7, lambda e, p: ('post', reverse('toggle_presence', args=[p.id]), None))
+
+    def test_toggle_meal(self):
+        self.assertQueryBudget(7, lambda e, p: (
+            'post', reverse('toggle_meal', args=[p.id, 'lunch_day2']), None))
+
+    def test_toggle_payment(self):
+        self.assertQueryBudget(7, lambda e, p: ('post', reverse('toggle_payment', args=[p.id]), None))
+
+    def test_mark_present(self):
+        self.assertQueryBudget(7, lambda e, p: ('post', reverse('mark_present', args=[p.id]), None))
+
+    def test_participant_detail(self):
+        self.assertQueryBudget(6, lambda e, p: ('get', reverse('participant_detail', args=[p.id]), None))
+
+    def test_dashboard(self):
+        self.assertQueryBudget(5, lambda e, p: ('get', reverse('dashboard'), None))
+
+    def test_dashboard_stats(self):
+        self.assertQueryBudget(5, lambda e, p: ('get', reverse('dashboard_stats'), None))
+
+    def test_rollup_api(self):
+        self.assertQueryBudget(5, lambda e, p: ('get', reverse('rollup_api'), {'group_by': 'nationality'}))
+
+    def test_roster_snapshot(self):
+        self.assertQueryBudget(5, lambda e, p: ('get', reverse('roster_snapshot'), None))
+
+    def test_participant_changes(self):
+        self.assertQueryBudget(6, lambda e, p: ('get', reverse('participant_changes'), {'since': 0}))
+
+    def test_participants_list(self):
+        self.assertQueryBudget(7, lambda e, p: ('get', reverse('participants_list'), None))
+
+    def test_participants_list_search(self):
+        self.assertQueryBudget(7, lambda e, p: ('get', reverse('participants_list'), {'q': 'Participant 00'}))
+
+    def test_search_participant(self):
+        self.assertQueryBudget(5, lambda e, p: ('get', reverse('search_participant'), {'q': 'Egypt'}))
+
+    def test_admin_panel(self):
+        self.assertQueryBudget(6, lambda e, p: ('get', reverse('admin_panel'), None))
+
+    def test_bulk_delete(self):
+        def request(event, participant):
+            ids = Participant.objects.filter(event=event).values_list('id', flat=True)
+            return 'post', reverse('bulk_delete_participants'), {'selected_ids': [str(pid) for pid in ids]}
+        # The ids are fetched first so the journal rows can follow the DELETE
+        self.assertQueryBudget(11, request)
+
+
+class QueryPlanTests(RosterTestCase):
+    """The check-in lookups must stay index-driven as the roster grows."""
+
+    def setUp(self):
+        super().setUp()
+        self.make_roster(50)
+        self.event, self.participant = self.make_roster(250)
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Small test tables would otherwise always get a sequential scan
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute(f"EXPLAIN {sql}", params)
+            else:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset):
+        plan = self.explain(queryset)
+        table = Participant._meta.db_table
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+        else:
+            scans = [line for line in plan.splitlines() if table in line]
+            self.assertTrue(scans, plan)
+            for line in scans:
+                self.assertTrue(line.startswith('SEARCH') and 'INDEX' in line, plan)
+
+    def test_scan_lookup_uses_index(self):
+        p = self.participant
+        self.assertUsesIndex(Participant.objects.select_related('event').filter(
+            event=self.event, full_name=p.full_name, nationality=p.nationality,
+        ))
+
+    def test_list_search_uses_event_index(self):
+        # Substring search filters within the event's rows, never across the whole table
+        self.assertUsesIndex(Participant.objects.filter(event=self.event, full_name__icontains='0042'))
+
+    def test_admin_name_search_uses_index(self):
+        # Across events only PostgreSQL has an index for it (trigram); within one event
+        # every backend narrows by the event first
+        queryset = Participant.objects.filter(search_name__contains='ticipant 004')
+        if connection.vendor != 'postgresql':
+            queryset = queryset.filter(event=self.event)
+        self.assertUsesIndex(queryset)
+
+    def test_attendance_count_uses_index(self):
+        self.assertUsesIndex(Participant.objects.filter(event=self.event, attended=True))
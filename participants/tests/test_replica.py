@@ -0,0 +1,69 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from .. import replica
+from ..models import Participant
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(settings.DATABASES, {replica.REPLICA: dict(settings.DATABASES['default'])})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = replica.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        """Where reads and writes made by a replica_reads view go."""
+        return replica.replica_reads(lambda request: (
+            self.router.db_for_read(Participant), self.router.db_for_write(Participant),
+        ))(request)
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.route(self.factory.get('/dashboard/'))[0], replica.REPLICA)
+        # Outside a replica_reads view everything stays on the primary
+        self.assertEqual(self.router.db_for_read(Participant), 'default')
+
+    def test_writes_go_to_the_primary(self):
+        self.assertEqual(self.route(self.factory.get('/dashboard/'))[1], 'default')
+
+    def test_sticky_cookie_forces_the_primary(self):
+        request = self.factory.get('/dashboard/')
+        request.COOKIES[replica.STICKY_COOKIE] = str(time.time() + 5)
+        self.assertEqual(self.route(request), ('default', 'default'))
+        request.COOKIES[replica.STICKY_COOKIE] = str(time.time() - 5)
+        self.assertEqual(self.route(request)[0], replica.REPLICA)
+
+    def test_write_request_sets_the_sticky_cookie(self):
+        middleware = replica.ReplicaStickinessMiddleware(lambda request: HttpResponse())
+        self.assertIn(replica.STICKY_COOKIE, middleware(self.factory.post('/toggle/')).cookies)
+        self.assertNotIn(replica.STICKY_COOKIE, middleware(self.factory.get('/dashboard/')).cookies)
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'participants'))
+        self.assertFalse(self.router.allow_migrate(replica.REPLICA, 'participants'))
+
+    def test_garbled_cookie_is_ignored(self):
+        request = self.factory.get('/dashboard/')
+        request.COOKIES[replica.STICKY_COOKIE] = 'soon'
+        self.assertEqual(self.route(request)[0], replica.REPLICA)
+
+    def test_routing_ends_with_the_view(self):
+        def failing(request):
+            raise RuntimeError
+        with self.assertRaises(RuntimeError):
+            replica.replica_reads(failing)(self.factory.get('/dashboard/'))
+        self.assertEqual(self.router.db_for_read(Participant), 'default')
+
+
+class UnconfiguredReplicaTests(TestCase):
+    def test_everything_stays_on_default(self):
+        router = replica.ReplicaRouter()
+        factory = RequestFactory()
+        self.assertIsNone(replica.replica_reads(lambda request: router.db_for_read(Participant))(factory.get('/')))
+        middleware = replica.ReplicaStickinessMiddleware(lambda request: HttpResponse())
+        self.assertNotIn(replica.STICKY_COOKIE, middleware(factory.post('/toggle/')).cookies)
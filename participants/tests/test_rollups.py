@@ -0,0 +1,63 @@
+from django.db.models import Count
+from django.urls import reverse
+
+from .. import rollups
+from ..models import Participant
+from .base import RosterTestCase
+
+
+class RollupTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(30)
+
+    def rollup(self, **params):
+        response = self.client.get(reverse('rollup_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_drill_down_matches_the_roster(self):
+        data = self.rollup(attended='1', group_by='nationality')
+        expected = dict(
+            Participant.objects.filter(event=self.event, attended=True)
+            .values_list('nationality').annotate(n=Count('id')).order_by()
+        )
+        self.assertEqual({row['nationality']: row['count'] for row in data['rows']}, expected)
+        self.assertEqual(data['total'], sum(expected.values()))
+
+        unpaid = Participant.objects.filter(event=self.event, paid=False, free_access=False).count()
+        self.assertEqual(self.rollup(payment='unpaid')['total'], unpaid)
+        self.assertEqual(self.rollup(nationality='Egypt', payment='free')['total'],
+                         Participant.objects.filter(event=self.event, nationality='Egypt', free_access=True).count())
+
+    def test_cube_follows_the_data_version(self):
+        before = self.rollup()
+        with self.assertNumQueries(1):  # the version lookup; the cells come from the cache
+            rollups.cube(self.event)
+        Participant.objects.create(event=self.event, full_name='Late Arrival', nationality='Oman')
+        after = self.rollup()
+        self.assertGreater(after['version'], before['version'])
+        self.assertEqual(after['total'], before['total'] + 1)
+
+    def test_group_by_several_dimensions(self):
+        rows = self.rollup(group_by='payment,attended')['rows']
+        self.assertEqual({tuple(row) for row in rows}, {('payment', 'attended', 'count')})
+        self.assertEqual(sum(row['count'] for row in rows), 30)
+        self.assertEqual(rows, sorted(rows, key=lambda row: -row['count']))
+
+    def test_unknown_parameters_are_ignored(self):
+        data = self.rollup(group_by='shoe_size', payment='maybe', attended='yes')
+        self.assertEqual((data['filters'], data['group_by']), ({}, rollups.DIMENSIONS))
+        self.assertEqual(data['total'], 30)
+
+    def test_empty_selection(self):
+        data = self.rollup(nationality='Atlantis')
+        self.assertEqual((data['total'], data['rows']), (0, []))
+
+    def test_headline_counts_cover_the_events_meal_days(self):
+        self.event.meal_days = 2
+        self.event.save()
+        counts = rollups.headline_counts(self.event)
+        self.assertEqual(counts['paid'] + counts['free'] + counts['unpaid'], counts['total'])
+        self.assertIn('lunch_day2', counts)
+        self.assertNotIn('breakfast_day3', counts)
@@ -0,0 +1,78 @@
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import scanindex, versioning
+from ..models import Participant
+from .base import RosterTestCase
+
+
+class ScanIndexTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(SCAN_INDEX_ENABLED=True, SCAN_INDEX_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.event, self.participant = self.make_roster(20)
+        self.assertEqual(scanindex.build(self.event), 20)
+        self.event.refresh_from_db()
+
+    def test_lookup(self):
+        p = self.participant
+        self.assertEqual(scanindex.lookup(self.event, p.full_name, p.nationality), (p.id, True))
+        self.assertEqual(scanindex.lookup(self.event, 'Nobody Known', 'Nowhere'), (None, True))
+
+    def test_stale_index_schedules_a_rebuild(self):
+        versioning.bump(self.event.id, roster=True)
+        self.event.refresh_from_db()
+        with mock.patch.object(scanindex, 'REBUILD_INTERVAL', 0), \
+                mock.patch.object(scanindex._executor, 'submit') as submit:
+            self.assertEqual(scanindex.lookup(self.event, 'Nobody Known', 'Nowhere'), (None, False))
+            scanindex.lookup(self.event, 'Nobody Known', 'Nowhere')
+        submit.assert_called_once()  # one queued rebuild per event
+        scanindex._pending.clear()
+
+    def fresh(self):
+        self.event.refresh_from_db()
+        return scanindex.lookup(self.event, 'Nobody Known', 'Nowhere')[1]
+
+    def test_scans_and_toggles_keep_it_fresh(self):
+        p = self.participant
+        self.client.post(reverse('scan_qr'), {'qr_data': f"{p.full_name}|{p.nationality}"})
+        self.client.post(reverse('toggle_presence', args=[p.id]))
+        self.client.post(reverse('toggle_meal', args=[p.id, 'lunch_day2']))
+        self.client.post(reverse('toggle_payment', args=[p.id]))
+        self.assertTrue(self.fresh())
+
+    def test_key_changes_make_it_stale(self):
+        p = Participant.objects.get(pk=self.participant.pk)
+        p.full_name = 'Renamed Person'
+        p.save()
+        self.assertFalse(self.fresh())
+        scanindex.build(self.event)
+        self.assertTrue(self.fresh())
+        Participant.objects.create(event=self.event, full_name='Late Arrival', nationality='Oman')
+        self.assertFalse(self.fresh())
+        scanindex.build(self.event)
+        self.client.post(reverse('delete_participant', args=[p.id]))
+        self.assertFalse(self.fresh())
+
+    def test_renamed_participant_is_found_through_the_database(self):
+        p = Participant.objects.get(pk=self.participant.pk)
+        p.full_name = 'Renamed Person'
+        p.save()
+        with mock.patch.object(scanindex, 'schedule_rebuild'):
+            response = self.client.post(reverse('scan_qr'), {'qr_data': f"Renamed Person|{p.nationality}"})
+        self.assertContains(response, 'Renamed Person')
+
+    def test_index_from_an_older_format_is_ignored(self):
+        path = scanindex.index_path(self.event.id)
+        with open(path, 'r+b') as f:
+            f.write(b'SIX2')
+        scanindex._maps.clear()
+        with mock.patch.object(scanindex, 'schedule_rebuild'):
+            self.assertIsNone(scanindex.lookup(self.event, 'Nobody Known', 'Nowhere'))
@@ -0,0 +1,61 @@
+import gzip
+import json
+from datetime import date
+
+from django.urls import reverse
+
+from .. import snapshots, versioning
+from ..models import MEAL_BITS, Event, Participant
+from .base import RosterTestCase
+
+
+class RosterSnapshotTests(RosterTestCase):
+    def test_revalidation(self):
+        event, participant = self.make_roster(5)
+        response = self.client.get(reverse('roster_snapshot'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['rows']), 5)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(reverse('roster_snapshot'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        participant.is_present = not participant.is_present
+        participant.save()
+        response = self.client.get(reverse('roster_snapshot'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip(self):
+        self.make_roster(3)
+        response = self.client.get(reverse('roster_snapshot'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['rows']), 3)
+
+    def test_rows(self):
+        event, _ = self.make_roster(0)
+        other = Event.objects.create(name='Other', start_date=date(2025, 11, 3))
+        Participant.objects.create(event=other, full_name='Elsewhere', nationality='Oman')
+        p = Participant(event=event, full_name=' Amira Haddad ', nationality='Tunisia', free_access=True, is_present=True)
+        p.set_meal('lunch_day2', True)
+        p.save()
+        data = self.client.get(reverse('roster_snapshot')).json()
+        self.assertEqual(data['fields'], snapshots.FIELDS)
+        self.assertEqual(data['rows'], [[p.id, 'Amira Haddad|Tunisia', snapshots.PAYMENT_CODES['free'], 1,
+                                         MEAL_BITS['lunch_day2']]])
+        self.assertEqual(data['meal_fields'][MEAL_BITS['lunch_day2'].bit_length() - 1], 'lunch_day2')
+
+    def test_built_once_per_version(self):
+        event, _ = self.make_roster(3)
+        etag = self.client.get(reverse('roster_snapshot'))['ETag']
+        version, _ = versioning.current(event.id)
+        with self.assertNumQueries(0):
+            snapshots.compressed_roster(event, version)
+        # Any of several tags the station holds is enough
+        response = self.client.get(reverse('roster_snapshot'), HTTP_IF_NONE_MATCH=f'"roster-0-0", {etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_tags_differ_between_events(self):
+        first, _ = self.make_roster(2)
+        etag = self.client.get(reverse('roster_snapshot'))['ETag']
+        self.make_roster(2)  # now the current event
+        response = self.client.get(reverse('roster_snapshot'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,47 @@
+import io
+
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase, override_settings
+
+from ..models import CustomUser, Event, Participant
+from .base import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class StressCommandTests(TransactionTestCase):
+    # The stations are threads with their own connections, so nothing can hide in a
+    # test transaction they cannot see. The in-memory test database locks whole tables
+    # between connections, so runs with several stations only check the bookkeeping.
+
+    def stress(self, **options):
+        out = io.StringIO()
+        call_command('stress_checkin', participants=12, rounds=4, seed=7, stdout=out, **options)
+        return out.getvalue()
+
+    def test_run_adds_up_and_cleans_up(self):
+        output = self.stress(stations=1, duplicates=2)
+        self.assertIn("Consistency check passed", output)
+        self.assertIn("12 participants, 1 stations x 4 rounds, 1 shared, 2 duplicated", output)
+        self.assertRegex(output, r"scan\s+4 ok")
+        self.assertIn(" 0 errors", output)
+        self.assertFalse(Event.objects.filter(name__startswith="Stress test").exists())
+        self.assertFalse(Participant.objects.exists())
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_stations_run_concurrently(self):
+        output = self.stress(stations=3, overlap=0.5)
+        self.assertIn("12 participants, 3 stations x 4 rounds, 6 shared", output)
+        self.assertRegex(output, r"Consistency check (passed|FAILED)")
+        self.assertFalse(Event.objects.filter(name__startswith="Stress test").exists())
+
+    def test_keep(self):
+        output = self.stress(stations=1, keep=True)
+        event = Event.objects.get(name__startswith="Stress test")
+        self.assertIn(f"Kept event #{event.id}", output)
+        self.assertEqual(Participant.objects.filter(event=event).count(), 12)
+
+    def test_bad_options(self):
+        with self.assertRaisesMessage(CommandError, "Unknown meal field"):
+            self.stress(meal='dinner_day1')
+        with self.assertRaisesMessage(CommandError, "one participant per station"):
+            self.stress(stations=20)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import versioning
+from ..models import CustomUser, ImportJob, Participant
+from .base import RosterTestCase
+
+
+@mock.patch('participants.jobs.submit')
+class ResumableUploadTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, _ = self.make_roster(0)
+        import_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(import_dir.cleanup)
+        override = override_settings(IMPORT_DIR=import_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.body = bytes(range(256)) * 40
+
+    def start(self, checksum=None):
+        response = self.client.post(reverse('start_import_upload'), json.dumps({
+            'file_name': 'roster.xlsx', 'size': len(self.body),
+            'sha256': checksum or hashlib.sha256(self.body).hexdigest(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def put(self, upload, offset, data):
+        return self.client.put(f"{reverse('import_upload_chunk', args=[upload])}?offset={offset}", data,
+                               content_type='application/octet-stream')
+
+    def test_resume(self, submit):
+        upload = self.start()['upload']
+        self.assertEqual(self.put(upload, 0, self.body[:4000]).json()['offset'], 4000)
+        # A reload announces the same file and picks up where the bytes stopped
+        self.assertEqual(self.start()['offset'], 4000)
+        retry = self.put(upload, 0, self.body[:4000])
+        self.assertEqual((retry.status_code, retry.json()['offset']), (409, 4000))
+        done = self.put(upload, 4000, self.body[4000:]).json()
+        job = ImportJob.objects.get(pk=done['job']['id'])
+        self.assertEqual(job.checksum, hashlib.sha256(self.body).hexdigest())
+        with open(job.file_path, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        submit.assert_called_once_with(job)
+        # The same file again is recognised as already imported
+        self.assertTrue(self.start().get('duplicate'))
+
+    def test_checksum_mismatch(self, submit):
+        upload = self.start(checksum='0' * 64)['upload']
+        response = self.put(upload, 0, self.body)
+        self.assertEqual((response.status_code, response.json()['offset']), (422, 0))
+        self.assertEqual(self.client.get(reverse('import_upload_chunk', args=[upload])).status_code, 404)
+        self.assertFalse(ImportJob.objects.exists())
+        submit.assert_not_called()
+
+    def finish(self):
+        upload = self.start()['upload']
+        job = ImportJob.objects.get(pk=self.put(upload, 0, self.body).json()['job']['id'])
+        return job
+
+    def test_done_import_is_skipped_until_the_event_changes(self, submit):
+        job = self.finish()
+        job.status = 'done'
+        job.data_version = versioning.current(self.event.id)[0]
+        job.save()
+        self.assertEqual(self.start().get('job', {}).get('id'), job.id)
+        Participant.objects.create(event=self.event, full_name='Hand Added', nationality='Oman')
+        again = self.start()
+        self.assertNotIn('duplicate', again)
+        self.assertEqual(again['offset'], 0)
+
+    def test_failed_import_is_not_a_duplicate(self, submit):
+        job = self.finish()
+        job.status = 'failed'
+        job.save()
+        self.assertNotIn('duplicate', self.start())
+
+    def test_uploads_are_private(self, submit):
+        upload = self.start()['upload']
+        other = CustomUser.objects.create(username='other', role='super_admin')
+        self.client.force_login(other)
+        self.assertEqual(self.put(upload, 0, self.body[:10]).status_code, 404)
+
+    def test_gap_is_refused(self, submit):
+        upload = self.start()['upload']
+        response = self.put(upload, 100, self.body[100:200])
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 0))
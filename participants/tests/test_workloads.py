@@ -0,0 +1,65 @@
+from unittest import mock, skipIf
+
+from django.urls import reverse
+
+from .. import exports, workloads
+from .base import RosterTestCase
+
+
+@skipIf(workloads.SLOTS != 1 or workloads.BACKGROUND_SLOTS != 1, "expects the default single slots")
+class WorkloadIsolationTests(RosterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_roster(5)
+        patcher = mock.patch.object(workloads, 'time')
+        self.sleep = patcher.start().sleep
+        self.addCleanup(patcher.stop)
+
+    def hold(self, pool='heavy'):
+        slot = workloads.try_acquire(pool)
+        self.assertIsNotNone(slot)
+        self.addCleanup(slot.release)
+        return slot
+
+    def test_heavy_request_turned_away_when_slots_are_taken(self):
+        self.hold()
+        response = self.client.get(reverse('ai_report'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(workloads.RETRY_AFTER))
+        self.assertIn('error', response.json())
+        # Turned away at once, not queued in the worker
+        self.sleep.assert_not_called()
+        # Check-in is never queued behind heavy work
+        self.assertEqual(self.client.get(reverse('checkin')).status_code, 200)
+
+    @skipIf(exports.pa is None, "pyarrow is not installed")
+    def test_streamed_response_keeps_the_slot_until_closed(self):
+        response = self.client.get(reverse('export_snapshot'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(workloads.try_acquire())
+        b''.join(response.streaming_content)  # the test client closes the response at the end
+        self.hold()
+
+    def test_background_import_does_not_take_the_request_slot(self):
+        self.hold('background')
+        self.assertNotEqual(self.client.get(reverse('ai_report')).status_code, 503)
+
+    def test_busy_request_slot_does_not_hold_up_imports(self):
+        self.hold()
+        slot = workloads.wait_for_slot(lambda: False)
+        self.assertIsNotNone(slot)
+        slot.release()
+        self.sleep.assert_not_called()
+
+    def test_waiting_import_stops_when_cancelled(self):
+        self.hold('background')
+        cancelled = mock.Mock(side_effect=[False, False, True])
+        self.assertIsNone(workloads.wait_for_slot(cancelled))
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_waiting_import_gets_a_freed_slot(self):
+        held = self.hold('background')
+        self.sleep.side_effect = lambda seconds: held.release()
+        slot = workloads.wait_for_slot(lambda: False)
+        self.assertIsNotNone(slot)
+        slot.release()
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; concurrent appends just aren't serialized there
+    fcntl = None
+
+# Resumable spreadsheet uploads. The client announces the file (name, size, SHA-256),
+# then PUTs consecutive chunks at the offset the server reports. State is just the
+# partial file and a small JSON sidecar under IMPORT_DIR/uploads, so any worker on
+# the host can take the next chunk and a dropped connection resumes where the bytes
+# stopped. The session id is derived from event, user and checksum: announcing the
+# same file again after a reload picks the same session back up.
+
+CHUNK_SIZE = 1024 * 1024  # what the client is told to send
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_FILE_SIZE = getattr(settings, 'IMPORT_MAX_UPLOAD_SIZE', 200 * 1024 * 1024)
+EXPIRY = 24 * 60 * 60  # seconds an abandoned partial upload is kept
+READ_BLOCK = 64 * 1024
+
+_CHECKSUM = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def upload_dir():
+    return os.path.join(settings.IMPORT_DIR, 'uploads')
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def purge_expired(now=None):
+    """Drop partial uploads nobody has touched for EXPIRY seconds."""
+    now = now or time.time()
+    try:
+        names = os.listdir(upload_dir())
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(upload_dir(), name)
+        try:
+            if now - os.path.getmtime(path) > EXPIRY:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class Upload:
+    """One resumable upload session."""
+
+    def __init__(self, upload_id, meta):
+        self.id = upload_id
+        self.meta = meta
+
+    @staticmethod
+    def _paths(upload_id):
+        base = os.path.join(upload_dir(), upload_id)
+        return base + '.part', base + '.json'
+
+    @property
+    def part_path(self):
+        return self._paths(self.id)[0]
+
+    @property
+    def size(self):
+        return self.meta['size']
+
+    @property
+    def offset(self):
+        try:
+            return os.path.getsize(self.part_path)
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def start(cls, event_id, user_id, file_name, size, checksum, update_existing):
+        """Open (or resume) the session for this file."""
+        checksum = str(checksum).lower()
+        if not _CHECKSUM.match(checksum):
+            raise UploadError("sha256 must be 64 hex characters")
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError("size must be a positive integer")
+        if size > MAX_FILE_SIZE:
+            raise UploadError(f"File is larger than {MAX_FILE_SIZE // (1024 * 1024)} MB", status=413)
+        os.makedirs(upload_dir(), exist_ok=True)
+        purge_expired()
+        upload_id = f"{event_id}-{user_id}-{checksum}"
+        part_path, meta_path = cls._paths(upload_id)
+        meta = {
+            'event': event_id, 'user': user_id, 'file_name': os.path.basename(str(file_name)) or 'upload.xlsx',
+            'size': size, 'sha256': checksum, 'update_existing': bool(update_existing),
+        }
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        open(part_path, 'ab').close()
+        return cls(upload_id, meta)
+
+    @classmethod
+    def get(cls, upload_id):
+        if not re.match(r'^\d+-\d+-[0-9a-f]{64}$', upload_id):
+            return None
+        try:
+            with open(cls._paths(upload_id)[1]) as f:
+                return cls(upload_id, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def append(self, offset, stream, length):
+        """Write `length` bytes from `stream` at `offset`; returns the new offset.
+
+        Only the next byte may be written: a chunk for any other offset (a retry of
+        one that already landed, or a race) is refused with the current offset.
+        """
+        if length > MAX_CHUNK_SIZE:
+            raise UploadError(f"Chunks are limited to {MAX_CHUNK_SIZE} bytes", status=413)
+        with open(self.part_path, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            current = f.seek(0, os.SEEK_END)
+            if offset != current:
+                raise UploadError("Offset mismatch", status=409, offset=current)
+            if current + length > self.size:
+                raise UploadError("Chunk runs past the announced size", status=413, offset=current)
+            remaining = length
+            while remaining:
+                block = stream.read(min(READ_BLOCK, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+            f.flush()
+            if remaining:
+                # Connection dropped mid-chunk: keep nothing of it, the client resends
+                f.truncate(current)
+                raise UploadError("Chunk ended early", offset=current)
+            return current + length
+
+    @property
+    def complete(self):
+        return self.offset == self.size
+
+    def finish(self):
+        """Verify the assembled file and move it into IMPORT_DIR; returns its path."""
+        if file_checksum(self.part_path) != self.meta['sha256']:
+            self.discard()
+            raise UploadError("Checksum mismatch; the upload has to start over", status=422, offset=0)
+        fd, file_path = tempfile.mkstemp(suffix='.xlsx', dir=settings.IMPORT_DIR)
+        os.close(fd)
+        os.replace(self.part_path, file_path)
+        self.discard()
+        return file_path
+
+    def discard(self):
+        for path in self._paths(self.id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -10,11 +10,23 @@ urlpatterns = [
     path('mark-present/<int:participant_id>/', views.mark_present, name='mark_present'),
     path('participant/<int:participant_id>/', views.participant_detail_view, name='participant_detail'),
     path('api/stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('api/metrics/', views.metrics_api, name='metrics_api'),
+    path('api/arrivals/', views.arrivals_api, name='arrivals_api'),
+    path('api/rollup/', views.rollup_api, name='rollup_api'),
+    path('api/changes/', views.participant_changes, name='participant_changes'),
+    path('api/participants/bulk/', views.bulk_update_participants, name='bulk_update_participants'),
+    path('api/roster-snapshot/', views.roster_snapshot, name='roster_snapshot'),
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('offline/', views.offline, name='offline'),
     path('search/', views.search_participant, name='search_participant'),
     path('api/ai-report/', views.ai_report, name='ai_report'),
     path('export/', views.export_participants, name='export_participants'),
+    path('export/snapshot/', views.export_snapshot, name='export_snapshot'),
     path('toggle-presence/<int:participant_id>/', views.toggle_presence, name='toggle_presence'),
     path('admin-panel/', views.admin_panel, name='admin_panel'),
+    path('events/switch/', views.switch_event, name='switch_event'),
+    path('admin-panel/profiles/', views.profiles_list, name='profiles_list'),
+    path('admin-panel/profiles/<str:file_name>/', views.profile_download, name='profile_download'),
     path('admin-panel/create-user/', views.create_admin_user, name='create_admin_user'),
     path('admin-panel/edit-role/<int:user_id>/', views.edit_admin_role, name='edit_admin_role'),
     path('admin-panel/delete-user/<int:user_id>/', views.delete_admin_user, name='delete_admin_user'),
@@ -25,5 +37,9 @@ urlpatterns = [
     path('participant/<int:participant_id>/delete/', views.delete_participant, name='delete_participant'),
     path('participants/bulk-delete/', views.bulk_delete_participants, name='bulk_delete_participants'),
     path('import-real/', views.import_real_participants, name='import_real_participants'),
+    path('api/import-uploads/', views.start_import_upload, name='start_import_upload'),
+    path('api/import-uploads/<str:upload_id>/', views.import_upload_chunk, name='import_upload_chunk'),
+    path('api/import-jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
+    path('import-jobs/<int:job_id>/cancel/', views.cancel_import_job, name='cancel_import_job'),
     path('participants/delete-all/', views.delete_all_participants, name='delete_all_participants'),
 ]
\ No newline at end of file
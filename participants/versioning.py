@@ -0,0 +1,99 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import events
+from .models import Event
+
+
+def _changes(roster):
+    changes = {'data_version': F('data_version') + 1, 'data_changed_at': timezone.now()}
+    if roster:
+        changes['roster_version'] = F('roster_version') + 1
+    return changes
+
+
+def bump(event_id, roster=False):
+    """Mark the event's participant data as changed (atomic, shared by all workers).
+
+    Pass `roster=True` when participants were added or removed, or a name or
+    nationality changed.
+    """
+    Event.objects.filter(pk=event_id).update(**_changes(roster))
+
+
+def bump_all(roster=False):
+    Event.objects.update(**_changes(roster))
+
+
+def current(event_id):
+    """(data_version, data_changed_at) as stored right now."""
+    return Event.objects.values_list('data_version', 'data_changed_at').get(pk=event_id)
+
+
+def roster_stamp():
+    """Token that changes with the event list or any event's roster, but not with scans."""
+    agg = Event.objects.aggregate(version=Sum('roster_version'), events=Count('id'), last=Max('id'))
+    return f"{agg['version'] or 0}.{agg['events']}.{agg['last'] or 0}"
+
+
+def current_event_version(request, *args, **kwargs):
+    """(event id, data_version, data_changed_at) of the event picked in the session."""
+    event = events.get_current_event(request)
+    return event and (event.pk, event.data_version, event.data_changed_at)
+
+
+def _validators(request, version_of, *args, **kwargs):
+    """(etag, last_modified) for a read view, or (None, None) when it has to render."""
+    if not hasattr(request, '_data_validators'):
+        request._data_validators = (None, None)
+        reusable = (
+            request.user.is_authenticated
+            and not len(get_messages(request))  # pending flash messages must be shown
+            and 'from_scan' not in request.GET  # scan visits are recorded by the view
+        )
+        state = reusable and version_of(request, *args, **kwargs)
+        if state:
+            event_id, version, changed_at = state
+            if changed_at is not None:
+                # Pages embed the user's menus, the picked event and a CSRF token, so tie the tag to them
+                owner = ':'.join(str(part) for part in (
+                    request.user.pk,
+                    request.user.role,
+                    request.session.get(events.SESSION_KEY, ''),
+                    request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+                ))
+                stamp = f"{event_id}.{version}.{changed_at.timestamp():.6f}"
+                digest = hashlib.md5(owner.encode('utf-8')).hexdigest()[:12]
+                request._data_validators = (f'"{stamp}-{digest}"', changed_at)
+    return request._data_validators
+
+
+def conditional(view=None, *, version_of=current_event_version):
+    """ETag/Last-Modified from the data version; unchanged data answers 304 before the view runs.
+
+    The validators follow the data version of the event the page shows, so writes to
+    other events leave them alone. `version_of(request, *args, **kwargs)` picks that
+    event; by default it is the current one.
+    """
+    if view is None:
+        return lambda view: conditional(view, version_of=version_of)
+    checked = condition(
+        etag_func=lambda request, *args, **kwargs: _validators(request, version_of, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: _validators(request, version_of, *args, **kwargs)[1],
+    )(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = checked(request, *args, **kwargs)
+        if response.has_header('ETag'):
+            # Always revalidate; the 304 is what keeps this cheap
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
@@ -2,6 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from .models import Participant
 from django.db.models import Count, Q
+from django.db.models.functions import TruncMinute
 from django.shortcuts import render
 from django.contrib import messages
 from django.urls import reverse
@@ -9,12 +10,21 @@ from django.http import JsonResponse
 from huggingface_hub import InferenceClient
 import os
 import pandas as pd
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404
+import tempfile
+import gzip
+import json
+from django.utils.http import http_date
 from django.contrib.auth.models import User
-from .models import Participant, CustomUser, AdminActionLog  # ← THIS IS CRITICAL
+from .models import MEAL_BITS, Participant, CustomUser, AdminActionLog, Event, ImportJob  # ← THIS IS CRITICAL
 from django.core.paginator import Paginator
-from django.db import transaction
 from decouple import config
+from django.conf import settings
+import hashlib
+import time
+from . import assets, bulk, exports, fuzzy, jobs, journal, metrics, profiling, rollups, scanindex, snapshots, uploads, versioning
+from .events import event_required, get_current_event, set_current_event
+from .replica import replica_reads
 
 HF_API_KEY = config('HF_API_KEY', default=None)
 
@@ -31,15 +41,56 @@ def admin_panel(request):
         return redirect('dashboard')
     
     users = CustomUser.objects.filter(is_staff=True).exclude(id=request.user.id)
-    logs = AdminActionLog.objects.select_related('user').order_by('-timestamp')[:20]  # Last 20 actions
+    event = get_current_event(request)
+    logs = AdminActionLog.objects.filter(
+        Q(event=event) | Q(event__isnull=True)
+    ).select_related('user').order_by('-timestamp')[:20]  # Last 20 actions
     
     return render(request, 'participants/admin_panel.html', {
         'users': users,
         'logs': logs
     })
 
-def log_admin_action(user, action):
-    AdminActionLog.objects.create(user=user, action=action)
+@login_required
+def profiles_list(request):
+    if not request.user.is_super_admin:
+        messages.error(request, "Access denied.")
+        return redirect('dashboard')
+    return render(request, 'participants/profiles.html', {
+        'profiles': profiling.list_profiles(),
+        'enabled': profiling.ENABLED,
+        'slow_ms': profiling.SLOW_MS,
+        'sample_rate': profiling.SAMPLE_RATE,
+    })
+
+@login_required
+def profile_download(request, file_name):
+    if not request.user.is_super_admin:
+        messages.error(request, "Access denied.")
+        return redirect('dashboard')
+    path = profiling.profile_path(file_name)
+    if path is None:
+        raise Http404("Profile not found")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=file_name)
+
+def log_admin_action(user, action, event=None):
+    AdminActionLog.objects.create(user=user, action=action, event=event)
+
+@login_required
+def switch_event(request):
+    if request.method == "POST":
+        event = get_object_or_404(Event, id=request.POST.get('event_id'), is_archived=False)
+        set_current_event(request, event)
+        messages.success(request, f"✅ Now working on: {event.name}")
+        return redirect(request.POST.get('next') or 'dashboard')
+    return render(request, 'participants/events.html', {'events': Event.objects.filter(is_archived=False)})
+
+def _event_participant(request, participant_id):
+    """The participant in the URL, if they belong to the event being worked on."""
+    event = get_current_event(request)
+    participant = get_object_or_404(Participant, id=participant_id, event=event)
+    participant.event = event  # already loaded; saves templates a query
+    return participant
 
 @login_required
 def create_admin_user(request):
@@ -66,22 +117,25 @@ def create_admin_user(request):
     return render(request, 'participants/create_admin.html')
 
 @login_required
+@event_required
 def delete_participant(request, participant_id):
     if not request.user.is_super_admin:
         messages.error(request, "Only Super Admins can delete participants.")
         return redirect('participants_list')
     
-    participant = get_object_or_404(Participant, id=participant_id)
+    participant = _event_participant(request, participant_id)
     
     if request.method == "POST":
         name = participant.full_name
-        participant.delete()
-        log_admin_action(request.user, f"DELETED participant: {name}")
+        journal.delete(participant.event_id, Participant.objects.filter(pk=participant.pk))
+        versioning.bump(participant.event_id, roster=True)
+        log_admin_action(request.user, f"DELETED participant: {name}", participant.event)
         messages.success(request, f"✅ Participant '{name}' deleted.")
     
     return redirect('participants_list')
 
 @login_required
+@event_required
 def bulk_delete_participants(request):
     if not request.user.is_super_admin:
         messages.error(request, "Only Super Admins can delete participants.")
@@ -93,21 +147,18 @@ def bulk_delete_participants(request):
             messages.warning(request, "No participants selected for deletion.")
             return redirect('participants_list')
         
-        deleted_count = 0
-        deleted_names = []
-        for pid in selected_ids:
-            try:
-                p = Participant.objects.get(id=pid)
-                deleted_names.append(p.full_name)
-                p.delete()
-                deleted_count += 1
-            except Participant.DoesNotExist:
-                continue
+        event = get_current_event(request)
+        # One DELETE for the whole selection (ids from other events are ignored)
+        targets = Participant.objects.filter(id__in=[pid for pid in selected_ids if pid.isdigit()], event=event)
+        deleted_names = list(targets.values_list('full_name', flat=True)[:4])
+        deleted_count = journal.delete(event.id, targets)
         
         if deleted_count > 0:
+            versioning.bump(event.id, roster=True)
             log_admin_action(
                 request.user,
-                f"BULK DELETED {deleted_count} participants: {', '.join(deleted_names[:3])}{'...' if len(deleted_names) > 3 else ''}"
+                f"BULK DELETED {deleted_count} participants: {', '.join(deleted_names[:3])}{'...' if len(deleted_names) > 3 else ''}",
+                event
             )
             messages.success(request, f"✅ Deleted {deleted_count} participant(s).")
         else:
@@ -116,17 +167,20 @@ def bulk_delete_participants(request):
     return redirect('participants_list')
 
 @login_required
+@event_required
 def delete_all_participants(request):
     if not request.user.is_super_admin:
         messages.error(request, "Only Super Admins can delete all participants.")
         return redirect('participants_list')
     
+    event = get_current_event(request)
+    participants = Participant.objects.filter(event=event)
     if request.method == "POST":
         confirmation = request.POST.get('confirmation', '').strip()
         if confirmation == 'DELETE ALL':
-            count = Participant.objects.count()
-            Participant.objects.all().delete()
-            log_admin_action(request.user, f"DELETED ALL {count} PARTICIPANTS")
+            count = journal.delete(event.id, participants)
+            versioning.bump(event.id, roster=True)
+            log_admin_action(request.user, f"DELETED ALL {count} PARTICIPANTS", event)
             messages.success(request, f"✅ All {count} participants have been permanently deleted.")
             return redirect('participants_list')
         else:
@@ -134,10 +188,11 @@ def delete_all_participants(request):
     
     # At the end of the view (before return):
     return render(request, 'participants/confirm_delete_all.html', {
-        'total_count': Participant.objects.count()
+        'total_count': participants.count()
     })
 
 @login_required
+@event_required
 def add_participant(request):
     if not request.user.is_super_admin:
         messages.error(request, "Only Super Admins can add participants.")
@@ -164,19 +219,22 @@ def add_participant(request):
         else:  # unpaid
             paid, free_access = False, False
 
+        event = get_current_event(request)
         participant = Participant.objects.create(
+            event=event,
             full_name=full_name,
             nationality=nationality,
             paid=paid,
             free_access=free_access
         )
-        log_admin_action(request.user, f"ADDED new participant: {full_name} ({nationality})")
+        log_admin_action(request.user, f"ADDED new participant: {full_name} ({nationality})", event)
         messages.success(request, f"✅ Participant '{full_name}' added successfully!")
         return redirect('participants_list')
     
     return render(request, 'participants/add_participant.html')
 
 @login_required
+@event_required
 def import_real_participants(request):
     if not request.user.is_super_admin:
         messages.error(request, "Only Super Admins can import real data.")
@@ -188,62 +246,177 @@ def import_real_participants(request):
             messages.error(request, "Please upload an Excel file.")
             return render(request, 'participants/import_real.html')
         
-        try:
-            # Read Excel file
-            df = pd.read_excel(excel_file)
-            
-            # Validate columns
-            required_cols = ['Full Name', 'Nationality', 'Payment Status']
-            if not all(col in df.columns for col in required_cols):
-                messages.error(request, f"Missing columns. Required: {', '.join(required_cols)}")
-                return render(request, 'participants/import_real.html')
-            
-            created = 0
-            with transaction.atomic():  # Rollback on error
-                # In import_real_participants view
-                for _, row in df.iterrows():
-                    full_name = str(row['Full Name']).strip()
-                    nationality = str(row['Nationality']).strip()
-                    payment_status = str(row['Payment Status']).strip()
-                    
-                    if not full_name or not nationality:
-                        continue
-                                                    
-                # ✅ CORRECT MAPPING
-                    if payment_status.lower() in ['paid', 'yes', 'true']:
-                        paid = True
-                        free_access = False
-                    elif payment_status.lower() in ['free access', 'free']:
-                        paid = False
-                        free_access = True
-                    else:  # unpaid, no, false, etc.
-                        paid = False
-                        free_access = False
-                    
-                    obj, new = Participant.objects.get_or_create(
-                        full_name=full_name,
-                        nationality=nationality,
-                        defaults={'paid': paid, 'free_access': free_access}
-                    )
-                    if new:
-                        created += 1
-            
-            messages.success(request, f"✅ Successfully imported {created} real participants!")
-            return redirect('admin_panel')
-            
-        except Exception as e:
-            messages.error(request, f"❌ Import failed: {str(e)}")
+        # Park the upload on disk and let a background job parse and write it in chunks
+        os.makedirs(settings.IMPORT_DIR, exist_ok=True)
+        fd, file_path = tempfile.mkstemp(suffix='.xlsx', dir=settings.IMPORT_DIR)
+        digest = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as destination:
+            for chunk in excel_file.chunks():
+                destination.write(chunk)
+                digest.update(chunk)
+        
+        event = get_current_event(request)
+        update_existing = request.POST.get('update_existing') == 'on'
+        previous = _imported_job(event, digest.hexdigest(), update_existing)
+        if previous:
+            os.remove(file_path)
+            messages.info(request, f"This file was already imported (job #{previous.id}); nothing to do.")
+            return redirect(f"{reverse('import_real_participants')}?job={previous.id}")
+        job = _start_import(request, event, excel_file.name, file_path, digest.hexdigest(), update_existing)
+        return redirect(f"{reverse('import_real_participants')}?job={job.id}")
     
-    return render(request, 'participants/import_real.html')
+    job = None
+    if request.GET.get('job', '').isdigit():
+        job = ImportJob.objects.filter(id=int(request.GET['job']), event=get_current_event(request)).first()
+    return render(request, 'participants/import_real.html', {'job': job})
+
+def _imported_job(event, checksum, update_existing):
+    # The same bytes being imported now, or imported with nothing written to the event
+    # since, would change nothing. Once participants were edited or deleted (or a
+    # "delete all" ran) the file is imported again. Jobs orphaned by a worker restart
+    # don't count.
+    jobs.fail_stale()
+    previous = ImportJob.objects.filter(event=event, checksum=checksum).filter(
+        Q(status__in=jobs.UNFINISHED) | Q(status='done', data_version=event.data_version)
+    )
+    if update_existing:
+        previous = previous.filter(update_existing=True)
+    return previous.order_by('-id').first()
+
+def _start_import(request, event, file_name, file_path, checksum, update_existing):
+    job = ImportJob.objects.create(
+        event=event,
+        user=request.user,
+        file_name=file_name,
+        file_path=file_path,
+        checksum=checksum,
+        update_existing=update_existing,
+    )
+    jobs.submit(job)
+    log_admin_action(request.user, f"STARTED IMPORT of {file_name} (job #{job.id})", event)
+    return job
+
+def _upload_payload(upload, offset=None):
+    return {'upload': upload.id, 'offset': upload.offset if offset is None else offset,
+            'size': upload.size, 'chunk_size': uploads.CHUNK_SIZE}
+
+def _import_started(job, duplicate=False):
+    return JsonResponse({
+        'duplicate': duplicate,
+        'job': _import_job_payload(job),
+        'redirect': f"{reverse('import_real_participants')}?job={job.id}",
+    })
+
+@login_required
+@event_required
+def start_import_upload(request):
+    # Resumable upload, step 1. JSON body: {"file_name", "size", "sha256", "update_existing"}.
+    # Answers the offset to send from (0 for a new file), or the earlier job for a known file.
+    if not request.user.is_super_admin:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    if request.method != "POST":
+        return JsonResponse({'error': 'POST required.'}, status=405)
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    event = get_current_event(request)
+    update_existing = bool(payload.get('update_existing', True))
+    previous = _imported_job(event, str(payload.get('sha256', '')).lower(), update_existing)
+    if previous:
+        return _import_started(previous, duplicate=True)
+    try:
+        upload = uploads.Upload.start(event.id, request.user.id, payload.get('file_name', ''),
+                                      payload.get('size'), payload.get('sha256', ''), update_existing)
+    except uploads.UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse(_upload_payload(upload))
+
+@login_required
+def import_upload_chunk(request, upload_id):
+    # Step 2: GET reports the offset reached; PUT ?offset=N with the raw bytes appends a chunk.
+    # The chunk that completes the file is checked against the sha256 and queued for import.
+    if not request.user.is_super_admin:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    upload = uploads.Upload.get(upload_id)
+    if upload is None or upload.meta['user'] != request.user.id:
+        return JsonResponse({'error': 'Unknown or expired upload; start it again.'}, status=404)
+    if request.method == "GET":
+        return JsonResponse(_upload_payload(upload))
+    if request.method != "PUT":
+        return JsonResponse({'error': 'GET or PUT required.'}, status=405)
+    try:
+        offset = int(request.GET['offset'])
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        upload.append(offset, request, length)
+        if not upload.complete:
+            return JsonResponse(_upload_payload(upload))
+        file_path = upload.finish()
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'offset must be an integer'}, status=400)
+    except uploads.UploadError as e:
+        return JsonResponse({'error': str(e), 'offset': e.offset}, status=e.status)
+    event = get_object_or_404(Event, id=upload.meta['event'])
+    job = _start_import(request, event, upload.meta['file_name'], file_path,
+                        upload.meta['sha256'], upload.meta['update_existing'])
+    return _import_started(job)
+
+def _import_job_payload(job):
+    return {
+        'id': job.id,
+        'file_name': job.file_name,
+        'status': job.status,
+        'finished': job.is_finished,
+        'cancel_requested': job.cancel_requested,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'inserted': job.inserted,
+        'updated': job.updated,
+        'unchanged': job.unchanged,
+        'missing': job.missing,
+        'skipped': job.skipped,
+        'error': job.error,
+        'updated_at': job.updated_at.isoformat(),
+    }
+
+@login_required
+def import_job_status(request, job_id):
+    if not request.user.is_super_admin:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    jobs.fail_stale()
+    job = get_object_or_404(ImportJob, id=job_id)
+    return JsonResponse(_import_job_payload(job))
+
+@login_required
+def cancel_import_job(request, job_id):
+    if not request.user.is_super_admin:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    if request.method != "POST":
+        return JsonResponse({'error': 'POST required.'}, status=405)
+    # The running job checks this flag after every committed chunk
+    ImportJob.objects.filter(id=job_id, status__in=['queued', 'running']).update(cancel_requested=True)
+    job = get_object_or_404(ImportJob, id=job_id)
+    log_admin_action(request.user, f"CANCELLED IMPORT job #{job.id} ({job.file_name})", job.event)
+    return JsonResponse(_import_job_payload(job))
 
 @login_required
+@event_required
 def ai_report(request):
-    # Get stats
-    total = Participant.objects.count()
-    paid = Participant.objects.filter(paid=True).count()
-    present = Participant.objects.filter(is_present=True).count()
-    free= Participant.objects.filter(free_access=True).count()  # ← ADD THIS
+    # Get stats (all from the cached nationality x payment x attendance rollup)
+    event = get_current_event(request)
+    _, cells = rollups.cube(event)
+    by_payment = {row['payment']: row['count'] for row in rollups.drill(cells, group_by=['payment'])}
+    total = sum(by_payment.values())
+    paid = by_payment.get('paid', 0)
+    present = sum(row['count'] for row in rollups.drill(cells, {'attended': True}, ['attended']))
+    free= by_payment.get('free', 0)  # ← ADD THIS
     inpaid = total - paid - free  # 
+    present_by_country = ', '.join(
+        f"{row['nationality']} ({row['count']})" for row in rollups.drill(cells, {'attended': True}, ['nationality'])[:10]
+    ) or 'none yet'
+    unpaid_by_country = ', '.join(
+        f"{row['nationality']} ({row['count']})" for row in rollups.drill(cells, {'payment': 'unpaid'}, ['nationality'])[:10]
+    ) or 'none'
     day_time = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
     # Build prompt
     prompt = f"""
@@ -251,11 +424,14 @@ def ai_report(request):
 
     Your task is to generate a **concise, professional, and daily on demand report and summary about what you have as data, not meaning that the event is complete** based on the following real statistics:
 
+    - Event: {event.name} (starting {event.start_date})
     - Total participants: {total}
     - Paid participants: {paid}
     - Confirmed attendance (present): {present}
     - Unpaid participants: {inpaid}
     - Free Access: {free}
+    - Present delegates by country (top 10): {present_by_country}
+    - Unpaid participants by country (top 10): {unpaid_by_country}
     - Current date and time: {day_time}
 
     - you can check also the website of the event https://acpp-aspp.com/ for more information about the event for each day report.
@@ -282,11 +458,12 @@ def ai_report(request):
     
     try:
         client = InferenceClient(api_key=HF_API_KEY)
-        response = client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3.2-Exp",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=8000
-        )
+        with profiling.timed('external'):
+            response = client.chat.completions.create(
+                model="deepseek-ai/DeepSeek-V3.2-Exp",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=8000
+            )
         ai_text = response.choices[0].message.content.strip()
     except Exception as e:
         ai_text = "walaa-AI report temporarily unavailable. Event is going well!"
@@ -297,11 +474,13 @@ def dashboard(request):
     return render(request, 'participants/dashboard.html')
 
 @login_required
+@event_required
+@replica_reads
 def search_participant(request):
     query = request.GET.get('q', '').strip()
     participants = []
     if query:
-        participants = Participant.objects.filter(
+        participants = Participant.objects.filter(event=get_current_event(request)).filter(
             Q(full_name__icontains=query) | Q(nationality__icontains=query)
         )
     return render(request, 'participants/search_results.html', {
@@ -309,33 +488,28 @@ def search_participant(request):
         'participants': participants
     })
 
+@event_required
+@replica_reads
 def dashboard(request):
-    total = Participant.objects.count()
-    paid = Participant.objects.filter(paid=True).count()
-    free = Participant.objects.filter(free_access=True).count()
-    unpaid = Participant.objects.filter(paid=False, free_access=False).count()
-
-    # PRESENCE = is_present=True OR any meal served
-    meal_fields = [f'{m}_day{d}' for d in range(1,8) for m in ['breakfast','lunch']]
-    q_meals = Q()
-    for field in meal_fields:
-        q_meals |= Q(**{field: True})
-    
-    present = Participant.objects.filter(
-        Q(is_present=True) | q_meals
-    ).count()
-
-    # Meal stats
+    event = get_current_event(request)
+    counts = rollups.headline_counts(event)
+    total = counts['total']
+    paid = counts['paid']
+    free = counts['free']
+    unpaid = counts['unpaid']
+    present = counts['present']
+
+    # Meal stats (one row per meal day of this event)
     meal_data = []
     total_meals = 0
-    for day in range(1, 6):  # ← 1 to 5, not 1 to 8
-        b = Participant.objects.filter(**{f'breakfast_day{day}': True}).count()
-        l = Participant.objects.filter(**{f'lunch_day{day}': True}).count()
+    for day, label in enumerate(event.meal_labels, start=1):
+        b = counts[f'breakfast_day{day}']
+        l = counts[f'lunch_day{day}']
         total_day = b + l
         total_meals += total_day
         meal_data.append({
             'day': day,
-            'date': ['Nov 3', 'Nov 4', 'Nov 5', 'Nov 6', 'Nov 7'][day - 1],
+            'date': label,
             'breakfast': b,
             'lunch': l,
             'total': total_day
@@ -361,27 +535,24 @@ def dashboard(request):
     }
     return render(request, 'participants/dashboard.html', context)
 @login_required
-
+@event_required
+@replica_reads
+@versioning.conditional
 def dashboard_stats(request):
-    total = Participant.objects.count()
-    paid = Participant.objects.filter(paid=True).count()
-    free = Participant.objects.filter(free_access=True).count()
+    event = get_current_event(request)
+    counts = rollups.headline_counts(event)
+    total = counts['total']
+    paid = counts['paid']
+    free = counts['free']
     unpaid = total - paid - free  # more accurate
 
-    # ✅ Only consider meals for days 1–5 (Nov 3–7)
-    meal_fields = [f'{m}_day{d}' for d in range(1, 6) for m in ['breakfast', 'lunch']]  # days 1 to 5
-    q_meals = Q()
-    for field in meal_fields:
-        q_meals |= Q(**{field: True})
-    
-    present = Participant.objects.filter(Q(is_present=True) | q_meals).count()
+    # ✅ Present = checked in or served any meal (denormalized)
+    present = counts['present']
 
-    # ✅ Meal totals for 5 days only
+    # ✅ Meal totals per event day
     meal_days = []
-    for day in range(1, 6):  # days 1 to 5
-        b = Participant.objects.filter(**{f'breakfast_day{day}': True}).count()
-        l = Participant.objects.filter(**{f'lunch_day{day}': True}).count()
-        meal_days.append(b + l)
+    for day in range(1, event.meal_days + 1):
+        meal_days.append(counts[f'breakfast_day{day}'] + counts[f'lunch_day{day}'])
 
     return JsonResponse({
         'total': total,
@@ -389,22 +560,114 @@ def dashboard_stats(request):
         'unpaid': unpaid,
         'free': free,  # optional but useful
         'present': present,
-        'meal_days': meal_days,  # now length = 5
-        'meal_labels': ['Nov 3', 'Nov 4', 'Nov 5', 'Nov 6', 'Nov 7'],  # optional for frontend
+        'meal_days': meal_days,  # one entry per event day
+        'meal_labels': event.meal_labels,  # optional for frontend
     })
 
 @login_required
+@event_required
+def roster_snapshot(request):
+    # Compact roster for check-in stations to resolve QR codes locally.
+    # Clients revalidate with If-None-Match and get a 304 until the data version moves.
+    event = get_current_event(request)
+    version, changed_at = versioning.current(event.id)
+    etag = snapshots.roster_etag(event.id, version)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    else:
+        body = snapshots.compressed_roster(event, version)
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(body, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(body), content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(changed_at.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Accept-Encoding, Cookie'
+    return response
+
+def offline(request):
+    # Shown by the service worker when the server can't be reached; the same for everyone
+    return render(request, 'participants/offline.html')
+
+def service_worker(request):
+    # Served from the site root (not /static/) so it may control every page
+    precache = assets.precache_urls()
+    response = render(request, 'participants/sw.js', {
+        'version': assets.cache_version(precache + [reverse('offline')]),
+        'precache': json.dumps(precache),
+        'offline_url': reverse('offline'),
+        'static_prefix': settings.STATIC_URL,
+    }, content_type='application/javascript')
+    response['Cache-Control'] = 'no-cache'
+    response['Service-Worker-Allowed'] = '/'
+    return response
+
+@login_required
+@event_required
+def rollup_api(request):
+    # Drill-down over the cached cube, e.g. ?attended=1&group_by=nationality or ?payment=unpaid
+    event = get_current_event(request)
+    version, cells = rollups.cube(event)
+
+    filters = {}
+    if request.GET.get('nationality'):
+        filters['nationality'] = request.GET['nationality']
+    if request.GET.get('payment') in ('paid', 'free', 'unpaid'):
+        filters['payment'] = request.GET['payment']
+    if request.GET.get('attended') in ('0', '1'):
+        filters['attended'] = request.GET['attended'] == '1'
+    group_by = [d for d in request.GET.get('group_by', '').split(',') if d in rollups.DIMENSIONS] or rollups.DIMENSIONS
+
+    rows = rollups.drill(cells, filters, group_by)
+    return JsonResponse({
+        'version': version,
+        'filters': filters,
+        'group_by': group_by,
+        'total': sum(row['count'] for row in rows),
+        'rows': rows,
+    })
+
+@login_required
+@event_required
+def arrivals_api(request):
+    # Arrival curve: first check-ins per 15 minutes, from one GROUP BY on first_seen_at
+    bucket_minutes = 15
+    per_minute = (
+        Participant.objects.filter(event=get_current_event(request), first_seen_at__isnull=False)
+        .annotate(minute=TruncMinute('first_seen_at'))
+        .values('minute')
+        .annotate(n=Count('id'))
+        .order_by('minute')
+    )
+    buckets = {}
+    for row in per_minute:
+        start = row['minute'].replace(minute=row['minute'].minute - row['minute'].minute % bucket_minutes)
+        buckets[start] = buckets.get(start, 0) + row['n']
+    return JsonResponse({
+        'bucket_minutes': bucket_minutes,
+        'labels': [start.isoformat() for start in buckets],
+        'counts': list(buckets.values()),
+    })
+
+@login_required
+@event_required
 def checkin_view(request):
     return render(request, 'participants/checkin.html')
 
 @login_required
+@event_required
 def scan_qr(request):
     if request.method == "POST":
         qr_data = request.POST.get('qr_data', '').strip()
+        station = metrics.station_id(request)
+        request.session['station_id'] = station
         
         # Extract name and nationality (ignore payment status in QR)
         parts = qr_data.split('|')
         if len(parts) < 2:
+            metrics.record('scan', station, outcome='invalid')
             return render(request, 'participants/error.html', {
                 'error': 'Invalid QR format. Expected: Name|Country'
             })
@@ -412,38 +675,58 @@ def scan_qr(request):
         full_name = parts[0].strip()
         nationality = parts[1].strip()
 
-        # Find participant by name + nationality
+        # Find participant by name + nationality: the shared scan index gives the id,
+        # the row is then fetched by primary key (and re-checked against the QR parts)
+        event = get_current_event(request)
+        matches = Participant.objects.select_related('event').filter(
+            event=event,
+            full_name=full_name,
+            nationality=nationality
+        )
+        hit = scanindex.lookup(event, full_name, nationality)
+        participant = matches.filter(pk=hit[0]).first() if hit and hit[0] else None
+        if participant is None and not (hit and hit[1]):
+            # No index, or a stale one: the database decides (first registration wins on duplicates)
+            participant = matches.order_by('id').first()
         try:
-            participant = Participant.objects.get(
-                full_name=full_name,
-                nationality=nationality
-            )
+            if participant is None:
+                raise Participant.DoesNotExist
+            metrics.record('scan', station, outcome='found')
+            # Remember when this desk scanned, for scan-to-serve latency
+            request.session['last_scan'] = [participant.id, time.time()]
             # ✅ ADD scan_success HERE, inside the try block
             return render(request, 'participants/participant_detail.html', {
                 'p': participant,
                 'from_scan': True  # ← Use 'from_scan' (better name)
             })
         except Participant.DoesNotExist:
+            metrics.record('scan', station, outcome='not_found')
             return render(request, 'participants/error.html', {
-                'error': f'Participant "{full_name}" from {nationality} not found in system.'
+                'error': f'Participant "{full_name}" from {nationality} not found in system.',
+                'candidates': fuzzy.suggest(event, full_name, nationality),
             })
     
     # If not POST, redirect to check-in (should not happen in normal flow)
     return redirect('checkin')
 
 @login_required
+@event_required
 def toggle_presence(request, participant_id):
     if request.method != "POST":
         return redirect('dashboard')
     
-    p = get_object_or_404(Participant, id=participant_id)
+    p = _event_participant(request, participant_id)
     p.is_present = not p.is_present
+    if p.is_present:
+        p.mark_seen()
     p.save()
+    metrics.record('presence', metrics.station_id(request), outcome='present' if p.is_present else 'absent')
     
     status = "confirmed" if p.is_present else "revoked"
     messages.success(request, f"✅ Presence {status}!")
     return redirect('participant_detail', participant_id=participant_id)
 @login_required
+@event_required
 def toggle_payment(request, participant_id):
     if request.method != "POST":
         return redirect('dashboard')
@@ -452,7 +735,7 @@ def toggle_payment(request, participant_id):
         messages.error(request, "You don't have permission to change payment status.")
         return redirect('participant_detail', participant_id=participant_id)
     
-    p = get_object_or_404(Participant, id=participant_id)
+    p = _event_participant(request, participant_id)
     
     # Cycle: UNPAID → PAID → FREE → UNPAID
     if not p.paid and not p.free_access:
@@ -476,59 +759,169 @@ def toggle_payment(request, participant_id):
     return redirect('participant_detail', participant_id=participant_id)
 
 @login_required
+@event_required
 def toggle_meal(request, participant_id, meal):
     if request.method != "POST":
         return redirect('dashboard')
     
-    p = get_object_or_404(Participant, id=participant_id)
-    valid_meals = [f'{m}_day{d}' for d in range(1,8) for m in ['breakfast','lunch']]
-    
-    if meal in valid_meals:
-        current = getattr(p, meal)
-        setattr(p, meal, not current)
+    p = _event_participant(request, participant_id)
+    # Only the meals of the event's own days can be served
+    if meal in p.event.meal_fields:
+        current = p.meal_served(meal)
+        p.set_meal(meal, not current)
+        if not current:
+            p.mark_seen()
         p.save()
         action = "served" if not current else "revoked"
+        metrics.record('meal', metrics.station_id(request), meal, action, _scan_to_serve_ms(request, p.id) if not current else None)
         messages.success(request, f"✅ Meal '{meal.replace('_', ' ')}' {action}.")
     else:
         messages.error(request, "Invalid meal selection.")
     
     return redirect('participant_detail', participant_id=participant_id)
 
+def _scan_to_serve_ms(request, participant_id):
+    last_scan = request.session.get('last_scan')
+    if not last_scan or last_scan[0] != participant_id:
+        return None
+    elapsed = time.time() - last_scan[1]
+    if elapsed > 15 * 60:  # stale scan, not the same service
+        return None
+    return elapsed * 1000
+
+@login_required
+@event_required
+def bulk_update_participants(request):
+    # JSON body: {"ids": [...]} and/or {"filter": {"nationality": "Tunisia", "present": true}},
+    # plus {"set": {"lunch_day2": true, "is_present": true, "payment": "paid"}}
+    if request.method != "POST":
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    ids, filters, changes = payload.get('ids'), payload.get('filter'), payload.get('set') or {}
+    if ids is None and not filters:
+        return JsonResponse({'error': 'Give ids or a filter (refusing to update the whole roster)'}, status=400)
+    if 'payment' in changes and not (request.user.is_super_admin or request.user.is_checkin_admin):
+        return JsonResponse({'error': "You don't have permission to change payment status."}, status=403)
+
+    event = get_current_event(request)
+    try:
+        matched, changed = bulk.apply(event, changes, ids, filters)
+    except bulk.BulkError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    station = metrics.station_id(request)
+    for state, count in changed.items():
+        if state.startswith(('breakfast', 'lunch')) and changes[state] and count:
+            metrics.record('meal', station, state, 'served', count=count)
+    log_admin_action(
+        request.user,
+        f"BULK UPDATE {', '.join(f'{k}={v}' for k, v in changes.items())} on {matched} participants "
+        f"({', '.join(f'{k}: {n} changed' for k, n in changed.items())})"
+        + (f" filter {filters}" if filters else ''),
+        event,
+    )
+    return JsonResponse({'matched': matched, 'changed': changed})
+
 @login_required
+@event_required
+def participant_changes(request):
+    # Incremental sync for downstream copies: journal entries after ?since=<seq>, oldest first.
+    # Start from 0 for a full copy, then pass back `next` until `more` is false. An entry
+    # with op 'reset' (after a database restore) means: drop the copy, the full roster follows.
+    try:
+        since = max(0, int(request.GET.get('since', 0)))
+        limit = max(1, min(int(request.GET.get('limit', journal.PAGE_SIZE)), journal.MAX_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers'}, status=400)
+    event = get_current_event(request)
+    changes, more = journal.feed(event, since, limit)
+    return JsonResponse({
+        'event': event.id,
+        'since': since,
+        'next': changes[-1]['seq'] if changes else since,
+        'more': more,
+        'changes': changes,
+    })
+
+@login_required
+def metrics_api(request):
+    return JsonResponse(metrics.snapshot())
+
+@login_required
+@event_required
 def mark_present(request, participant_id):
-    p = get_object_or_404(Participant, id=participant_id)
+    p = _event_participant(request, participant_id)
     if not p.is_present:
         p.is_present = True
+        p.mark_seen()
         p.save()
+        metrics.record('presence', metrics.station_id(request), outcome='present')
         messages.success(request, "✅ Presence confirmed!")
     else:
         messages.info(request, "ℹ️ Already marked as present.")
     return render(request, 'participants/participant_detail.html', {'p': p})
 
 @login_required
+@event_required
+@versioning.conditional
 def participant_detail_view(request, participant_id):
-    p = get_object_or_404(Participant, id=participant_id)
-    return render(request, 'participants/participant_detail.html', {'p': p})
+    p = _event_participant(request, participant_id)
+    from_scan = request.GET.get('from_scan') == '1'
+    if from_scan:
+        # QR resolved on the station from the roster snapshot; count it like a server-side scan
+        station = metrics.station_id(request)
+        request.session['station_id'] = station
+        request.session['last_scan'] = [p.id, time.time()]
+        metrics.record('scan', station, outcome='found')
+    return render(request, 'participants/participant_detail.html', {'p': p, 'from_scan': from_scan})
 
 @login_required
+@event_required
+@replica_reads
+@versioning.conditional
 def export_participants(request):
-    participants = Participant.objects.all().values(
-        'full_name', 'nationality', 'paid', 'is_present',
-        'breakfast_day1', 'lunch_day1',
-        'breakfast_day2', 'lunch_day2',
-        'breakfast_day3', 'lunch_day3',
-        'breakfast_day4', 'lunch_day4',
-        'breakfast_day5', 'lunch_day5',
+    event = get_current_event(request)
+    participants = Participant.objects.filter(event=event).values(
+        'full_name', 'nationality', 'paid', 'is_present', 'meals_served',
     )
-    df = pd.DataFrame(participants)
+    df = pd.DataFrame(participants, columns=['full_name', 'nationality', 'paid', 'is_present', 'meals_served'])
+    # One TRUE/FALSE column per meal, unpacked from the meals_served bits
+    meals = df.pop('meals_served').astype('int64')
+    for field in event.meal_fields:
+        df[field] = (meals & MEAL_BITS[field]) != 0
     df['paid'] = df['paid'].map({True: 'PAID', False: 'UNPAID'})
     df['is_present'] = df['is_present'].map({True: 'YES', False: 'NO'})
 
     response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=congress_participants.xlsx'
+    response['Content-Disposition'] = f'attachment; filename=congress_participants_event{event.id}.xlsx'
     df.to_excel(response, index=False)
     return response
 
+@login_required
+@event_required
+def export_snapshot(request):
+    # Typed columnar snapshot for analysts (Parquet by default, ?format=arrow for Arrow IPC)
+    fmt = request.GET.get('format', 'parquet')
+    if fmt not in exports.FORMATS:
+        return JsonResponse({'error': f"Unknown format '{fmt}'"}, status=400)
+    if exports.pa is None:
+        return JsonResponse({'error': 'Columnar export is not available on this server.'}, status=501)
+
+    event = get_current_event(request)
+    content_type, extension = exports.FORMATS[fmt]
+    snapshot = tempfile.TemporaryFile()
+    exports.write_snapshot(event, snapshot, fmt)
+    snapshot.seek(0)
+    return FileResponse(
+        snapshot,
+        as_attachment=True,
+        filename=f'congress_participants_event{event.id}.{extension}',
+        content_type=content_type,
+    )
+
 @login_required
 def edit_admin_role(request, user_id):
     if not request.user.is_super_admin:
@@ -601,9 +994,12 @@ def reset_admin_password(request, user_id):
     return render(request, 'participants/reset_password.html', {'user_to_reset': user_to_reset})
 
 @login_required
+@event_required
+@replica_reads
+@versioning.conditional
 def participants_list(request):
     query = request.GET.get('q', '').strip()
-    participants = Participant.objects.all()
+    participants = Participant.objects.filter(event=get_current_event(request))
     
     if query:
         participants = participants.filter(
@@ -623,8 +1019,9 @@ def participants_list(request):
     })
 
 @login_required
+@event_required
 def edit_participant(request, participant_id):
-    p = get_object_or_404(Participant, id=participant_id)
+    p = _event_participant(request, participant_id)
     
     if request.method == "POST":
         p.full_name = request.POST.get('full_name', '').strip()
@@ -633,7 +1030,7 @@ def edit_participant(request, participant_id):
         p.save()
         
         # Log the action
-        log_admin_action(request.user, f"EDITED participant {p.full_name} ({p.nationality})")
+        log_admin_action(request.user, f"EDITED participant {p.full_name} ({p.nationality})", p.event)
         messages.success(request, "✅ Participant updated successfully!")
         return redirect('participants_list')
     
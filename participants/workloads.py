@@ -0,0 +1,161 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; slots are then counted per process only
+    fcntl = None
+
+# Every gunicorn worker serves both the scan stations and the admin screens. A few
+# concurrent exports, imports or AI reports can tie up the whole pool and scans queue
+# behind them. Views are classified by URL name; heavy ones must take one of
+# HEAVY_CONCURRENCY slots, shared by all workers on the host through lock files.
+# When all are taken the request is turned away at once with 503 + Retry-After:
+# waiting would hold a worker that check-in may need. Background imports
+# (participants.jobs) run for minutes, so they take BACKGROUND_CONCURRENCY slots
+# of their own, waiting as long as it takes; a running import never turns away
+# an export.
+
+logger = logging.getLogger(__name__)
+
+# Latency-critical: the scan -> detail -> toggle loop at the stations. Never limited.
+CRITICAL = {
+    'checkin', 'scan_qr', 'participant_detail', 'toggle_presence', 'toggle_meal',
+    'toggle_payment', 'mark_present', 'search_participant', 'roster_snapshot',
+}
+# Heavy: {url name: methods that are heavy (None = all)}
+HEAVY = {
+    'export_participants': None,
+    'export_snapshot': None,
+    'ai_report': None,
+    'import_real_participants': {'POST'},
+    'delete_all_participants': {'POST'},
+}
+
+SLOTS = getattr(settings, 'HEAVY_CONCURRENCY', 1)
+BACKGROUND_SLOTS = getattr(settings, 'BACKGROUND_CONCURRENCY', 1)
+RETRY_AFTER = getattr(settings, 'HEAVY_RETRY_AFTER', 30)
+POLL_INTERVAL = 1.0
+
+# Used without fcntl
+_local_slots = {
+    'heavy': threading.BoundedSemaphore(max(SLOTS, 1)),
+    'background': threading.BoundedSemaphore(max(BACKGROUND_SLOTS, 1)),
+}
+
+
+def classify(url_name, method):
+    """'critical', 'heavy' or 'standard' for a resolved view."""
+    if url_name in CRITICAL:
+        return 'critical'
+    methods = HEAVY.get(url_name, ())
+    if methods is None or method in methods:
+        return 'heavy'
+    return 'standard'
+
+
+def slot_dir():
+    return getattr(settings, 'WORKLOAD_DIR', os.path.join(tempfile.gettempdir(), 'congress_checkin_workloads'))
+
+
+def _pool_size(pool):
+    return SLOTS if pool == 'heavy' else BACKGROUND_SLOTS
+
+
+def try_acquire(pool='heavy'):
+    """A held slot from `pool` (call its release()), or None when all are taken."""
+    if fcntl is None:
+        return _LocalSlot(pool) if _local_slots[pool].acquire(blocking=False) else None
+    os.makedirs(slot_dir(), exist_ok=True)
+    for i in range(_pool_size(pool)):
+        f = open(os.path.join(slot_dir(), f'{pool}-{i}.lock'), 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            continue
+        return _FileSlot(f)
+    return None
+
+
+class _FileSlot:
+    def __init__(self, f):
+        self.f = f
+
+    def release(self):
+        if not self.f.closed:
+            self.f.close()  # drops the lock
+
+
+class _LocalSlot:
+    def __init__(self, pool):
+        self.pool = pool
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            _local_slots[self.pool].release()
+
+
+def wait_for_slot(cancelled):
+    """Block until a background slot frees up; None when the limit is off or cancelled() turns true."""
+    while BACKGROUND_SLOTS > 0:
+        slot = try_acquire('background')
+        if slot is not None or cancelled():
+            return slot
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def _busy(request):
+    message = "The server is busy with other reports or imports; try again shortly."
+    if 'application/json' in request.headers.get('Accept', '') or request.resolver_match.route.startswith('api/'):
+        response = JsonResponse({'error': message}, status=503)
+    else:
+        response = HttpResponse(message, status=503, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(RETRY_AFTER)
+    return response
+
+
+def _closing(close, slot):
+    def close_and_release():
+        try:
+            close()
+        finally:
+            slot.release()
+    return close_and_release
+
+
+class WorkloadIsolationMiddleware:
+    """Caps concurrent heavy requests across the host's workers (see module comment)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        slot = getattr(request, '_workload_slot', None)
+        if slot is not None:
+            if getattr(response, 'streaming', False):
+                # Streamed exports keep the slot until the server closes the response
+                # after the last byte (or a dropped connection)
+                response.close = _closing(response.close, slot)
+            else:
+                slot.release()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if SLOTS <= 0 or classify(request.resolver_match.url_name, request.method) != 'heavy':
+            return None
+        request._workload_slot = try_acquire()
+        if request._workload_slot is None:
+            logger.warning("Turned away %s %s: all %s heavy slots busy", request.method, request.path, SLOTS)
+            return _busy(request)
+        return None